@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request throughput of the milestone routes, blocking vs async.
+
+Usage:
+    python benchmarks/bench_async_routes.py [--requests 400] [--concurrency 50]
+        [--latency-ms 20]
+
+DynamoDB is replaced by an in-memory table that sleeps for a fixed round-trip
+latency on every call. The "blocking" run calls the synchronous repositories
+straight from the async routes (the previous behaviour); the "async" run uses
+AsyncGoalRepository/AsyncMilestoneRepository on the worker pool.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+from src.api.routes import goals, milestones
+from src.core.config import get_settings
+from src.main import app
+from src.repositories import (
+    AsyncDynamoDBClient,
+    AsyncGoalRepository,
+    AsyncMilestoneRepository,
+    DynamoDBClient,
+    GoalRepository,
+    MilestoneRepository,
+)
+from src.repositories import key_layout
+
+USER_ID = "dev-user-123"
+GOAL_ID = "bench-goal"
+
+
+class SimulatedDynamoDBClient(DynamoDBClient):
+    """In-memory table that sleeps for a fixed latency on every round trip"""
+
+    fast_path = False
+    colocated = True
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.items: dict[tuple[str, str], dict[str, Any]] = {}
+        self.layouts = (key_layout.USER_LAYOUT,)
+
+    def put_item(self, item: dict[str, Any]) -> None:
+        time.sleep(self.latency)
+        self.items[(item["PK"], item["SK"])] = item
+
+    def get_item(self, pk: str, sk: str, projection=None) -> dict[str, Any] | None:
+        time.sleep(self.latency)
+        return self.items.get((pk, sk))
+
+    def iter_query(
+        self,
+        pk,
+        sk_prefix=None,
+        sk_value=None,
+        page_size=None,
+        projection=None,
+        sk_between=None,
+    ):
+        time.sleep(self.latency)
+        for (item_pk, item_sk), item in sorted(self.items.items()):
+            if item_pk == pk and item_sk.startswith(sk_value or sk_prefix or ""):
+                yield item
+
+
+class SimulatedAsyncDynamoDBClient(AsyncDynamoDBClient):
+    def __init__(self, db: SimulatedDynamoDBClient):
+        super().__init__(get_settings())
+        self.db = db
+        self.colocated = db.colocated
+
+    def _thread_client(self) -> DynamoDBClient:
+        return self.db
+
+
+class BlockingRepository:
+    """Exposes a synchronous repository through coroutines without offloading"""
+
+    def __init__(self, repo: Any):
+        self.repo = repo
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.repo, name)
+        if not callable(method):
+            return method
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return method(*args, **kwargs)
+
+        return call
+
+
+def seed(db: SimulatedDynamoDBClient, milestone_count: int) -> None:
+    now = datetime.utcnow().isoformat()
+    db.items[(f"USER#{USER_ID}", f"GOAL#{GOAL_ID}")] = {
+        "PK": f"USER#{USER_ID}",
+        "SK": f"GOAL#{GOAL_ID}",
+        "type": "goal",
+        "id": GOAL_ID,
+        "user_id": USER_ID,
+        "title": "Benchmark goal",
+        "description": "",
+        "start_date": date.today().isoformat(),
+        "end_date": date.today().isoformat(),
+        "status": "in_progress",
+        "created_at": now,
+        "updated_at": now,
+    }
+    for i in range(milestone_count):
+        pk, sk = key_layout.milestone_key(USER_ID, GOAL_ID, f"{i:05d}")
+        db.items[(pk, sk)] = {
+            "PK": pk,
+            "SK": sk,
+            "type": "milestone",
+            "id": f"{i:05d}",
+            "goal_id": GOAL_ID,
+            "title": f"Milestone {i}",
+            "description": "",
+            "due_date": date.today().isoformat(),
+            "status": "pending",
+            "order": i + 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+def use_repositories(goal_repo: Any, milestone_repo: Any) -> None:
+    for module in (goals, milestones):
+        app.dependency_overrides[module.get_goal_repository] = lambda: goal_repo
+        app.dependency_overrides[module.get_milestone_repository] = (
+            lambda: milestone_repo
+        )
+
+
+async def drive(total: int, concurrency: int) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": "Bearer bench"},
+    ) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(f"/api/goals/{GOAL_ID}/milestones")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return elapsed, latencies
+
+
+def report(label: str, total: int, elapsed: float, latencies: list[float]) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<10} {total / elapsed:>9.1f} req/s"
+        f"   p50 {statistics.median(latencies) * 1000:>8.1f} ms"
+        f"   p99 {p99 * 1000:>8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--milestones", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SimulatedDynamoDBClient(args.latency_ms / 1000)
+    seed(db, args.milestones)
+
+    print(
+        f"{args.requests} x GET /api/goals/{{id}}/milestones, "
+        f"concurrency {args.concurrency}, {args.latency_ms:g} ms per DynamoDB call, "
+        f"{get_settings().dynamodb_max_workers} worker threads"
+    )
+
+    use_repositories(
+        BlockingRepository(GoalRepository(db)),
+        BlockingRepository(MilestoneRepository(db)),
+    )
+    report(
+        "blocking", args.requests, *asyncio.run(drive(args.requests, args.concurrency))
+    )
+
+    async_db = SimulatedAsyncDynamoDBClient(db)
+    use_repositories(AsyncGoalRepository(async_db), AsyncMilestoneRepository(async_db))
+    report("async", args.requests, *asyncio.run(drive(args.requests, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
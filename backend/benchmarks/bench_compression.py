@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Response sizes and end-to-end latency of list endpoints, by coding.
+
+Usage:
+    python benchmarks/bench_compression.py [--sizes 10 50 200] [--requests 50]
+        [--bandwidth-mbps 5] [--rtt-ms 60]
+
+Seeds a fresh SQLite database with goals and milestones, then:
+
+- sizes: compresses each list body with every gzip level and brotli quality
+  worth considering, reporting bytes, ratio and compression time;
+- end to end: sends API Gateway HTTP API events through the Lambda handler
+  (src.main.handler) with each Accept-Encoding, timing the handler and
+  adding the transfer time of the bytes on the wire over a link of
+  --bandwidth-mbps and --rtt-ms.
+
+brotli rows appear only when the brotli package is installed.
+"""
+
+import argparse
+import base64
+import gzip
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api import compression
+from src.core.config import get_settings
+from src.models import CreateGoalRequest, CreateMilestoneRequest
+from src.repositories import (
+    GoalRepository,
+    MilestoneRepository,
+    create_storage_engine,
+    get_async_dynamodb_client,
+    get_goal_cache,
+)
+
+USER_ID = "dev-user-123"
+
+
+def configure(sqlite_path: str) -> None:
+    settings = get_settings()
+    settings.storage_engine = "sqlite"
+    settings.sqlite_path = sqlite_path
+    get_async_dynamodb_client.cache_clear()
+    get_goal_cache.cache_clear()
+
+
+def seed(size: int) -> str:
+    """`size` goals, the first with `size` milestones; returns its id"""
+    db = create_storage_engine(get_settings())
+    start = date(2026, 1, 1)
+    goals = GoalRepository(db).create_many(
+        USER_ID,
+        [
+            CreateGoalRequest(
+                title=f"Goal {i}: ship the quarterly roadmap item",
+                description="Break the work into milestones and track them weekly.",
+                start_date=start,
+                end_date=start + timedelta(days=90 + i),
+            )
+            for i in range(size)
+        ],
+    )
+    MilestoneRepository(db).create_many(
+        USER_ID,
+        goals[0].id,
+        [
+            CreateMilestoneRequest(
+                title=f"Milestone {i}: review and sign off",
+                description="Draft, review with the team, and record the decision.",
+                due_date=start + timedelta(days=i),
+            )
+            for i in range(size)
+        ],
+    )
+    return goals[0].id
+
+
+def event(path: str, accept_encoding: str) -> dict[str, Any]:
+    """An API Gateway HTTP API (payload format 2.0) GET event"""
+    return {
+        "version": "2.0",
+        "routeKey": f"GET {path}",
+        "rawPath": path,
+        "rawQueryString": "",
+        "headers": {
+            "accept-encoding": accept_encoding,
+            "authorization": "Bearer bench",
+            "host": "bench",
+        },
+        "requestContext": {
+            "http": {
+                "method": "GET",
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+            },
+            "stage": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+
+
+def wire_bytes(response: dict[str, Any]) -> bytes:
+    """The body as API Gateway sends it to the client"""
+    if response.get("isBase64Encoded"):
+        return base64.b64decode(response["body"])
+    return response["body"].encode()
+
+
+def codings() -> list[tuple[str, Any]]:
+    rows = [
+        (f"gzip -{level}", lambda body, level=level: gzip.compress(body, level))
+        for level in (1, 6, 9)
+    ]
+    if compression.brotli is not None:
+        brotli = compression.brotli
+        rows += [
+            (
+                f"br q{quality}",
+                lambda body, quality=quality: brotli.compress(
+                    body, mode=brotli.MODE_TEXT, quality=quality
+                ),
+            )
+            for quality in (1, 4, 6, 11)
+        ]
+    return rows
+
+
+def best_of(fn: Any, body: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(body)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report_sizes(label: str, body: bytes, repeat: int) -> None:
+    print(f"  {label}: {len(body)} bytes")
+    for name, fn in codings():
+        size = len(fn(body))
+        print(
+            f"    {name:<9} {size:>9} bytes  {len(body) / size:>5.1f}x"
+            f"  {best_of(fn, body, repeat) * 1000:>7.2f} ms"
+        )
+
+
+def report_end_to_end(
+    handler: Any,
+    label: str,
+    path: str,
+    requests: int,
+    bandwidth_mbps: float,
+    rtt_ms: float,
+) -> None:
+    print(f"  GET {label}")
+    accept = ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+    for accept_encoding in accept:
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = handler(event(path, accept_encoding), None)
+            latencies.append(time.perf_counter() - started)
+            assert response["statusCode"] == 200, response
+        size = len(wire_bytes(response))
+        handler_ms = statistics.median(latencies) * 1000
+        transfer_ms = rtt_ms + size * 8 / (bandwidth_mbps * 1000)
+        print(
+            f"    {accept_encoding:<9} {size:>9} bytes"
+            f"  handler {handler_ms:>7.2f} ms"
+            f"  transfer {transfer_ms:>8.2f} ms"
+            f"  total {handler_ms + transfer_ms:>8.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--bandwidth-mbps", type=float, default=5.0)
+    parser.add_argument("--rtt-ms", type=float, default=60.0)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    print(
+        f"COMPRESSION_MIN_BYTES={settings.compression_min_bytes}, "
+        f"gzip level {settings.compression_gzip_level}, "
+        f"brotli quality {settings.compression_brotli_quality}"
+        + ("" if compression.brotli is not None else " (brotli not installed)")
+        + f"; {args.bandwidth_mbps:g} Mbit/s, {args.rtt_ms:g} ms RTT"
+    )
+
+    from src.main import handler
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            configure(os.path.join(tmp, "bench.db"))
+            goal_id = seed(size)
+            paths = {
+                "/api/goals": "/api/goals",
+                "/api/goals/{id}/milestones": f"/api/goals/{goal_id}/milestones",
+            }
+            print(f"{size} goals / {size} milestones")
+            for label, path in paths.items():
+                body = wire_bytes(handler(event(path, "identity"), None))
+                report_sizes(f"GET {label}", body, args.repeat)
+            for label, path in paths.items():
+                report_end_to_end(
+                    handler,
+                    label,
+                    path,
+                    args.requests,
+                    args.bandwidth_mbps,
+                    args.rtt_ms,
+                )
+
+
+if __name__ == "__main__":
+    main()
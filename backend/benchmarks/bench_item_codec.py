@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Decode cost of milestone lists: resource path vs low-level fast path.
+
+Usage:
+    python benchmarks/bench_item_codec.py [--sizes 1000 10000] [--repeat 5]
+
+Both paths start from the same wire-format Query items. The resource path
+is what boto3.resource does (TypeDeserializer on every attribute) followed
+by MilestoneRepository._from_item; the fast path is codec.decode_item
+followed by codec.milestone_from_item. No network is involved.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from src.repositories import MilestoneRepository, codec
+
+
+class _Client:
+    fast_path = False
+
+
+def wire_items(count: int) -> list[dict]:
+    now = datetime.utcnow().isoformat()
+    return [
+        {
+            "PK": {"S": "GOAL#bench"},
+            "SK": {"S": f"MILESTONE#{i:06d}"},
+            "type": {"S": "milestone"},
+            "id": {"S": f"{i:06d}"},
+            "goal_id": {"S": "bench"},
+            "title": {"S": f"Milestone {i}"},
+            "description": {"S": "Lorem ipsum dolor sit amet " * 4},
+            "due_date": {"S": (date.today() + timedelta(days=i % 365)).isoformat()},
+            "status": {"S": ("pending", "in_progress", "completed")[i % 3]},
+            "order": {"N": str(i + 1)},
+            "created_at": {"S": now},
+            "updated_at": {"S": now},
+        }
+        for i in range(count)
+    ]
+
+
+def resource_path(items: list[dict]) -> list:
+    deserializer = TypeDeserializer()
+    repo = MilestoneRepository(_Client(), ordering="integer")
+    return [
+        repo._from_item({k: deserializer.deserialize(v) for k, v in item.items()})
+        for item in items
+    ]
+
+
+def fast_path(items: list[dict]) -> list:
+    return [codec.milestone_from_item(codec.decode_item(item)) for item in items]
+
+
+def best_of(fn, items: list[dict], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(items)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>7} {'resource':>12} {'fast path':>12} {'speedup':>9}")
+    for size in args.sizes:
+        items = wire_items(size)
+        assert resource_path(items[:10]) == fast_path(items[:10])
+        slow = best_of(resource_path, items, args.repeat)
+        fast = best_of(fast_path, items, args.repeat)
+        print(
+            f"{size:>7} {slow * 1000:>9.1f} ms {fast * 1000:>9.1f} ms"
+            f" {slow / fast:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
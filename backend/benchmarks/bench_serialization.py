@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Cost of turning stored items into a list response body: models vs dump.
+
+Usage:
+    python benchmarks/bench_serialization.py [--sizes 1000 10000] [--repeat 5]
+
+Both paths start from the same decoded goal and milestone items and end
+with the JSON bytes of the response. The model path is what the list routes
+did before: _from_item, from_goal/from_milestone, then what FastAPI does
+with a response_model (validate the returned models, dump them, json.dumps
+in JSONResponse). The dump path is GoalResponse/MilestoneResponse.dump_item
+and json_response. No network is involved.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.api.responses import json_response
+from src.models import (
+    GoalResponse,
+    MilestoneListResponse,
+    MilestoneResponse,
+    MilestoneStatus,
+)
+from src.repositories import GoalRepository, MilestoneRepository
+
+
+class _Client:
+    fast_path = False
+
+
+def goal_items(count: int) -> list[dict[str, Any]]:
+    now = datetime.utcnow().isoformat()
+    today = date.today()
+    return [
+        {
+            "PK": "USER#bench",
+            "SK": f"GOAL#{i:06d}",
+            "type": "goal",
+            "id": f"{i:06d}",
+            "user_id": "bench",
+            "title": f"Goal {i}",
+            "description": "Lorem ipsum dolor sit amet " * 4,
+            "start_date": today.isoformat(),
+            "end_date": (today + timedelta(days=90)).isoformat(),
+            "status": "in_progress",
+            "created_at": now,
+            "updated_at": now,
+            "milestone_counts": {s.value: 3 for s in MilestoneStatus},
+            "open_milestone_due_dates": {
+                f"m{j}": (today + timedelta(days=j * 10 - 15)).isoformat()
+                for j in range(6)
+            },
+            "next_milestone_order": 9,
+        }
+        for i in range(count)
+    ]
+
+
+def milestone_items(count: int) -> list[dict[str, Any]]:
+    now = datetime.utcnow().isoformat()
+    return [
+        {
+            "PK": "USER#bench",
+            "SK": f"GOALM#bench#MILESTONE#{i:06d}",
+            "type": "milestone",
+            "id": f"{i:06d}",
+            "goal_id": "bench",
+            "title": f"Milestone {i}",
+            "description": "Lorem ipsum dolor sit amet " * 4,
+            "due_date": (date.today() + timedelta(days=i % 365)).isoformat(),
+            "status": ("pending", "in_progress", "completed")[i % 3],
+            "order": i + 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def goals_via_models(items: list[dict[str, Any]]) -> bytes:
+    repo = GoalRepository(_Client(), cache=_NoCache())
+    goals = [GoalResponse.from_goal(repo._from_item(item)) for item in items]
+    adapter = _adapter(list[GoalResponse])
+    content = adapter.dump_python(adapter.validate_python(goals), mode="json")
+    return JSONResponse(content).body
+
+
+def goals_via_dump(items: list[dict[str, Any]]) -> bytes:
+    return json_response([GoalResponse.dump_item(item) for item in items]).body
+
+
+def milestones_via_models(items: list[dict[str, Any]]) -> bytes:
+    repo = MilestoneRepository(_Client(), ordering="integer")
+    milestones = [
+        MilestoneResponse.from_milestone(repo._from_item(item)) for item in items
+    ]
+    page = MilestoneListResponse(
+        milestones=milestones, count=len(milestones), nextCursor=None
+    )
+    adapter = _adapter(MilestoneListResponse)
+    content = adapter.dump_python(adapter.validate_python(page), mode="json")
+    return JSONResponse(content).body
+
+
+def milestones_via_dump(items: list[dict[str, Any]]) -> bytes:
+    milestones = [MilestoneResponse.dump_item(item) for item in items]
+    return json_response(
+        {"milestones": milestones, "count": len(milestones), "nextCursor": None}
+    ).body
+
+
+class _NoCache:
+    def put(self, goal: Any) -> None:
+        pass
+
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def _adapter(annotation: Any) -> TypeAdapter:
+    # FastAPI builds its response field once per route
+    if annotation not in _adapters:
+        _adapters[annotation] = TypeAdapter(annotation)
+    return _adapters[annotation]
+
+
+def best_of(fn: Callable[[list], bytes], items: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(items)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'list':<11} {'items':>7} {'models':>12} {'dump':>12} {'speedup':>9}")
+    for label, make_items, via_models, via_dump in (
+        ("goals", goal_items, goals_via_models, goals_via_dump),
+        ("milestones", milestone_items, milestones_via_models, milestones_via_dump),
+    ):
+        for size in args.sizes:
+            items = make_items(size)
+            assert via_models(items) == via_dump(items)
+            slow = best_of(via_models, items, args.repeat)
+            fast = best_of(via_dump, items, args.repeat)
+            print(
+                f"{label:<11} {size:>7} {slow * 1000:>9.1f} ms {fast * 1000:>9.1f} ms"
+                f" {slow / fast:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
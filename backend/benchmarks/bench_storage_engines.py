@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint latency and throughput of the API on each storage engine.
+
+Usage:
+    python benchmarks/bench_storage_engines.py [--engines dynamodb sqlite]
+        [--requests 200] [--concurrency 10]
+
+The DynamoDB run talks to DYNAMODB_ENDPOINT_URL (DynamoDB Local by default;
+create the table first with scripts/create_table.py). The SQLite run uses a
+fresh database file in a temporary directory. The goal cache is disabled so
+every ownership check reaches the engine.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+from src.core.config import get_settings
+from src.main import app
+from src.models import CreateGoalRequest, CreateMilestoneRequest
+from src.repositories import (
+    GoalRepository,
+    MilestoneRepository,
+    create_storage_engine,
+    get_async_dynamodb_client,
+    get_goal_cache,
+)
+
+USER_ID = "dev-user-123"
+
+
+def configure(engine: str, sqlite_path: str, endpoint_url: str) -> None:
+    settings = get_settings()
+    settings.storage_engine = engine
+    settings.sqlite_path = sqlite_path
+    if engine == "dynamodb" and not settings.dynamodb_endpoint_url:
+        settings.dynamodb_endpoint_url = endpoint_url
+    settings.goal_cache_max_entries = 0
+    get_async_dynamodb_client.cache_clear()
+    get_goal_cache.cache_clear()
+
+
+def seed(milestone_count: int) -> tuple[str, list[str]]:
+    db = create_storage_engine(get_settings())
+    goal = GoalRepository(db).create(
+        USER_ID,
+        CreateGoalRequest(
+            title=f"Benchmark goal {uuid.uuid4().hex[:8]}",
+            start_date="2026-01-01",
+            end_date="2026-12-31",
+        ),
+    )
+    milestone_repo = MilestoneRepository(db)
+    milestone_ids = [
+        milestone_repo.create(
+            USER_ID,
+            goal.id,
+            CreateMilestoneRequest(title=f"Milestone {i}", due_date="2026-06-30"),
+        ).id
+        for i in range(milestone_count)
+    ]
+    return goal.id, milestone_ids
+
+
+def endpoints(
+    goal_id: str, milestone_ids: list[str]
+) -> list[tuple[str, Callable[[httpx.AsyncClient, int], Any]]]:
+    base = f"/api/goals/{goal_id}/milestones"
+    reversed_ids = list(reversed(milestone_ids))
+    return [
+        ("GET /goals", lambda c, i: c.get("/api/goals")),
+        ("GET /goals/{id}", lambda c, i: c.get(f"/api/goals/{goal_id}")),
+        ("GET /milestones", lambda c, i: c.get(base)),
+        (
+            "GET /milestones/{id}",
+            lambda c, i: c.get(f"{base}/{milestone_ids[i % len(milestone_ids)]}"),
+        ),
+        (
+            "PUT /milestones/{id}",
+            lambda c, i: c.put(
+                f"{base}/{milestone_ids[i % len(milestone_ids)]}",
+                json={"title": f"Renamed {i}"},
+            ),
+        ),
+        (
+            "POST /reorder",
+            lambda c, i: c.post(
+                f"{base}/reorder",
+                json={"ordered_ids": reversed_ids if i % 2 else milestone_ids},
+            ),
+        ),
+    ]
+
+
+async def drive(
+    request: Callable[[httpx.AsyncClient, int], Any],
+    total: int,
+    concurrency: int,
+) -> tuple[float, list[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    conflicts = 0
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": "Bearer bench"},
+    ) as client:
+
+        async def one(i: int) -> None:
+            nonlocal conflicts
+            async with semaphore:
+                started = time.perf_counter()
+                response = await request(client, i)
+                # Concurrent reorders of one goal are expected to collide
+                if response.status_code == 409:
+                    conflicts += 1
+                else:
+                    response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return elapsed, latencies, conflicts
+
+
+def report(
+    label: str,
+    total: int,
+    elapsed: float,
+    latencies: list[float],
+    conflicts: int,
+) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  {label:<22} {total / elapsed:>9.1f} req/s"
+        f"   p50 {statistics.median(latencies) * 1000:>8.2f} ms"
+        f"   p99 {p99 * 1000:>8.2f} ms"
+        + (f"   {conflicts} conflicts" if conflicts else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=["dynamodb", "sqlite"],
+        default=["dynamodb", "sqlite"],
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--milestones", type=int, default=20)
+    parser.add_argument("--dynamodb-endpoint", default="http://localhost:8000")
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests per endpoint, concurrency {args.concurrency}, "
+        f"{args.milestones} milestones per goal"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in args.engines:
+            configure(engine, os.path.join(tmp, "bench.db"), args.dynamodb_endpoint)
+            goal_id, milestone_ids = seed(args.milestones)
+            print(engine)
+            for label, request in endpoints(goal_id, milestone_ids):
+                report(
+                    label,
+                    args.requests,
+                    *asyncio.run(drive(request, args.requests, args.concurrency)),
+                )
+
+
+if __name__ == "__main__":
+    main()
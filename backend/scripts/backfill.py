@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run a backfill migration over the whole table with a parallel Scan.
+
+Usage:
+    python scripts/backfill.py milestone-index-keys [--segments 8] [--workers 8]
+        [--page-size 100] [--read-capacity 200] [--write-capacity 100]
+        [--checkpoint path] [--dry-run]
+
+Segment positions are saved to the checkpoint file (by default
+.backfill-<migration>.json) after every page; running the same command
+again resumes an interrupted run, and a finished one does nothing. Delete
+the file to start over. --read-capacity/--write-capacity cap the units
+spent per second. The table and endpoint come from the environment/.env
+like the app's; migrations are defined in src/repositories/backfill.py.
+
+milestone-index-keys adds user-milestones-index keys to milestones of
+both key layouts. It first scans the goals for their owners, which goal-
+layout milestones do not carry, and reports how many it found.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.config import get_settings
+from src.repositories.backfill import (
+    MIGRATIONS,
+    BackfillRunner,
+    CheckpointStore,
+    DynamoDBScanBackend,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--read-capacity", type=float, default=None)
+    parser.add_argument("--write-capacity", type=float, default=None)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    runner = BackfillRunner(
+        DynamoDBScanBackend(get_settings()),
+        MIGRATIONS[args.migration],
+        segments=args.segments,
+        workers=args.workers,
+        page_size=args.page_size,
+        checkpoints=CheckpointStore(
+            args.checkpoint or f".backfill-{args.migration}.json"
+        ),
+        read_capacity=args.read_capacity,
+        write_capacity=args.write_capacity,
+        dry_run=args.dry_run,
+    )
+    print(
+        f"{args.migration}: {args.segments} segments, "
+        f"{runner.workers} workers{' (dry run)' if args.dry_run else ''}"
+    )
+    report = runner.run()
+    print(report.format(args.dry_run, MIGRATIONS[args.migration].prepared))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Reproducible Lambda deployment bundle, precompiled for the target runtime.
+
+Usage:
+    python scripts/build_lambda_bundle.py [--output dist/lambda] [--layer]
+        [--python-version 3.12] [--architecture x86_64] [--python python3.12]
+        [--no-compile] [--runs 5] [--extra brotli]
+
+Installs requirements.txt and the optional --extra requirements (such as
+brotli, which response compression uses when it is installed) for the
+Lambda platform (manylinux wheels for --architecture and --python-version,
+whatever the local interpreter is), adds src/, and trims what the function
+never reads:
+
+- DEV_ONLY_REQUIREMENTS (uvicorn, and click with it), which only
+  run_local.py uses;
+- console scripts (bin/), tests, type stubs, C headers and other files
+  that are not imported;
+- dist-info directories down to METADATA and entry_points.txt, which
+  importlib.metadata reads at runtime (opentelemetry, imported by FastAPI,
+  finds its context implementation through an entry point);
+- botocore and boto3 data of AWS services other than --aws-services.
+
+The sources are then compiled by a Python --python-version interpreter into
+__pycache__ with unchecked-hash pycs: the function's directory is read-only,
+so without them every cold start compiles every module it imports, and
+with timestamp pycs Python would stat each source to validate them.
+
+Writes to --output:
+
+- function.zip: src/ and, without --layer, the dependencies;
+- layer.zip (--layer): the dependencies under python/, to publish as a
+  Lambda layer;
+- requirements.lock.txt: the versions installed; pass it as --requirements
+  to rebuild the same bundle.
+
+Zip entries are sorted, with fixed timestamps and permissions, so the same
+inputs give byte-identical zips (and unchanged code hashes for Lambda).
+Finally it reports the sizes and imports src.main from the unpacked bundle
+with the target interpreter, with and without the precompiled bytecode.
+"""
+
+import argparse
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+from check_import_time import BACKEND_DIR, measure, median_run
+
+# Requirements of local development only
+DEV_ONLY_REQUIREMENTS = ("uvicorn",)
+
+# Wheel platforms for each Lambda architecture (the python3.12 runtime is
+# Amazon Linux 2023, glibc 2.34)
+PLATFORMS = {
+    "x86_64": ("manylinux2014_x86_64", "manylinux_2_28_x86_64"),
+    "arm64": ("manylinux2014_aarch64", "manylinux_2_28_aarch64"),
+}
+
+# platform.machine() of each architecture
+MACHINES = {"x86_64": "x86_64", "amd64": "x86_64", "aarch64": "arm64", "arm64": "arm64"}
+
+# Directories and files that are never imported
+STRIPPED_DIRS = ("__pycache__", "tests")
+STRIPPED_SUFFIXES = (".pyi", ".pyx", ".c", ".h", ".md", "py.typed")
+KEPT_METADATA = ("METADATA", "entry_points.txt")
+
+# Fixed timestamp of every zip entry (the earliest a zip can hold)
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+
+class Tree:
+    """File count and size of a directory"""
+
+    def __init__(self, path: str):
+        self.files = 0
+        self.bytes = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                self.files += 1
+                self.bytes += os.path.getsize(os.path.join(dirpath, filename))
+
+    def __str__(self) -> str:
+        return f"{self.files:>6} files {self.bytes / 2**20:>7.1f} MB"
+
+
+def requirement_name(line: str) -> str:
+    return re.split(r"[\s\[<>=!~;@]", line, maxsplit=1)[0].lower().replace("_", "-")
+
+
+def runtime_requirements(
+    path: str, target: str, extras: tuple[str, ...] = ()
+) -> None:
+    """
+    Copy the requirements file at `path` to `target` without
+    DEV_ONLY_REQUIREMENTS, adding the `extras` requirements
+    """
+    with open(path) as f:
+        lines = [
+            line.rstrip("\n") + "\n"
+            for line in f
+            if requirement_name(line.strip()) not in DEV_ONLY_REQUIREMENTS
+        ]
+    with open(target, "w") as f:
+        f.writelines(lines + [f"{extra}\n" for extra in extras])
+
+
+def install(
+    requirements: str, target: str, python_version: str, architecture: str
+) -> None:
+    command = [
+        sys.executable, "-m", "pip", "install",
+        "--quiet",
+        "--requirement", requirements,
+        "--target", target,
+        "--implementation", "cp",
+        "--python-version", python_version,
+        "--only-binary", ":all:",
+        "--no-compile",
+        "--upgrade",
+    ]  # fmt: skip
+    for wheel_platform in PLATFORMS[architecture]:
+        command += ["--platform", wheel_platform]
+    subprocess.run(command, check=True)
+
+
+def installed_versions(site: str) -> list[str]:
+    """name==version of every distribution installed in `site`"""
+    pins = []
+    for entry in os.listdir(site):
+        if not entry.endswith(".dist-info"):
+            continue
+        fields = {}
+        with open(os.path.join(site, entry, "METADATA"), encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    break  # end of the headers
+                name, _, value = line.partition(":")
+                fields.setdefault(name, value.strip())
+        pins.append(f"{fields['Name']}=={fields['Version']}")
+    return sorted(pins, key=str.lower)
+
+
+def strip(site: str, aws_services: list[str]) -> None:
+    """Remove from an installed `site` what the function never reads"""
+    shutil.rmtree(os.path.join(site, "bin"), ignore_errors=True)
+    for data in ("botocore/data", "boto3/data"):
+        data_dir = os.path.join(site, data)
+        for entry in os.listdir(data_dir):
+            path = os.path.join(data_dir, entry)
+            if os.path.isdir(path) and entry not in aws_services:
+                shutil.rmtree(path)
+
+    for dirpath, dirnames, filenames in os.walk(site):
+        for dirname in list(dirnames):
+            if dirname in STRIPPED_DIRS or dirname.startswith("."):
+                shutil.rmtree(os.path.join(dirpath, dirname))
+                dirnames.remove(dirname)
+        metadata = dirpath.endswith(".dist-info")
+        for filename in filenames:
+            if (
+                metadata
+                and filename not in KEPT_METADATA
+                or filename.endswith(STRIPPED_SUFFIXES)
+            ):
+                os.remove(os.path.join(dirpath, filename))
+        if metadata:
+            for dirname in dirnames:
+                shutil.rmtree(os.path.join(dirpath, dirname))
+            dirnames.clear()
+
+
+def target_interpreter(python: str | None, python_version: str) -> str | None:
+    """The interpreter to compile and import with, if one is available"""
+    found = python or shutil.which(f"python{python_version}")
+    if found is None:
+        return None
+    result = subprocess.run(
+        [found, "-c", "import sys; print('%d.%d' % sys.version_info[:2])"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0 and python is None:
+        return None  # e.g. a pyenv shim of a version not selected
+    if result.returncode != 0:
+        raise SystemExit(f"running {python} failed:\n{result.stderr}")
+    version = result.stdout.strip()
+    if version != python_version:
+        raise SystemExit(f"{found} is Python {version}, not {python_version}")
+    return found
+
+
+def compile_bytecode(python: str, path: str, deployed_at: str) -> None:
+    """
+    Compile the tree at `path`, recording source paths under `deployed_at`
+    (where Lambda unpacks it) rather than the build directory, which keeps
+    tracebacks accurate and the pycs reproducible.
+    """
+    subprocess.run(
+        [
+            python, "-m", "compileall",
+            "-q",
+            "-j", "0",
+            "--invalidation-mode", "unchecked-hash",
+            "-s", path,
+            "-p", deployed_at,
+            path,
+        ],  # fmt: skip
+        check=True,
+    )
+
+
+def write_zip(root: str, path: str) -> None:
+    """Zip the tree at `root` reproducibly"""
+    names = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            names.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    with zipfile.ZipFile(path, "w") as archive:
+        for name in sorted(names):
+            info = zipfile.ZipInfo(name.replace(os.sep, "/"), ZIP_TIMESTAMP)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with open(os.path.join(root, name), "rb") as f:
+                archive.writestr(info, f.read(), compresslevel=9)
+
+
+def report_packages(site: str, top: int) -> None:
+    sizes = []
+    for entry in os.listdir(site):
+        path = os.path.join(site, entry)
+        if entry.endswith(".dist-info") or entry == "src":
+            continue
+        size = Tree(path).bytes if os.path.isdir(path) else os.path.getsize(path)
+        sizes.append((size, entry))
+    for size, entry in sorted(sizes, reverse=True)[:top]:
+        print(f"  {entry:<40} {size / 2**20:>7.1f} MB")
+
+
+def report_import_time(python: str, sys_path: list[str], runs: int) -> None:
+    rows = [("precompiled", ())]
+    with tempfile.TemporaryDirectory() as empty:
+        # pycs are looked up under the (empty) prefix only, and -B keeps
+        # them from being written: every run compiles, as without them
+        rows.append(("from source", ("-B", "-X", f"pycache_prefix={empty}")))
+        for label, flags in rows:
+            total_ms, entries = median_run(
+                [
+                    measure("src.main", python, sys_path, flags=flags)
+                    for _ in range(runs)
+                ]
+            )
+            print(
+                f"  {label:<12} median {total_ms:>7.1f} ms over {runs} runs,"
+                f" {len(entries)} modules"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--output", default=os.path.join(BACKEND_DIR, "dist", "lambda")
+    )
+    parser.add_argument(
+        "--requirements", default=os.path.join(BACKEND_DIR, "requirements.txt")
+    )
+    parser.add_argument("--extra", nargs="+", default=[], help="e.g. brotli")
+    parser.add_argument("--python-version", default="3.12")
+    parser.add_argument("--architecture", choices=sorted(PLATFORMS), default="x86_64")
+    parser.add_argument("--aws-services", nargs="+", default=["dynamodb"])
+    parser.add_argument("--layer", action="store_true")
+    parser.add_argument("--python", help="interpreter of --python-version")
+    parser.add_argument("--no-compile", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    python = target_interpreter(args.python, args.python_version)
+    if python is None and not args.no_compile:
+        raise SystemExit(
+            f"no python{args.python_version} found to compile bytecode with;"
+            " pass --python, or --no-compile"
+        )
+
+    output = os.path.abspath(args.output)
+    function_dir = os.path.join(output, "function")
+    layer_dir = os.path.join(output, "layer")
+    site = os.path.join(layer_dir, "python") if args.layer else function_dir
+    for path in (function_dir, layer_dir):
+        shutil.rmtree(path, ignore_errors=True)
+    for name in ("function.zip", "layer.zip"):
+        if os.path.exists(os.path.join(output, name)):
+            os.remove(os.path.join(output, name))
+    os.makedirs(site)
+    os.makedirs(function_dir, exist_ok=True)
+
+    requirements = os.path.join(output, "requirements.runtime.txt")
+    runtime_requirements(args.requirements, requirements, tuple(args.extra))
+    install(requirements, site, args.python_version, args.architecture)
+    os.remove(requirements)
+    with open(os.path.join(output, "requirements.lock.txt"), "w") as f:
+        f.writelines(f"{pin}\n" for pin in installed_versions(site))
+
+    installed = Tree(site)
+    strip(site, args.aws_services)
+    stripped = Tree(site)
+    shutil.copytree(
+        os.path.join(BACKEND_DIR, "src"),
+        os.path.join(function_dir, "src"),
+        ignore=shutil.ignore_patterns("__pycache__", "*.py[cod]"),
+    )
+    trees = [function_dir] + ([layer_dir] if args.layer else [])
+    if not args.no_compile:
+        compile_bytecode(python, function_dir, "/var/task")
+        if args.layer:
+            compile_bytecode(python, layer_dir, "/opt")
+
+    print(f"python{args.python_version} {args.architecture}, {output}")
+    print(f"dependencies installed {installed}")
+    print(f"dependencies stripped  {stripped}")
+    for tree in trees:
+        archive = os.path.join(output, os.path.basename(tree) + ".zip")
+        write_zip(tree, archive)
+        print(
+            f"{os.path.basename(archive):<22} {Tree(tree)}"
+            f", zipped {os.path.getsize(archive) / 2**20:.1f} MB"
+        )
+    print("largest packages (Lambda's limit is 250 MB unzipped, layers included):")
+    report_packages(site, args.top)
+
+    if python is None:
+        print("import time: not measured, no interpreter to import with")
+    elif MACHINES.get(platform.machine().lower()) != args.architecture:
+        print(f"import time: not measured, this machine is not {args.architecture}")
+    else:
+        print("import src.main:")
+        sys_path = [function_dir] + ([site] if args.layer else [])
+        report_import_time(python, sys_path, args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
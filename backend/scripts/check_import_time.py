@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Import-time budget of the API module, as a Lambda cold start pays it.
+
+Usage:
+    python scripts/check_import_time.py [--module src.main] [--runs 5]
+        [--budget-ms 1000] [--max-modules 600] [--top 15]
+
+Imports the module in fresh interpreters with `python -X importtime`,
+reports the median total and the packages that cost the most, and exits
+with status 1 when the import goes over budget:
+
+- one of DEFERRED_MODULES was imported: they are imported on first use
+  (boto3/botocore by the DynamoDB client, python-jose and httpx by token
+  verification), and an eager import anywhere in the graph undoes that;
+- more than --max-modules modules were imported;
+- the median import took longer than --budget-ms.
+
+The module checks are exact; the time budget is loose, since timings vary
+from run to run and machine to machine.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# Top-level packages that must not be imported by the API module itself
+DEFERRED_MODULES = ("boto3", "botocore", "s3transfer", "jose", "cryptography", "httpx")
+
+# Default budgets, also enforced by tests/test_import_time.py
+MAX_MODULES = 600
+BUDGET_MS = 1000.0
+
+
+class ImportEntry:
+    """One line of -X importtime output"""
+
+    def __init__(self, name: str, depth: int, self_us: int, cumulative_us: int):
+        self.name = name
+        self.depth = depth
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+
+
+def parse_importtime(output: str) -> list[ImportEntry]:
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        entries.append(
+            ImportEntry(
+                stripped,
+                (len(name) - len(stripped) - 1) // 2,
+                int(fields[0]),
+                int(fields[1]),
+            )
+        )
+    return entries
+
+
+def module_entries(entries: list[ImportEntry], module: str) -> list[ImportEntry]:
+    """The entries imported on behalf of `module`, itself last"""
+    end = next(
+        i
+        for i, entry in enumerate(entries)
+        if entry.name == module and entry.depth == 0
+    )
+    start = end
+    while start > 0 and entries[start - 1].depth > 0:
+        start -= 1
+    return entries[start : end + 1]
+
+
+def importer_of(entries: list[ImportEntry], package: str) -> str:
+    """The first module outside `package` that imported it"""
+    for index, entry in enumerate(entries):
+        if entry.name.split(".")[0] != package:
+            continue
+        parent = next(e for e in entries[index:] if e.depth < entry.depth)
+        if parent.name.split(".")[0] != package:
+            return parent.name
+    raise ValueError(package)
+
+
+def measure(
+    module: str,
+    python: str = sys.executable,
+    sys_path: list[str] | None = None,
+    flags: tuple[str, ...] = (),
+) -> list[ImportEntry]:
+    """
+    Entries of one import of `module` in a fresh interpreter.
+
+    By default it imports from the backend directory with the installed
+    packages. Given `sys_path`, it imports from those directories and the
+    standard library only, as Lambda does from /var/task and /opt/python.
+    """
+    command = [python, "-X", "importtime", *flags, "-c", f"import {module}"]
+    cwd, env = BACKEND_DIR, None
+    if sys_path is not None:
+        command.insert(1, "-S")
+        cwd = sys_path[0]
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys_path)}
+    result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"importing {module} failed")
+    return module_entries(parse_importtime(result.stderr), module)
+
+
+def median_run(runs: list[list[ImportEntry]]) -> tuple[float, list[ImportEntry]]:
+    """The median total in ms, and the entries of the run that took it"""
+    totals = [entries[-1].cumulative_us / 1000 for entries in runs]
+    total_ms = statistics.median(totals)
+    return total_ms, runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+
+def budget_failures(
+    entries: list[ImportEntry],
+    total_ms: float,
+    max_modules: int = MAX_MODULES,
+    budget_ms: float = BUDGET_MS,
+) -> list[str]:
+    """What is over budget in an import's entries; empty when nothing is"""
+    failures = []
+    eager = sorted({e.name.split(".")[0] for e in entries} & set(DEFERRED_MODULES))
+    if eager:
+        failures.append(
+            "eagerly imported: "
+            + ", ".join(f"{p} (by {importer_of(entries, p)})" for p in eager)
+        )
+    if len(entries) > max_modules:
+        failures.append(f"{len(entries)} modules imported, budget {max_modules}")
+    if total_ms > budget_ms:
+        failures.append(f"{total_ms:.1f} ms, budget {budget_ms:g} ms")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--max-modules", type=int, default=MAX_MODULES)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [entries[-1].cumulative_us / 1000 for entries in runs]
+    total_ms, entries = median_run(runs)
+
+    by_package: dict[str, int] = defaultdict(int)
+    for entry in entries:
+        by_package[entry.name.split(".")[0]] += entry.self_us
+    print(
+        f"import {args.module}: median {total_ms:.1f} ms over {args.runs} runs "
+        f"(min {min(totals):.1f}, max {max(totals):.1f}), {len(entries)} modules"
+    )
+    print(f"{'package':<24} {'self ms':>9}")
+    for package, self_us in sorted(by_package.items(), key=lambda p: -p[1])[: args.top]:
+        print(f"{package:<24} {self_us / 1000:>9.1f}")
+
+    failures = budget_failures(entries, total_ms, args.max_modules, args.budget_ms)
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,16 +7,19 @@ Usage:
 
 Requires:
     - DynamoDB Local running on port 8000
+
+The tests create the same table in moto's in-memory DynamoDB
+(endpoint_url=None).
 """
 
 import boto3
 from botocore.exceptions import ClientError
 
 
-def create_table():
+def create_table(endpoint_url: str | None = "http://localhost:8000"):
     dynamodb = boto3.resource(
         "dynamodb",
-        endpoint_url="http://localhost:8000",
+        endpoint_url=endpoint_url,
         region_name="ap-northeast-1",
     )
 
@@ -34,6 +37,8 @@ def create_table():
                 {"AttributeName": "SK", "AttributeType": "S"},
                 {"AttributeName": "type", "AttributeType": "S"},
                 {"AttributeName": "created_at", "AttributeType": "S"},
+                {"AttributeName": "GSI1PK", "AttributeType": "S"},
+                {"AttributeName": "GSI1SK", "AttributeType": "S"},
             ],
             GlobalSecondaryIndexes=[
                 {
@@ -47,7 +52,20 @@ def create_table():
                         "ReadCapacityUnits": 5,
                         "WriteCapacityUnits": 5,
                     },
-                }
+                },
+                {
+                    # Sparse: only milestones carry GSI1PK/GSI1SK
+                    "IndexName": "user-milestones-index",
+                    "KeySchema": [
+                        {"AttributeName": "GSI1PK", "KeyType": "HASH"},
+                        {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                    "ProvisionedThroughput": {
+                        "ReadCapacityUnits": 5,
+                        "WriteCapacityUnits": 5,
+                    },
+                },
             ],
             ProvisionedThroughput={
                 "ReadCapacityUnits": 5,
@@ -55,6 +73,11 @@ def create_table():
             },
         )
         table.wait_until_exists()
+        # Soft-deleted items expire through TTL (src/repositories/tombstone.py)
+        dynamodb.meta.client.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expires_at"},
+        )
         print(f"Table '{table_name}' created successfully!")
     except ClientError as e:
         if e.response["Error"]["Code"] == "ResourceInUseException":
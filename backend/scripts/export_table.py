@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Export the table to compressed JSONL files, or restore it from them.
+
+Usage:
+    python scripts/export_table.py export DIR [--segments 8] [--chunk-items 50000]
+    python scripts/export_table.py restore DIR [--workers 8]
+
+Both take --table and --endpoint-url (default: DYNAMODB_TABLE_NAME and
+DYNAMODB_ENDPOINT_URL from the environment/.env), so a production export
+can be restored into DynamoDB Local.
+
+export runs a parallel Scan, one thread per segment, and streams each page
+straight into gzip-compressed JSON Lines files of at most --chunk-items
+items (DIR/segment-SSS-CCCCC.jsonl.gz), so memory use does not grow with
+the table. Items are written in DynamoDB's wire format ({"S": ...},
+{"N": ...}), which restores them exactly. A manifest.json listing the
+files is written last; a directory without one is an incomplete export.
+
+restore spreads the files across worker threads, each sending
+BatchWriteItem requests of 25 items and resending unprocessed or throttled
+items with exponential backoff.
+
+Both report items/s and the capacity units consumed.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import boto3
+from botocore.exceptions import ClientError
+
+from src.core.config import get_settings
+from src.repositories.backfill import (
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    THROTTLING_ERRORS,
+)
+from src.repositories.dynamodb import client_config
+
+# Items per BatchWriteItem request, the most DynamoDB accepts
+BATCH_SIZE = 25
+
+# Attempts to write one batch before giving up on its unprocessed items
+BATCH_MAX_ATTEMPTS = 10
+
+
+class Progress:
+    """Item and capacity counters shared by the worker threads"""
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.capacity = 0.0
+        self.retries = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, items: int = 0, capacity: float = 0.0, retries: int = 0) -> None:
+        with self._lock:
+            self.items += items
+            self.capacity += capacity
+            self.retries += retries
+
+    def report(self, units: str) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.items / elapsed if elapsed else 0.0
+        return (
+            f"{self.items} items in {elapsed:.1f} s ({rate:.1f} items/s), "
+            f"{self.capacity:.1f} {units} consumed, {self.retries} retries"
+        )
+
+
+def client_factory(endpoint_url: str | None) -> Callable[[], Any]:
+    """Per-thread low-level DynamoDB clients"""
+    settings = get_settings()
+    local = threading.local()
+
+    def client() -> Any:
+        if getattr(local, "client", None) is None:
+            client_kwargs: dict[str, Any] = {"region_name": settings.aws_region}
+            if endpoint_url:
+                client_kwargs["endpoint_url"] = endpoint_url
+            config = client_config(settings)
+            if config is not None:
+                client_kwargs["config"] = config
+            session = boto3.session.Session()
+            local.client = session.client("dynamodb", **client_kwargs)
+        return local.client
+
+    return client
+
+
+def backoff(attempt: int) -> None:
+    """Full-jitter exponential backoff"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    time.sleep(random.uniform(0, delay))
+
+
+def scan_segment(
+    client: Callable[[], Any],
+    table: str,
+    segment: int,
+    total_segments: int,
+    progress: Progress,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield the pages of one Scan segment, retrying throttled requests"""
+    scan_kwargs: dict[str, Any] = {
+        "TableName": table,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    attempt = 0
+    while True:
+        try:
+            response = client().scan(**scan_kwargs)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                raise
+            progress.add(retries=1)
+            backoff(attempt)
+            attempt += 1
+            continue
+        attempt = 0
+        consumed = response.get("ConsumedCapacity", {})
+        progress.add(capacity=consumed.get("CapacityUnits", 0.0))
+        yield response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def export_segment(
+    client: Callable[[], Any],
+    table: str,
+    directory: str,
+    segment: int,
+    total_segments: int,
+    chunk_items: int,
+    progress: Progress,
+) -> list[dict[str, Any]]:
+    """Write one segment to chunk files; returns their manifest entries"""
+    files: list[dict[str, Any]] = []
+    out = None
+    try:
+        for page in scan_segment(client, table, segment, total_segments, progress):
+            for item in page:
+                if out is None or files[-1]["items"] >= chunk_items:
+                    if out is not None:
+                        out.close()
+                    name = f"segment-{segment:03d}-{len(files):05d}.jsonl.gz"
+                    path = os.path.join(directory, name)
+                    out = gzip.open(path, "wt", encoding="utf-8")
+                    files.append({"file": name, "items": 0})
+                out.write(json.dumps(item, separators=(",", ":")))
+                out.write("\n")
+                files[-1]["items"] += 1
+            progress.add(items=len(page))
+    finally:
+        if out is not None:
+            out.close()
+    return files
+
+
+def export(args: argparse.Namespace) -> int:
+    os.makedirs(args.directory, exist_ok=True)
+    manifest_path = os.path.join(args.directory, "manifest.json")
+    if os.path.exists(manifest_path):
+        print(f"{args.directory} already holds an export")
+        return 1
+
+    client = client_factory(args.endpoint_url)
+    progress = Progress()
+    with ThreadPoolExecutor(
+        max_workers=args.segments, thread_name_prefix="export"
+    ) as pool:
+        futures = [
+            pool.submit(
+                export_segment,
+                client,
+                args.table,
+                args.directory,
+                segment,
+                args.segments,
+                args.chunk_items,
+                progress,
+            )
+            for segment in range(args.segments)
+        ]
+        files = [entry for future in futures for entry in future.result()]
+
+    with open(manifest_path, "w") as f:
+        json.dump(
+            {
+                "table": args.table,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "format": "dynamodb-json-lines+gzip",
+                "items": sum(entry["items"] for entry in files),
+                "files": files,
+            },
+            f,
+            indent=2,
+        )
+    print(f"exported {progress.report('RCU')}")
+    return 0
+
+
+def read_items(path: str) -> Iterator[dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_batch(
+    client: Callable[[], Any],
+    table: str,
+    items: list[dict[str, Any]],
+    progress: Progress,
+) -> None:
+    """BatchWriteItem, resending unprocessed items until all are written"""
+    requests = [{"PutRequest": {"Item": item}} for item in items]
+    for attempt in range(BATCH_MAX_ATTEMPTS):
+        try:
+            response = client().batch_write_item(
+                RequestItems={table: requests},
+                ReturnConsumedCapacity="TOTAL",
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                raise
+            progress.add(retries=1)
+            backoff(attempt)
+            continue
+
+        capacity = sum(
+            consumed.get("CapacityUnits", 0.0)
+            for consumed in response.get("ConsumedCapacity", [])
+        )
+        unprocessed = response.get("UnprocessedItems", {}).get(table, [])
+        progress.add(items=len(requests) - len(unprocessed), capacity=capacity)
+        if not unprocessed:
+            return
+        requests = unprocessed
+        progress.add(retries=1)
+        backoff(attempt)
+    raise RuntimeError(
+        f"{len(requests)} items still unprocessed after {BATCH_MAX_ATTEMPTS} attempts"
+    )
+
+
+def restore_file(
+    client: Callable[[], Any],
+    table: str,
+    path: str,
+    progress: Progress,
+) -> None:
+    batch: list[dict[str, Any]] = []
+    for item in read_items(path):
+        batch.append(item)
+        if len(batch) == BATCH_SIZE:
+            write_batch(client, table, batch, progress)
+            batch = []
+    if batch:
+        write_batch(client, table, batch, progress)
+
+
+def restore(args: argparse.Namespace) -> int:
+    manifest_path = os.path.join(args.directory, "manifest.json")
+    if not os.path.exists(manifest_path):
+        print(f"{args.directory} has no manifest.json; the export is incomplete")
+        return 1
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    client = client_factory(args.endpoint_url)
+    progress = Progress()
+    with ThreadPoolExecutor(
+        max_workers=args.workers, thread_name_prefix="restore"
+    ) as pool:
+        futures = [
+            pool.submit(
+                restore_file,
+                client,
+                args.table,
+                os.path.join(args.directory, entry["file"]),
+                progress,
+            )
+            for entry in manifest["files"]
+        ]
+        for future in futures:
+            future.result()
+
+    print(f"restored {progress.report('WCU')}")
+    return 0
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["export", "restore"])
+    parser.add_argument("directory")
+    parser.add_argument("--table", default=settings.dynamodb_table_name)
+    parser.add_argument("--endpoint-url", default=settings.dynamodb_endpoint_url)
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--chunk-items", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    return {"export": export, "restore": restore}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Move milestones from the goal key layout to the user key layout without
+downtime (see src/repositories/key_layout.py).
+
+Usage:
+    python scripts/migrate_key_layout.py copy
+    python scripts/migrate_key_layout.py verify
+    python scripts/migrate_key_layout.py cleanup
+
+Steps, each one a deploy of DYNAMODB_KEY_LAYOUT or a run of this script
+against the same table:
+
+    1. DYNAMODB_KEY_LAYOUT=goal+user   writes go to both layouts
+    2. copy                            backfill the user layout
+    3. verify                          both layouts hold the same milestones
+    4. DYNAMODB_KEY_LAYOUT=user+goal   reads switch; the goal layout is
+                                       still written, for rolling back
+    5. DYNAMODB_KEY_LAYOUT=user
+    6. cleanup                         delete the goal-layout copies
+
+copy and verify can be re-run at any point of steps 1-4. The settings
+(table, endpoint, DYNAMODB_KEY_LAYOUT) are read from the environment/.env
+like the app's.
+"""
+
+import argparse
+import os
+import sys
+from typing import Any, Iterator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from boto3.dynamodb.conditions import Attr
+
+from src.core.config import get_settings
+from src.repositories import key_layout
+from src.repositories.dynamodb import DynamoDBClient
+
+
+def scan(client: DynamoDBClient, condition: Any) -> Iterator[dict[str, Any]]:
+    scan_kwargs: dict[str, Any] = {"FilterExpression": condition}
+    while True:
+        response = client.table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def goals(client: DynamoDBClient) -> Iterator[tuple[str, str]]:
+    """(user id, goal id) of every goal in the table"""
+    for item in scan(client, Attr("type").eq("goal")):
+        yield item["user_id"], item["id"]
+
+
+def copy(client: DynamoDBClient) -> int:
+    if len(client.layouts) < 2:
+        print("copy needs DYNAMODB_KEY_LAYOUT=goal+user (or user+goal), so that")
+        print("writes made during the backfill reach both layouts")
+        return 1
+    total = 0
+    for user_id, goal_id in goals(client):
+        total += client.copy_to_user_layout(user_id, goal_id)
+    print(f"copied {total} milestones")
+    return 0
+
+
+def _stored(items: Iterator[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    # Keyed by the milestone id ending the SK: fragments left by mirrored
+    # updates have no id attribute
+    return {
+        item["SK"].rpartition("#")[2]: {
+            k: v for k, v in item.items() if k not in ("PK", "SK")
+        }
+        for item in items
+    }
+
+
+def verify(client: DynamoDBClient) -> int:
+    mismatches = 0
+    for user_id, goal_id in goals(client):
+        legacy = _stored(client._iter_physical(f"GOAL#{goal_id}", "MILESTONE#"))
+        copied = _stored(
+            client._iter_physical(
+                f"USER#{user_id}", key_layout.milestones_prefix(goal_id)
+            )
+        )
+        for milestone_id in sorted(legacy.keys() | copied.keys()):
+            if legacy.get(milestone_id) != copied.get(milestone_id):
+                mismatches += 1
+                print(f"goal {goal_id}: milestone {milestone_id} differs")
+    print(f"{mismatches} milestones differ")
+    return 1 if mismatches else 0
+
+
+def cleanup(client: DynamoDBClient) -> int:
+    if client.layouts != (key_layout.USER_LAYOUT,):
+        print("cleanup needs DYNAMODB_KEY_LAYOUT=user, deployed everywhere")
+        return 1
+    deleted = 0
+    with client.table.batch_writer() as batch:
+        for item in scan(client, Attr("PK").begins_with("GOAL#")):
+            batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+            deleted += 1
+    print(f"deleted {deleted} goal-layout milestones")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["copy", "verify", "cleanup"])
+    args = parser.parse_args()
+
+    client = DynamoDBClient(get_settings())
+    return {"copy": copy, "verify": verify, "cleanup": cleanup}[args.command](client)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Finish the cascade of soft-deleted goals.
+
+Usage:
+    python scripts/sweep_tombstones.py
+
+With GOAL_DELETE_MODE=soft a deleted goal's milestones are expired out of
+band by the cleanup function reading the table's stream (see
+src/repositories/tombstone.py). If that did not happen, for example because
+the stream records expired after repeated failures or the goal was deleted
+before the stream was enabled, the goal's tombstone remains until its TTL;
+this script scans for tombstoned goals and expires whatever milestones they
+still have. It is safe to run at any time, such as on a schedule. The table
+and endpoint come from the environment/.env like the app's.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from boto3.dynamodb.conditions import Attr
+
+from src.core.config import get_settings
+from src.repositories import tombstone
+from src.repositories.dynamodb import DynamoDBClient
+from src.repositories.milestone_repository import MilestoneRepository
+
+
+def main() -> int:
+    client = DynamoDBClient(get_settings())
+    repo = MilestoneRepository(client)
+    scan_kwargs = {
+        "FilterExpression": Attr("type").eq("goal")
+        & Attr(tombstone.TOMBSTONE_ATTRIBUTE).exists(),
+        "ProjectionExpression": "id, user_id",
+    }
+    goals = expired = 0
+    while True:
+        response = client.table.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            goals += 1
+            expired += repo.expire_all_by_goal(item["user_id"], item["id"])
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    print(f"{goals} deleted goals, {expired} milestones expired")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
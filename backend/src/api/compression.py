@@ -0,0 +1,220 @@
+"""
+Response compression.
+
+Goal and milestone lists are JSON with the same camelCase keys and ISO
+timestamps on every item, and compress several times over. Responses of at
+least COMPRESSION_MIN_BYTES are compressed with the best coding the client
+accepts: brotli when the brotli package is installed, otherwise gzip.
+Smaller bodies are sent as they are, since the headers and the CPU time
+would cost more than the bytes saved.
+
+Mangum leaves bodies of JSON responses as text, which would corrupt
+compressed ones; CompressedHTTPGateway sends them base64-encoded, flagged
+with isBase64Encoded, which API Gateway decodes before answering.
+"""
+
+import base64
+import zlib
+from typing import Any
+
+from mangum.handlers import APIGateway, HTTPGateway
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.etag import etag_for_coding
+from src.core.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Content types worth compressing; everything the API returns is one of them
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    """Codings of an Accept-Encoding header with their q-values"""
+    codings = {}
+    for part in value.split(","):
+        coding, *params = part.strip().split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_coding(accept_encoding: str) -> str | None:
+    """
+    The coding to compress with, or None for identity.
+
+    The highest q-value wins, brotli over gzip on a tie; `*` stands for any
+    coding not listed.
+    """
+    codings = parse_accept_encoding(accept_encoding)
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in available:
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Encoder:
+    """Incremental compressor for one response body"""
+
+    def __init__(self, coding: str):
+        settings = get_settings()
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(
+                mode=brotli.MODE_TEXT, quality=settings.compression_brotli_quality
+            )
+        else:
+            self._zlib = zlib.compressobj(
+                settings.compression_gzip_level, zlib.DEFLATED, 31
+            )
+
+    def compress(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least `min_bytes`.
+
+    A body is held back until either it reaches `min_bytes` or the response
+    ends, so small responses pass through unchanged and streamed ones are
+    compressed as they stream. Compressed responses get Vary:
+    Accept-Encoding, and an ETag naming the coding, since a strong ETag
+    belongs to one representation (see etag.py). The negotiated coding is
+    left in the request state, so validators are compared against the
+    representations this request can be sent.
+    """
+
+    def __init__(self, app: ASGIApp, min_bytes: int | None = None):
+        self.app = app
+        self.min_bytes = (
+            get_settings().compression_min_bytes if min_bytes is None else min_bytes
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = choose_coding(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        # Read by conditional_get, which only matches this request's codings
+        scope.setdefault("state", {})["coding"] = coding
+
+        start: Message | None = None
+        held: list[bytes] = []
+        held_bytes = 0
+        encoder: _Encoder | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, held_bytes, encoder
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(
+                    COMPRESSIBLE_TYPES
+                ):
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is not None:
+                data = encoder.compress(body)
+                if not more_body:
+                    data += encoder.finish()
+                await send(
+                    {"type": "http.response.body", "body": data, "more_body": more_body}
+                )
+                return
+
+            held.append(body)
+            held_bytes += len(body)
+            if held_bytes < self.min_bytes:
+                if more_body:
+                    return
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(held)})
+                return
+
+            encoder = _Encoder(coding)
+            data = encoder.compress(b"".join(held))
+            held.clear()
+            if not more_body:
+                data += encoder.finish()
+
+            headers = MutableHeaders(scope=start)
+            headers["content-encoding"] = coding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["etag"] = etag_for_coding(headers["etag"], coding)
+            if more_body:
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(data))
+            await send(start)
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+
+class _Base64EncodedBodies:
+    """Mangum handler mixin sending compressed bodies base64-encoded"""
+
+    def __call__(self, response: Any) -> dict[str, Any]:
+        out = super().__call__(response)
+        encoded = any(
+            name.lower() == b"content-encoding" for name, _ in response["headers"]
+        )
+        if encoded and response["body"] and not out.get("isBase64Encoded"):
+            out["body"] = base64.b64encode(response["body"]).decode()
+            out["isBase64Encoded"] = True
+        return out
+
+
+class CompressedHTTPGateway(_Base64EncodedBodies, HTTPGateway):
+    """API Gateway HTTP APIs (payload format 1.0 and 2.0)"""
+
+
+class CompressedAPIGateway(_Base64EncodedBodies, APIGateway):
+    """
+    API Gateway REST APIs; these decode base64 bodies only for the media
+    types listed in the API's binaryMediaTypes (e.g. */*)
+    """
+
+
+COMPRESSED_GATEWAY_HANDLERS = [CompressedHTTPGateway, CompressedAPIGateway]
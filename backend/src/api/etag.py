@@ -0,0 +1,130 @@
+import hashlib
+
+from fastapi import Depends, Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import get_settings
+from src.core.security import CurrentUser, get_current_user
+from src.repositories import (
+    AsyncActivityRepository,
+    get_async_dynamodb_client,
+    get_goal_cache,
+)
+
+# Browsers may keep responses but must revalidate them before every use;
+# shared caches must not keep them at all
+CACHE_CONTROL = "private, no-cache"
+
+
+class NotModifiedError(Exception):
+    """Raised by conditional_get when the client's copy is current"""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def make_etag(user_id: str, version: str, request: Request) -> str:
+    """Strong ETag of a GET response: its user, URL and the user's version stamp"""
+    key = f"{user_id}\n{version}\n{request.url.path}?{request.url.query}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_for_coding(etag: str, coding: str) -> str:
+    """ETag of the response compressed with `coding` (see compression.py)"""
+    return f'{etag[:-1]}-{coding}"'
+
+
+def matching_etag(
+    if_none_match: str,
+    etag: str,
+    coding: str | None = None,
+) -> str | None:
+    """
+    The entity tag of If-None-Match matching `etag`, or None.
+
+    If-None-Match uses the weak comparison: W/ prefixes are ignored. Only
+    the representations this request can be sent match: the uncompressed
+    one, and the one compressed with `coding`, the coding negotiated for it
+    (None for identity). The matched tag is what a 304 must repeat.
+    """
+    tags = [etag] if coding is None else [etag, etag_for_coding(etag, coding)]
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate.removeprefix("W/")
+        if tag in tags:
+            return tag
+    return None
+
+
+async def conditional_get(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+) -> None:
+    """
+    Dependency validating GET responses against the user's version stamp
+    (see ActivityRepository), which every write advances.
+
+    Costs one small read. When If-None-Match holds the current ETag it
+    raises NotModifiedError, answered with 304 before anything else is read
+    or serialized; otherwise the ETag is left for ETagMiddleware to send.
+    No ETag is given shortly after a write, while eventually consistent
+    reads may still return data older than the stamp. The stamp is passed
+    on to the goal cache, which then serves only goals read since it (see
+    GoalCache.observe), so cached goals cannot be older than the ETag.
+    """
+    repo = AsyncActivityRepository(get_async_dynamodb_client())
+    version, settled = await repo.stamp(
+        current_user.user_id, get_settings().etag_settle_seconds
+    )
+    get_goal_cache().observe(current_user.user_id, version, settled)
+    if not settled:
+        return
+    etag = make_etag(current_user.user_id, version, request)
+    matched = matching_etag(
+        request.headers.get("if-none-match", ""),
+        etag,
+        getattr(request.state, "coding", None),
+    )
+    if matched is not None:
+        raise NotModifiedError(matched)
+    request.state.etag = etag
+
+
+async def not_modified_handler(request: Request, exc: NotModifiedError) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": exc.etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+class ETagMiddleware:
+    """
+    Adds the ETag chosen by conditional_get to successful responses.
+
+    Routes return either models or ready-made JSONResponses, so the header
+    is set on the way out rather than by each route.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag is not None:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"etag", etag.encode()),
+                        (b"cache-control", CACHE_CONTROL.encode()),
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
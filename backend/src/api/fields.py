@@ -0,0 +1,38 @@
+from typing import Callable
+
+from fastapi import HTTPException, Query, status
+
+from src.models.projection import ProjectableResponse
+
+
+def selected_fields(
+    model: type[ProjectableResponse],
+) -> Callable[..., list[str] | None]:
+    """
+    Dependency parsing the optional `fields` query parameter.
+
+    `fields` is a comma-separated list of response field names. When it is
+    given, only those attributes are fetched from DynamoDB and returned.
+    """
+
+    def dependency(
+        fields: str | None = Query(
+            default=None,
+            description="Comma-separated response fields to return",
+        ),
+    ) -> list[str] | None:
+        if fields is None:
+            return None
+
+        selected = list(
+            dict.fromkeys(f.strip() for f in fields.split(",") if f.strip())
+        )
+        unknown = [f for f in selected if f not in model.ITEM_ATTRIBUTES]
+        if not selected or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown) or fields}",
+            )
+        return selected
+
+    return dependency
@@ -0,0 +1,34 @@
+from fastapi import HTTPException, Query, status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# The goal list is a bare JSON array, so its next-page cursor travels in a header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Optional `limit`/`cursor` query parameters shared by the list endpoints"""
+
+    def __init__(
+        self,
+        limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = Query(default=None),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+    @property
+    def page_size(self) -> int:
+        return self.limit or DEFAULT_PAGE_SIZE
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor",
+    )
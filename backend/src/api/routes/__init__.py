@@ -1,4 +1,6 @@
+from .activity import router as activity_router
 from .goals import router as goals_router
+from .imports import router as import_router
 from .milestones import router as milestones_router
 
-__all__ = ["goals_router", "milestones_router"]
+__all__ = ["activity_router", "goals_router", "import_router", "milestones_router"]
@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.etag import conditional_get
+from src.core.security import CurrentUser, get_current_user
+from src.models import ActivityDayResponse
+from src.repositories import AsyncActivityRepository, get_async_dynamodb_client
+
+router = APIRouter(prefix="/activity", tags=["activity"])
+
+# Longest span between `from` and `to`: a full year, leap day included
+MAX_ACTIVITY_SPAN = timedelta(days=366)
+
+
+def get_activity_repository() -> AsyncActivityRepository:
+    return AsyncActivityRepository(get_async_dynamodb_client())
+
+
+@router.get(
+    "",
+    response_model=list[ActivityDayResponse],
+    dependencies=[Depends(conditional_get)],
+)
+async def get_activity(
+    start: date | None = Query(default=None, alias="from"),
+    end: date | None = Query(default=None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user),
+    repo: AsyncActivityRepository = Depends(get_activity_repository),
+) -> list[ActivityDayResponse]:
+    """
+    Get the current user's number of goal and milestone writes for every
+    day from `from` through `to` (UTC dates, inclusive).
+
+    `to` defaults to today and `from` to 365 days before `to`.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=365)
+    if start > end or end - start > MAX_ACTIVITY_SPAN:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="`from` must be on or before `to`, at most a year earlier",
+        )
+
+    days = await repo.get_range(current_user.user_id, start, end)
+    return [
+        ActivityDayResponse(date=day.isoformat(), count=count) for day, count in days
+    ]
@@ -1,5 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from src.api.etag import conditional_get
+from src.api.fields import selected_fields
+from src.api.pagination import NEXT_CURSOR_HEADER, PageParams, invalid_cursor
+from src.api.responses import json_response
+from src.core.config import get_settings
 from src.core.security import CurrentUser, get_current_user
 from src.models import (
     CreateGoalRequest,
@@ -7,48 +12,109 @@ from src.models import (
     GoalResponse,
     GoalListResponse,
 )
-from src.repositories import GoalRepository, MilestoneRepository, get_dynamodb_client
+from src.repositories import (
+    AsyncGoalRepository,
+    AsyncMilestoneRepository,
+    InvalidCursorError,
+    TransactionConflictError,
+    get_async_dynamodb_client,
+)
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
 
-def get_goal_repository() -> GoalRepository:
-    return GoalRepository(get_dynamodb_client())
+def get_goal_repository() -> AsyncGoalRepository:
+    return AsyncGoalRepository(get_async_dynamodb_client())
+
 
+def get_milestone_repository() -> AsyncMilestoneRepository:
+    return AsyncMilestoneRepository(get_async_dynamodb_client())
 
-def get_milestone_repository() -> MilestoneRepository:
-    return MilestoneRepository(get_dynamodb_client())
 
+def goal_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Goal was changed by another request",
+    )
 
-@router.get("", response_model=list[GoalResponse])
+
+@router.get(
+    "",
+    response_model=list[GoalResponse],
+    dependencies=[Depends(conditional_get)],
+)
 async def list_goals(
+    page: PageParams = Depends(),
+    fields: list[str] | None = Depends(selected_fields(GoalResponse)),
     current_user: CurrentUser = Depends(get_current_user),
-    repo: GoalRepository = Depends(get_goal_repository),
+    repo: AsyncGoalRepository = Depends(get_goal_repository),
 ) -> list[GoalResponse]:
-    """Get all goals for the current user"""
-    goals = repo.get_all_by_user(current_user.user_id)
-    return [GoalResponse.from_goal(g) for g in goals]
+    """
+    Get goals for the current user.
+
+    Without `limit`/`cursor` every goal is returned. With them, one page is
+    returned and the cursor for the next page is sent in X-Next-Cursor.
+    With `fields`, each goal carries only the requested fields.
+
+    Goals are serialized straight from their items (see json_response).
+    """
+    try:
+        if fields:
+            goals, next_cursor = await repo.get_projected_by_user(
+                current_user.user_id,
+                fields,
+                page.page_size if page.paginated else None,
+                page.cursor,
+            )
+        elif page.paginated:
+            goals, next_cursor = await repo.get_page_by_user(
+                current_user.user_id, page.page_size, page.cursor, as_responses=True
+            )
+        else:
+            goals = await repo.get_all_by_user(current_user.user_id, as_responses=True)
+            next_cursor = None
+    except InvalidCursorError:
+        raise invalid_cursor()
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return json_response(goals, headers=headers)
 
 
 @router.post("", response_model=GoalResponse, status_code=status.HTTP_201_CREATED)
 async def create_goal(
     request: CreateGoalRequest,
     current_user: CurrentUser = Depends(get_current_user),
-    repo: GoalRepository = Depends(get_goal_repository),
+    repo: AsyncGoalRepository = Depends(get_goal_repository),
 ) -> GoalResponse:
     """Create a new goal"""
-    goal = repo.create(current_user.user_id, request)
+    goal = await repo.create(current_user.user_id, request)
     return GoalResponse.from_goal(goal)
 
 
-@router.get("/{goal_id}", response_model=GoalResponse)
+@router.get(
+    "/{goal_id}",
+    response_model=GoalResponse,
+    dependencies=[Depends(conditional_get)],
+)
 async def get_goal(
     goal_id: str,
+    fields: list[str] | None = Depends(selected_fields(GoalResponse)),
     current_user: CurrentUser = Depends(get_current_user),
-    repo: GoalRepository = Depends(get_goal_repository),
+    repo: AsyncGoalRepository = Depends(get_goal_repository),
 ) -> GoalResponse:
     """Get a specific goal by ID"""
-    goal = repo.get_by_id(current_user.user_id, goal_id)
+    if fields:
+        projected = await repo.get_projected_by_id(
+            current_user.user_id, goal_id, fields
+        )
+        if not projected:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Goal not found",
+            )
+        return json_response(projected)
+
+    goal = await repo.get_by_id(current_user.user_id, goal_id)
     if not goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -62,10 +128,13 @@ async def update_goal(
     goal_id: str,
     request: UpdateGoalRequest,
     current_user: CurrentUser = Depends(get_current_user),
-    repo: GoalRepository = Depends(get_goal_repository),
+    repo: AsyncGoalRepository = Depends(get_goal_repository),
 ) -> GoalResponse:
     """Update a goal"""
-    goal = repo.update(current_user.user_id, goal_id, request)
+    try:
+        goal = await repo.update(current_user.user_id, goal_id, request)
+    except TransactionConflictError:
+        raise goal_conflict()
     if not goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,19 +147,30 @@ async def update_goal(
 async def delete_goal(
     goal_id: str,
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> None:
-    """Delete a goal and all its milestones"""
-    goal = goal_repo.get_by_id(current_user.user_id, goal_id)
-    if not goal:
+    """
+    Delete a goal and all its milestones.
+
+    With GOAL_DELETE_MODE=soft the goal is only tombstoned, in one write;
+    its milestones are expired out of band (see repositories/tombstone.py).
+    """
+    soft = get_settings().goal_delete_mode == "soft"
+    # The conditional write doubles as the ownership check, so it must run
+    # before any milestone is touched
+    try:
+        if soft:
+            deleted = await goal_repo.tombstone(current_user.user_id, goal_id)
+        else:
+            deleted = await goal_repo.delete(current_user.user_id, goal_id)
+    except TransactionConflictError:
+        raise goal_conflict()
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found",
         )
 
-    # Delete all milestones first
-    milestone_repo.delete_all_by_goal(goal_id)
-
-    # Delete the goal
-    goal_repo.delete(current_user.user_id, goal_id)
+    if not soft:
+        await milestone_repo.delete_all_by_goal(current_user.user_id, goal_id)
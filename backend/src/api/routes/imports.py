@@ -0,0 +1,43 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Request
+
+from src.core.config import get_settings
+from src.core.security import CurrentUser, get_current_user
+from src.models import ImportResponse
+from src.repositories import (
+    AsyncDynamoDBClient,
+    AsyncMilestoneRepository,
+    get_async_dynamodb_client,
+)
+from src.services import BulkImporter, ndjson_lines
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+
+@router.post("", response_model=ImportResponse)
+async def import_records(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncDynamoDBClient = Depends(get_async_dynamodb_client),
+) -> ImportResponse:
+    """
+    Create goals and milestones from an NDJSON body (`Content-Encoding:
+    gzip` accepted); see src/services/bulk_import.py for the record format.
+
+    Records are read, validated and written as the body streams in, 25 at
+    a time. The response lists a result for every record, in line order:
+    invalid records fail on their own without stopping the import.
+    """
+    settings = get_settings()
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    importer = BulkImporter(db, current_user.user_id, settings.import_max_records)
+    response = await importer.run(
+        ndjson_lines(request.stream(), gzipped, settings.import_max_bytes)
+    )
+
+    milestone_repo = AsyncMilestoneRepository(db)
+    for goal_id in importer.rebalance_goal_ids:
+        background_tasks.add_task(
+            milestone_repo.rebalance, current_user.user_id, goal_id
+        )
+    return response
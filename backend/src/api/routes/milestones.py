@@ -1,55 +1,243 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any
 
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+
+from src.api.etag import conditional_get
+from src.api.fields import selected_fields
+from src.api.pagination import PageParams, invalid_cursor
+from src.api.responses import json_response
 from src.core.security import CurrentUser, get_current_user
 from src.models import (
+    Goal,
+    MilestoneStatus,
     CreateMilestoneRequest,
     UpdateMilestoneRequest,
     ReorderMilestonesRequest,
     MilestoneResponse,
     MilestoneListResponse,
 )
-from src.repositories import GoalRepository, MilestoneRepository, get_dynamodb_client
+from src.repositories import (
+    AsyncGoalRepository,
+    AsyncMilestoneRepository,
+    InvalidCursorError,
+    TransactionConflictError,
+    get_async_dynamodb_client,
+)
+from src.repositories.ranking import needs_rebalance
 
 router = APIRouter(tags=["milestones"])
 
 
-def get_goal_repository() -> GoalRepository:
-    return GoalRepository(get_dynamodb_client())
+def get_goal_repository() -> AsyncGoalRepository:
+    return AsyncGoalRepository(get_async_dynamodb_client())
 
 
-def get_milestone_repository() -> MilestoneRepository:
-    return MilestoneRepository(get_dynamodb_client())
+def get_milestone_repository() -> AsyncMilestoneRepository:
+    return AsyncMilestoneRepository(get_async_dynamodb_client())
 
 
 async def verify_goal_ownership(
     goal_id: str,
     current_user: CurrentUser,
-    goal_repo: GoalRepository,
-) -> None:
+    goal_repo: AsyncGoalRepository,
+) -> Goal:
     """Verify that the goal belongs to the current user"""
-    goal = goal_repo.get_by_id(current_user.user_id, goal_id)
+    goal = await goal_repo.get_by_id(current_user.user_id, goal_id)
     if not goal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found",
         )
+    return goal
+
+
+async def ensure_rollups(goal: Goal, milestone_repo: AsyncMilestoneRepository) -> None:
+    """
+    Give goals stored before rollups and the order counter existed both
+    before a milestone write
+    """
+    if goal.milestone_counts is None or goal.next_milestone_order is None:
+        try:
+            await milestone_repo.rebuild_rollups(goal.user_id, goal.id)
+        except TransactionConflictError:
+            raise milestones_conflict()
+
+
+def milestones_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Milestones were changed by another request",
+    )
+
+
+def milestone_page(
+    milestones: list[dict[str, Any]], next_cursor: str | None
+) -> Response:
+    """
+    A MilestoneListResponse of response dicts, serialized straight from
+    them (see json_response)
+    """
+    return json_response(
+        {"milestones": milestones, "count": len(milestones), "nextCursor": next_cursor}
+    )
+
+
+@router.get(
+    "/milestones/overdue",
+    response_model=MilestoneListResponse,
+    dependencies=[Depends(conditional_get)],
+)
+async def list_overdue_milestones(
+    page: PageParams = Depends(),
+    current_user: CurrentUser = Depends(get_current_user),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
+) -> MilestoneListResponse:
+    """
+    Get the current user's open milestones due before today, across all
+    goals, earliest first. Always paginated; pages may hold fewer than
+    `limit` items even when `nextCursor` is set.
+    """
+    try:
+        milestones, next_cursor = await milestone_repo.get_overdue_page(
+            current_user.user_id, page.page_size, page.cursor, as_responses=True
+        )
+    except InvalidCursorError:
+        raise invalid_cursor()
+    return milestone_page(milestones, next_cursor)
 
 
-@router.get("/goals/{goal_id}/milestones", response_model=MilestoneListResponse)
+@router.get(
+    "/milestones/upcoming",
+    response_model=MilestoneListResponse,
+    dependencies=[Depends(conditional_get)],
+)
+async def list_upcoming_milestones(
+    days: int = Query(default=7, ge=0, le=366),
+    page: PageParams = Depends(),
+    current_user: CurrentUser = Depends(get_current_user),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
+) -> MilestoneListResponse:
+    """
+    Get the current user's open milestones due from today through `days`
+    days from now, across all goals, earliest first. Always paginated;
+    pages may hold fewer than `limit` items even when `nextCursor` is set.
+    """
+    try:
+        milestones, next_cursor = await milestone_repo.get_upcoming_page(
+            current_user.user_id,
+            days,
+            page.page_size,
+            page.cursor,
+            as_responses=True,
+        )
+    except InvalidCursorError:
+        raise invalid_cursor()
+    return milestone_page(milestones, next_cursor)
+
+
+@router.get(
+    "/milestones",
+    response_model=MilestoneListResponse,
+    dependencies=[Depends(conditional_get)],
+)
+async def list_milestones_by_status(
+    milestone_status: MilestoneStatus = Query(alias="status"),
+    page: PageParams = Depends(),
+    current_user: CurrentUser = Depends(get_current_user),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
+) -> MilestoneListResponse:
+    """
+    Get the current user's milestones with the given status, across all
+    goals, by due date. Always paginated; pages may hold fewer than `limit`
+    items even when `nextCursor` is set.
+    """
+    try:
+        milestones, next_cursor = await milestone_repo.get_page_by_status(
+            current_user.user_id,
+            milestone_status,
+            page.page_size,
+            page.cursor,
+            as_responses=True,
+        )
+    except InvalidCursorError:
+        raise invalid_cursor()
+    return milestone_page(milestones, next_cursor)
+
+
+@router.get(
+    "/goals/{goal_id}/milestones",
+    response_model=MilestoneListResponse,
+    dependencies=[Depends(conditional_get)],
+)
 async def list_milestones(
     goal_id: str,
+    page: PageParams = Depends(),
+    fields: list[str] | None = Depends(selected_fields(MilestoneResponse)),
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> MilestoneListResponse:
-    """Get all milestones for a goal"""
+    """
+    Get milestones for a goal.
+
+    Without `limit`/`cursor` every milestone is returned. With them, one page
+    is returned together with `nextCursor`. With `fields`, each milestone
+    carries only the requested fields.
+    """
+    if milestone_repo.colocated and not fields and not page.paginated:
+        # The goal and its milestones are read on one worker hop, and the
+        # goal read also proves ownership
+        goal_item, milestones = await milestone_repo.get_goal_with_milestones(
+            current_user.user_id, goal_id, as_responses=True
+        )
+        if goal_item is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Goal not found",
+            )
+        return milestone_page(milestones, None)
+
     await verify_goal_ownership(goal_id, current_user, goal_repo)
 
-    milestones = milestone_repo.get_all_by_goal(goal_id)
-    return MilestoneListResponse(
-        milestones=[MilestoneResponse.from_milestone(m) for m in milestones],
-        count=len(milestones),
-    )
+    if fields:
+        try:
+            projected, next_cursor = await milestone_repo.get_projected_by_goal(
+                current_user.user_id,
+                goal_id,
+                fields,
+                page.page_size if page.paginated else None,
+                page.cursor,
+            )
+        except InvalidCursorError:
+            raise invalid_cursor()
+        return milestone_page(projected, next_cursor)
+
+    next_cursor = None
+    if page.paginated:
+        try:
+            milestones, next_cursor = await milestone_repo.get_page_by_goal(
+                current_user.user_id,
+                goal_id,
+                page.page_size,
+                page.cursor,
+                as_responses=True,
+            )
+        except InvalidCursorError:
+            raise invalid_cursor()
+    else:
+        milestones = await milestone_repo.get_all_by_goal(
+            current_user.user_id, goal_id, as_responses=True
+        )
+
+    return milestone_page(milestones, next_cursor)
 
 
 @router.post(
@@ -60,32 +248,63 @@ async def list_milestones(
 async def create_milestone(
     goal_id: str,
     request: CreateMilestoneRequest,
+    background_tasks: BackgroundTasks,
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> MilestoneResponse:
     """Create a new milestone for a goal"""
-    await verify_goal_ownership(goal_id, current_user, goal_repo)
+    goal = await verify_goal_ownership(goal_id, current_user, goal_repo)
+    await ensure_rollups(goal, milestone_repo)
 
-    milestone = milestone_repo.create(goal_id, request)
+    try:
+        milestone = await milestone_repo.create(current_user.user_id, goal_id, request)
+    except TransactionConflictError:
+        raise milestones_conflict()
+    if not milestone:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Goal not found",
+        )
+    if needs_rebalance([milestone.rank]):
+        background_tasks.add_task(
+            milestone_repo.rebalance, current_user.user_id, goal_id
+        )
     return MilestoneResponse.from_milestone(milestone)
 
 
 @router.get(
     "/goals/{goal_id}/milestones/{milestone_id}",
     response_model=MilestoneResponse,
+    dependencies=[Depends(conditional_get)],
 )
 async def get_milestone(
     goal_id: str,
     milestone_id: str,
+    fields: list[str] | None = Depends(selected_fields(MilestoneResponse)),
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> MilestoneResponse:
     """Get a specific milestone"""
+    # A soft-deleted goal's milestones outlive its tombstone until they are
+    # expired, so the goal is checked even where the key proves ownership
     await verify_goal_ownership(goal_id, current_user, goal_repo)
 
-    milestone = milestone_repo.get_by_id(goal_id, milestone_id)
+    if fields:
+        projected = await milestone_repo.get_projected_by_id(
+            current_user.user_id, goal_id, milestone_id, fields
+        )
+        if not projected:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Milestone not found",
+            )
+        return json_response(projected)
+
+    milestone = await milestone_repo.get_by_id(
+        current_user.user_id, goal_id, milestone_id
+    )
     if not milestone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -102,19 +321,30 @@ async def update_milestone(
     goal_id: str,
     milestone_id: str,
     request: UpdateMilestoneRequest,
+    background_tasks: BackgroundTasks,
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> MilestoneResponse:
     """Update a milestone"""
-    await verify_goal_ownership(goal_id, current_user, goal_repo)
+    goal = await verify_goal_ownership(goal_id, current_user, goal_repo)
+    await ensure_rollups(goal, milestone_repo)
 
-    milestone = milestone_repo.update(goal_id, milestone_id, request)
+    try:
+        milestone = await milestone_repo.update(
+            current_user.user_id, goal_id, milestone_id, request
+        )
+    except TransactionConflictError:
+        raise milestones_conflict()
     if not milestone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Milestone not found",
         )
+    if needs_rebalance([milestone.rank]):
+        background_tasks.add_task(
+            milestone_repo.rebalance, current_user.user_id, goal_id
+        )
     return MilestoneResponse.from_milestone(milestone)
 
 
@@ -126,13 +356,19 @@ async def delete_milestone(
     goal_id: str,
     milestone_id: str,
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> None:
     """Delete a milestone"""
-    await verify_goal_ownership(goal_id, current_user, goal_repo)
+    goal = await verify_goal_ownership(goal_id, current_user, goal_repo)
+    await ensure_rollups(goal, milestone_repo)
 
-    deleted = milestone_repo.delete(goal_id, milestone_id)
+    try:
+        deleted = await milestone_repo.delete(
+            current_user.user_id, goal_id, milestone_id
+        )
+    except TransactionConflictError:
+        raise milestones_conflict()
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -147,14 +383,24 @@ async def delete_milestone(
 async def reorder_milestones(
     goal_id: str,
     request: ReorderMilestonesRequest,
+    background_tasks: BackgroundTasks,
     current_user: CurrentUser = Depends(get_current_user),
-    goal_repo: GoalRepository = Depends(get_goal_repository),
-    milestone_repo: MilestoneRepository = Depends(get_milestone_repository),
+    goal_repo: AsyncGoalRepository = Depends(get_goal_repository),
+    milestone_repo: AsyncMilestoneRepository = Depends(get_milestone_repository),
 ) -> MilestoneListResponse:
     """Reorder milestones for a goal"""
     await verify_goal_ownership(goal_id, current_user, goal_repo)
 
-    milestones = milestone_repo.reorder(goal_id, request.ordered_ids)
+    try:
+        milestones = await milestone_repo.reorder(
+            current_user.user_id, goal_id, request.ordered_ids
+        )
+    except TransactionConflictError:
+        raise milestones_conflict()
+    if needs_rebalance([m.rank for m in milestones]):
+        background_tasks.add_task(
+            milestone_repo.rebalance, current_user.user_id, goal_id
+        )
     return MilestoneListResponse(
         milestones=[MilestoneResponse.from_milestone(m) for m in milestones],
         count=len(milestones),
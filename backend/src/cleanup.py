@@ -0,0 +1,50 @@
+"""
+Out-of-band cleanup of soft-deleted goals (GOAL_DELETE_MODE=soft).
+
+`handler` is the entry point of the cleanup Lambda function, fed by the
+table's DynamoDB stream (see terraform/modules/api): for each goal that was
+just tombstoned it expires the goal's milestones
+(MilestoneRepository.expire_all_by_goal), so that the delete request itself
+makes only the tombstone write. The event source mapping passes on only
+the records of such goals; failed records are reported back and retried.
+"""
+
+import logging
+from typing import Any
+
+from src.repositories import MilestoneRepository, codec, get_dynamodb_client, tombstone
+
+logger = logging.getLogger(__name__)
+# INFO is below the Lambda runtime's default level
+logger.setLevel(logging.INFO)
+
+
+def tombstoned_goal(record: dict[str, Any]) -> tuple[str, str] | None:
+    """(user_id, goal_id) of a stream record that tombstones a goal, or None"""
+    if record.get("eventName") != "MODIFY":
+        return None
+    images = record["dynamodb"]
+    new = codec.decode_item(images.get("NewImage", {}))
+    old = codec.decode_item(images.get("OldImage", {}))
+    if new.get("type") != "goal" or not tombstone.is_tombstoned(new):
+        return None
+    if tombstone.is_tombstoned(old):
+        return None
+    return new["user_id"], new["id"]
+
+
+def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    repo = MilestoneRepository(get_dynamodb_client())
+    failures = []
+    for record in event.get("Records", []):
+        goal = tombstoned_goal(record)
+        if goal is None:
+            continue
+        try:
+            expired = repo.expire_all_by_goal(*goal)
+        except Exception:
+            logger.exception("expiring the milestones of goal %s failed", goal[1])
+            failures.append({"itemIdentifier": record["dynamodb"]["SequenceNumber"]})
+            continue
+        logger.info("goal %s: %d milestones expired", goal[1], expired)
+    return {"batchItemFailures": failures}
@@ -1,22 +1,123 @@
 import os
 from functools import lru_cache
+from typing import Any, Literal
+
 from pydantic_settings import BaseSettings
 
+# botocore client presets. "lambda" serves one request per container, so it
+# keeps a small pool and fails fast enough to retry within the API Gateway
+# timeout; "container" serves many concurrent requests per uvicorn worker
+# and lets adaptive retries back off under throttling.
+DYNAMODB_CLIENT_PRESETS: dict[str, dict[str, Any]] = {
+    "default": {},
+    "lambda": {
+        "max_pool_connections": 10,
+        "tcp_keepalive": True,
+        "connect_timeout": 1.0,
+        "read_timeout": 3.0,
+        "retry_mode": "standard",
+        "max_attempts": 3,
+    },
+    "container": {
+        "max_pool_connections": 50,
+        "tcp_keepalive": True,
+        "connect_timeout": 2.0,
+        "read_timeout": 5.0,
+        "retry_mode": "adaptive",
+        "max_attempts": 5,
+    },
+}
+
 
 class Settings(BaseSettings):
+    # Storage engine: DynamoDB, or a SQLite file for self-hosted deployments
+    storage_engine: Literal["dynamodb", "sqlite"] = "dynamodb"
+    sqlite_path: str = "milestone-manager.db"
+    sqlite_busy_timeout_ms: int = 5000
+
     # AWS
     aws_region: str = "ap-northeast-1"
     dynamodb_table_name: str = "milestone-manager"
     dynamodb_endpoint_url: str | None = None  # For local development
+    dynamodb_max_workers: int = 10  # Threads serving async DynamoDB calls
+    dynamodb_fast_path: bool = False  # Low-level client + hand-written item codec
+    # Milestone key layout, or a phase of the online migration between the
+    # two (see repositories/key_layout.py): the first layout is read, writes
+    # go to both
+    dynamodb_key_layout: Literal["goal", "goal+user", "user+goal", "user"] = "goal"
+
+    # botocore client tuning; unset values come from the preset, and the
+    # "default" preset leaves botocore's own defaults in place
+    dynamodb_client_preset: Literal["default", "lambda", "container"] = "default"
+    dynamodb_max_pool_connections: int | None = None
+    dynamodb_tcp_keepalive: bool | None = None
+    dynamodb_connect_timeout: float | None = None
+    dynamodb_read_timeout: float | None = None
+    dynamodb_retry_mode: Literal["legacy", "standard", "adaptive"] | None = None
+    dynamodb_max_attempts: int | None = None
 
     # Cognito
     cognito_user_pool_id: str = ""
     cognito_client_id: str = ""
 
+    # Milestone ordering: dense integers, or lexicographic ranks where a
+    # move writes only the moved milestone
+    milestone_ordering: Literal["integer", "rank"] = "integer"
+
+    # In-process goal cache used for lookups and ownership checks; 0 disables
+    goal_cache_max_entries: int = 1024
+    goal_cache_ttl_seconds: float = 30.0
+
+    # GET responses get no ETag until the user's last write is this old, so
+    # that eventually consistent reads have caught up with it
+    etag_settle_seconds: float = 1.0
+
+    # Goal deletion: "hard" deletes a goal and its milestones within the
+    # request; "soft" only tombstones the goal, and its milestones are
+    # expired out of band and removed by the table's TTL (see
+    # repositories/tombstone.py)
+    goal_delete_mode: Literal["hard", "soft"] = "hard"
+    # How long a soft-deleted goal's tombstone is kept before TTL removes it
+    goal_tombstone_ttl_seconds: int = 7 * 24 * 60 * 60
+
+    # Bulk NDJSON import: records per request, and decompressed body size
+    import_max_records: int = 5000
+    import_max_bytes: int = 8 * 1024 * 1024
+
+    # Response compression (see api/compression.py): bodies smaller than
+    # compression_min_bytes are sent uncompressed; 0 compresses every body
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Prewarm (see core/prewarm.py): connect to storage and load the Cognito
+    # keys before the first request, either when src.main is imported (the
+    # Lambda init phase) or at ASGI lifespan startup (uvicorn and the like)
+    prewarm: Literal["off", "init", "lifespan"] = "off"
+    # Storage clients to connect, at most dynamodb_max_workers
+    prewarm_storage_clients: int = 1
+
     # App
     environment: str = "development"
     debug: bool = True
 
+    def dynamodb_client_options(self) -> dict[str, Any]:
+        """Effective client options: the preset, overridden by explicit settings"""
+        options = dict(DYNAMODB_CLIENT_PRESETS[self.dynamodb_client_preset])
+        for name in (
+            "max_pool_connections",
+            "tcp_keepalive",
+            "connect_timeout",
+            "read_timeout",
+            "retry_mode",
+            "max_attempts",
+        ):
+            value = getattr(self, f"dynamodb_{name}")
+            if value is not None:
+                options[name] = value
+        return options
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
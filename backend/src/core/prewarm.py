@@ -0,0 +1,111 @@
+"""
+Prewarm: what a container's first request would otherwise pay for.
+
+Clients are built lazily, so without it the first request of every
+container waits for boto3 to load the DynamoDB model, resolve credentials
+and the endpoint and open a TLS connection, and, with Cognito, for the
+JWKS to be fetched over HTTPS and its RSA keys parsed. PREWARM moves that
+work ahead of the first request:
+
+- "init": when src.main is imported. On Lambda that is the init phase,
+  which runs before the first invocation, at full CPU, and with provisioned
+  concurrency before any request arrives;
+- "lifespan": at ASGI lifespan startup, for uvicorn and other servers.
+  Mangum runs lifespans around every invocation, so Lambda uses "init".
+
+The steps run concurrently: "storage" connects PREWARM_STORAGE_CLIENTS
+worker clients; "jwks" fetches the JWKS and "validators" builds its keys.
+A failed step is logged and left to the first request to retry. Timings
+are logged.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from src.core.config import Settings
+
+logger = logging.getLogger(__name__)
+# INFO is below the Lambda runtime's default level
+logger.setLevel(logging.INFO)
+
+_report: dict[str, Any] | None = None
+
+
+async def _step(
+    report: dict[str, Any], name: str, fn: Callable[[], Awaitable[Any]]
+) -> bool:
+    started = time.perf_counter()
+    try:
+        await fn()
+        return True
+    except Exception:
+        logger.warning("prewarm: %s failed", name, exc_info=True)
+        report["failed"].append(name)
+        return False
+    finally:
+        report[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _prewarm_storage(settings: Settings, report: dict[str, Any]) -> None:
+    from src.repositories import get_async_dynamodb_client
+
+    db = get_async_dynamodb_client()
+    await _step(report, "storage", lambda: db.prewarm(settings.prewarm_storage_clients))
+
+
+async def _prewarm_auth(settings: Settings, report: dict[str, Any]) -> None:
+    from src.core.security import build_validation_keys, get_cognito_public_keys
+
+    public_keys: dict = {}
+
+    async def fetch() -> None:
+        public_keys.update(await get_cognito_public_keys(settings))
+
+    async def build() -> None:
+        build_validation_keys(public_keys)
+
+    if await _step(report, "jwks", fetch):
+        await _step(report, "validators", build)
+
+
+async def prewarm(settings: Settings) -> dict[str, Any]:
+    """Run every step, once per process; returns the timings"""
+    global _report
+    if _report is not None:
+        return _report
+
+    report: dict[str, Any] = {"mode": settings.prewarm, "failed": []}
+    started = time.perf_counter()
+    steps = [_prewarm_storage(settings, report)]
+    # Development tokens are not verified without a user pool
+    if settings.cognito_user_pool_id:
+        steps.append(_prewarm_auth(settings, report))
+    await asyncio.gather(*steps)
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    logger.info(
+        "prewarm (%s): %s",
+        settings.prewarm,
+        ", ".join(
+            f"{name[:-3]} {ms} ms"
+            for name, ms in report.items()
+            if name.endswith("_ms")
+        )
+        + (f"; failed: {', '.join(report['failed'])}" if report["failed"] else ""),
+    )
+    _report = report
+    return report
+
+
+def prewarm_init(settings: Settings) -> None:
+    """
+    Prewarm outside of any event loop, as "init" does.
+
+    The loop is left as the current one: Mangum runs each invocation on the
+    current loop, and asyncio.run would leave none.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(prewarm(settings))
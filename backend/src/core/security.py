@@ -1,14 +1,19 @@
-import httpx
+from typing import Any
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from jose.exceptions import ExpiredSignatureError
 
 from .config import Settings, get_settings
 
+# httpx and python-jose (with cryptography) are imported on first use, so
+# that cold starts serving /health, preflights or development tokens do not
+# pay for them
+
 security = HTTPBearer()
 
 _jwks_cache: dict | None = None
+# jose keys built from the JWKS, by key ID
+_validation_keys: dict[str, Any] = {}
 
 
 async def get_cognito_public_keys(settings: Settings) -> dict:
@@ -16,6 +21,8 @@ async def get_cognito_public_keys(settings: Settings) -> dict:
     if _jwks_cache is not None:
         return _jwks_cache
 
+    import httpx
+
     jwks_url = (
         f"https://cognito-idp.{settings.aws_region}.amazonaws.com/"
         f"{settings.cognito_user_pool_id}/.well-known/jwks.json"
@@ -28,7 +35,38 @@ async def get_cognito_public_keys(settings: Settings) -> dict:
         return _jwks_cache
 
 
+def get_validation_key(kid: str, public_keys: dict) -> Any | None:
+    """
+    The jose key verifying tokens signed with `kid`, or None.
+
+    Keys are built once: building one parses the RSA key (and, the first
+    time, loads the cryptography backend), which jwt.decode would otherwise
+    do for every token.
+    """
+    key = _validation_keys.get(kid)
+    if key is not None:
+        return key
+
+    from jose import jwk
+
+    for k in public_keys.get("keys", []):
+        if k.get("kid") == kid:
+            key = _validation_keys[kid] = jwk.construct(k, "RS256")
+            return key
+    return None
+
+
+def build_validation_keys(public_keys: dict) -> int:
+    """Build the keys of the whole JWKS ahead of time; returns how many"""
+    for k in public_keys.get("keys", []):
+        get_validation_key(k["kid"], public_keys)
+    return len(_validation_keys)
+
+
 def decode_token(token: str, public_keys: dict, settings: Settings) -> dict:
+    from jose import JWTError, jwt
+    from jose.exceptions import ExpiredSignatureError
+
     try:
         unverified_header = jwt.get_unverified_header(token)
     except JWTError as e:
@@ -44,12 +82,7 @@ def decode_token(token: str, public_keys: dict, settings: Settings) -> dict:
             detail="Token header missing key ID",
         )
 
-    key = None
-    for k in public_keys.get("keys", []):
-        if k.get("kid") == kid:
-            key = k
-            break
-
+    key = get_validation_key(kid, public_keys)
     if key is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -62,7 +95,10 @@ def decode_token(token: str, public_keys: dict, settings: Settings) -> dict:
             key,
             algorithms=["RS256"],
             audience=settings.cognito_client_id,
-            issuer=f"https://cognito-idp.{settings.aws_region}.amazonaws.com/{settings.cognito_user_pool_id}",
+            issuer=(
+                f"https://cognito-idp.{settings.aws_region}.amazonaws.com/"
+                f"{settings.cognito_user_pool_id}"
+            ),
         )
         return payload
     except ExpiredSignatureError:
@@ -1,18 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 
-from src.api.routes import goals_router, milestones_router
+from src.api.compression import COMPRESSED_GATEWAY_HANDLERS, CompressionMiddleware
+from src.api.etag import ETagMiddleware, NotModifiedError, not_modified_handler
+from src.api.pagination import NEXT_CURSOR_HEADER
+from src.api.routes import (
+    activity_router,
+    goals_router,
+    import_router,
+    milestones_router,
+)
 from src.core.config import get_settings
+from src.core.prewarm import prewarm, prewarm_init
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.prewarm == "lifespan":
+        await prewarm(settings)
+    yield
+
+
 app = FastAPI(
     title="Milestone Manager API",
     description="Goal and milestone management API",
     version="1.0.0",
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
+    lifespan=lifespan,
 )
 
 # CORS settings
@@ -26,11 +46,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Conditional GETs: ETags on responses, 304 for current copies
+app.add_middleware(ETagMiddleware)
+app.add_exception_handler(NotModifiedError, not_modified_handler)
+
+# gzip/brotli for bodies of at least COMPRESSION_MIN_BYTES; outermost, so
+# that it sees the ETag it has to qualify
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(goals_router, prefix="/api")
 app.include_router(milestones_router, prefix="/api")
+app.include_router(activity_router, prefix="/api")
+app.include_router(import_router, prefix="/api")
 
 
 @app.get("/health")
@@ -39,4 +71,8 @@ async def health_check():
 
 
 # Lambda handler
-handler = Mangum(app, lifespan="off")
+handler = Mangum(app, lifespan="off", custom_handlers=COMPRESSED_GATEWAY_HANDLERS)
+
+# In the Lambda init phase, which imports this module
+if settings.prewarm == "init":
+    prewarm_init(settings)
@@ -1,3 +1,5 @@
+from .activity import ActivityDayResponse
+from .bulk_import import ImportRecordResult, ImportResponse
 from .goal import (
     Goal,
     GoalStatus,
@@ -17,6 +19,9 @@ from .milestone import (
 )
 
 __all__ = [
+    "ActivityDayResponse",
+    "ImportRecordResult",
+    "ImportResponse",
     "Goal",
     "GoalStatus",
     "CreateGoalRequest",
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class ActivityDayResponse(BaseModel):
+    date: str
+    count: int
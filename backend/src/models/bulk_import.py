@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ImportRecordResult(BaseModel):
+    line: int
+    type: str | None = None
+    status: Literal["created", "failed"]
+    id: str | None = None
+    ref: str | None = None
+    error: str | None = None
+
+
+class ImportResponse(BaseModel):
+    results: list[ImportRecordResult]
+    created: int
+    failed: int
@@ -1,7 +1,12 @@
 from datetime import date, datetime
 from enum import Enum
+from typing import Any, ClassVar
+
 from pydantic import BaseModel, Field
 
+from .milestone import MilestoneStatus
+from .projection import ProjectableResponse
+
 
 class GoalStatus(str, Enum):
     NOT_STARTED = "not_started"
@@ -20,6 +25,53 @@ class Goal(BaseModel):
     status: GoalStatus
     created_at: datetime
     updated_at: datetime
+    # Rollups maintained by milestone writes, and the last order handed to
+    # a new milestone; None on goals stored before they existed, until the
+    # goal's next milestone write rebuilds them
+    milestone_counts: dict[str, int] | None = None
+    open_milestone_due_dates: dict[str, date] | None = None
+    next_milestone_order: int | None = None
+
+
+# Status values in declaration order; Enum iteration is slow for every goal
+_STATUSES = tuple(status.value for status in MilestoneStatus)
+
+
+def milestone_rollups(
+    counts: dict[str, Any] | None,
+    open_due_dates: dict[str, Any] | None,
+    today: date | None = None,
+) -> dict[str, Any]:
+    """
+    GoalResponse progress fields from a goal's rollup attributes.
+
+    Counts are stored per status; next due date and overdue count depend on
+    the current date, so they are derived from the due dates of milestones
+    that are not completed.
+    """
+    rollups: dict[str, Any] = {
+        "milestoneCounts": None,
+        "totalMilestones": None,
+        "completedMilestones": None,
+        "nextDueDate": None,
+        "overdueMilestones": None,
+    }
+    if counts is not None:
+        by_status = {status: int(counts.get(status, 0)) for status in _STATUSES}
+        rollups["milestoneCounts"] = by_status
+        rollups["totalMilestones"] = sum(by_status.values())
+        rollups["completedMilestones"] = by_status[MilestoneStatus.COMPLETED.value]
+    if open_due_dates is not None:
+        # ISO dates order as strings do, so stored values need no parsing
+        today_iso = (today or date.today()).isoformat()
+        due_dates = [
+            d.isoformat() if isinstance(d, date) else d
+            for d in open_due_dates.values()
+        ]
+        upcoming = [d for d in due_dates if d >= today_iso]
+        rollups["nextDueDate"] = min(upcoming) if upcoming else None
+        rollups["overdueMilestones"] = len(due_dates) - len(upcoming)
+    return rollups
 
 
 class CreateGoalRequest(BaseModel):
@@ -41,7 +93,7 @@ class UpdateGoalRequest(BaseModel):
     status: GoalStatus | None = None
 
 
-class GoalResponse(BaseModel):
+class GoalResponse(ProjectableResponse):
     id: str
     userId: str
     title: str
@@ -51,6 +103,51 @@ class GoalResponse(BaseModel):
     status: str
     createdAt: str
     updatedAt: str
+    milestoneCounts: dict[str, int] | None = None
+    totalMilestones: int | None = None
+    completedMilestones: int | None = None
+    nextDueDate: str | None = None
+    overdueMilestones: int | None = None
+
+    ITEM_ATTRIBUTES: ClassVar[dict[str, str]] = {
+        "id": "id",
+        "userId": "user_id",
+        "title": "title",
+        "description": "description",
+        "startDate": "start_date",
+        "endDate": "end_date",
+        "status": "status",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+        "milestoneCounts": "milestone_counts",
+        "totalMilestones": "milestone_counts",
+        "completedMilestones": "milestone_counts",
+        "nextDueDate": "open_milestone_due_dates",
+        "overdueMilestones": "open_milestone_due_dates",
+    }
+
+    @classmethod
+    def derived_values(cls, item: dict[str, Any]) -> dict[str, Any]:
+        return milestone_rollups(
+            item.get("milestone_counts"), item.get("open_milestone_due_dates")
+        )
+
+    @classmethod
+    def dump_item(cls, item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": item["id"],
+            "userId": item["user_id"],
+            "title": item["title"],
+            "description": item.get("description", ""),
+            "startDate": item["start_date"],
+            "endDate": item["end_date"],
+            "status": item["status"],
+            "createdAt": item["created_at"],
+            "updatedAt": item["updated_at"],
+            **milestone_rollups(
+                item.get("milestone_counts"), item.get("open_milestone_due_dates")
+            ),
+        }
 
     @classmethod
     def from_goal(cls, goal: Goal) -> "GoalResponse":
@@ -64,6 +161,7 @@ class GoalResponse(BaseModel):
             status=goal.status.value,
             createdAt=goal.created_at.isoformat(),
             updatedAt=goal.updated_at.isoformat(),
+            **milestone_rollups(goal.milestone_counts, goal.open_milestone_due_dates),
         )
 
 
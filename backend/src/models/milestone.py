@@ -1,7 +1,11 @@
 from datetime import date, datetime
 from enum import Enum
+from typing import Any, ClassVar
+
 from pydantic import BaseModel, Field
 
+from .projection import ProjectableResponse
+
 
 class MilestoneStatus(str, Enum):
     PENDING = "pending"
@@ -17,6 +21,7 @@ class Milestone(BaseModel):
     due_date: date
     status: MilestoneStatus
     order: int
+    rank: str | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -39,7 +44,7 @@ class ReorderMilestonesRequest(BaseModel):
     ordered_ids: list[str] = Field(..., min_length=1)
 
 
-class MilestoneResponse(BaseModel):
+class MilestoneResponse(ProjectableResponse):
     id: str
     goalId: str
     title: str
@@ -47,9 +52,38 @@ class MilestoneResponse(BaseModel):
     dueDate: str
     status: str
     order: int
+    rank: str | None = None
     createdAt: str
     updatedAt: str
 
+    ITEM_ATTRIBUTES: ClassVar[dict[str, str]] = {
+        "id": "id",
+        "goalId": "goal_id",
+        "title": "title",
+        "description": "description",
+        "dueDate": "due_date",
+        "status": "status",
+        "order": "order",
+        "rank": "rank",
+        "createdAt": "created_at",
+        "updatedAt": "updated_at",
+    }
+
+    @classmethod
+    def dump_item(cls, item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": item["id"],
+            "goalId": item["goal_id"],
+            "title": item["title"],
+            "description": item.get("description", ""),
+            "dueDate": item["due_date"],
+            "status": item["status"],
+            "order": int(item.get("order", 0)),
+            "rank": item.get("rank"),
+            "createdAt": item["created_at"],
+            "updatedAt": item["updated_at"],
+        }
+
     @classmethod
     def from_milestone(cls, milestone: Milestone) -> "MilestoneResponse":
         return cls(
@@ -60,6 +94,7 @@ class MilestoneResponse(BaseModel):
             dueDate=milestone.due_date.isoformat(),
             status=milestone.status.value,
             order=milestone.order,
+            rank=milestone.rank,
             createdAt=milestone.created_at.isoformat(),
             updatedAt=milestone.updated_at.isoformat(),
         )
@@ -68,3 +103,4 @@ class MilestoneResponse(BaseModel):
 class MilestoneListResponse(BaseModel):
     milestones: list[MilestoneResponse]
     count: int
+    nextCursor: str | None = None
@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any, ClassVar
+
+from pydantic import BaseModel, create_model
+
+
+@lru_cache(maxsize=256)
+def _partial_model(model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """A model holding only `fields` of `model`, with the same types and defaults"""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{
+            field: (model.model_fields[field].annotation, model.model_fields[field])
+            for field in fields
+        },
+    )
+
+
+class ProjectableResponse(BaseModel):
+    """
+    Response model that can be built from a subset of its fields.
+
+    Subclasses map each response field to the stored item attribute it
+    comes from, so a projected read fetches and validates only what was
+    asked for.
+    """
+
+    ITEM_ATTRIBUTES: ClassVar[dict[str, str]] = {}
+
+    @classmethod
+    def item_attributes(cls, fields: list[str]) -> list[str]:
+        """Item attributes to fetch for the given response fields"""
+        # The id is always fetched so that a missing item can be told apart
+        # from an item without the requested attributes
+        attributes = {"id"} | {cls.ITEM_ATTRIBUTES[field] for field in fields}
+        return sorted(attributes)
+
+    @classmethod
+    def derived_values(cls, item: dict[str, Any]) -> dict[str, Any]:
+        """
+        Response fields computed from item attributes rather than copied.
+
+        ITEM_ATTRIBUTES maps such a field to the attribute it is computed
+        from, so projections still fetch what it needs.
+        """
+        return {}
+
+    @classmethod
+    def dump_item(cls, item: dict[str, Any]) -> dict[str, Any]:
+        """
+        The model_dump() of the response for a complete stored item.
+
+        This default validates every field, like project(); subclasses build
+        the dict straight from the item instead, without constructing or
+        validating models, which is only right for items the repositories
+        wrote themselves, whose attributes already hold the response's types
+        and formats.
+        """
+        data = cls._values(item, list(cls.model_fields))
+        return cls.model_validate(data).model_dump()
+
+    @classmethod
+    def project(cls, item: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+        """Validate the requested fields of a stored item into a response dict"""
+        model = _partial_model(cls, tuple(fields))
+        return model.model_validate(cls._values(item, fields)).model_dump()
+
+    @classmethod
+    def _values(cls, item: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+        """The given response fields' values in a stored item, where present"""
+        derived = cls.derived_values(item)
+        data = {}
+        for field in fields:
+            if field in derived:
+                data[field] = derived[field]
+            elif cls.ITEM_ATTRIBUTES[field] in item:
+                data[field] = item[cls.ITEM_ATTRIBUTES[field]]
+        return data
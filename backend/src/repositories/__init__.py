@@ -1,10 +1,35 @@
-from .dynamodb import DynamoDBClient, get_dynamodb_client
-from .goal_repository import GoalRepository
-from .milestone_repository import MilestoneRepository
+from .activity_repository import ActivityRepository, AsyncActivityRepository
+from .async_dynamodb import AsyncDynamoDBClient, get_async_dynamodb_client
+from .dynamodb import (
+    DynamoDBClient,
+    InvalidCursorError,
+    ItemNotFoundError,
+    TransactionConflictError,
+    get_dynamodb_client,
+)
+from .goal_cache import GoalCache, get_goal_cache
+from .goal_repository import AsyncGoalRepository, GoalRepository
+from .milestone_repository import AsyncMilestoneRepository, MilestoneRepository
+from .sqlite import SQLiteClient
+from .storage import StorageEngine, create_storage_engine
 
 __all__ = [
+    "ActivityRepository",
+    "AsyncActivityRepository",
+    "AsyncDynamoDBClient",
+    "get_async_dynamodb_client",
     "DynamoDBClient",
+    "InvalidCursorError",
+    "ItemNotFoundError",
+    "TransactionConflictError",
     "get_dynamodb_client",
+    "GoalCache",
+    "get_goal_cache",
+    "AsyncGoalRepository",
     "GoalRepository",
+    "AsyncMilestoneRepository",
     "MilestoneRepository",
+    "SQLiteClient",
+    "StorageEngine",
+    "create_storage_engine",
 ]
@@ -0,0 +1,117 @@
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from .async_dynamodb import AsyncDynamoDBClient
+from .storage import StorageEngine
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityRepository:
+    """
+    Per-user daily activity counters for the dashboard heatmap.
+
+    Each user has one small item per UTC day with activity (PK = USER#{userId},
+    SK = ACTIVITY#{date}) whose `count` is the number of goal and milestone
+    writes made that day. Any date range is one Query over those items, so
+    its cost depends on the number of days, not on how many goals and
+    milestones the user has.
+
+    The same item carries the user's version stamp: `version` is advanced
+    by every write, including the ones that are not counted as activity
+    (touch), and `written_at` is the time of the last one. Today's date and
+    version thus change whenever any of the user's data does, which lets
+    GET responses be validated with one small read (see api/etag.py).
+
+    Goal and milestone writes bump the item with a separate UpdateItem once
+    they have committed (record, touch) rather than inside their own
+    transaction: every write of the user would otherwise include this one
+    item, and two concurrent writes would cancel each other. The bump is
+    best-effort. When it fails the write still stands, uncounted, and the
+    stamp stays behind until the user's next write, so an ETag can be
+    stale until then.
+    """
+
+    def __init__(self, db: StorageEngine):
+        self.db = db
+
+    def record(self, user_id: str, amount: int = 1) -> None:
+        """
+        Add `amount` writes to today's counter, creating it if needed, and
+        advance the version stamp
+        """
+        self._bump(user_id, {"count": amount, "version": 1})
+
+    def touch(self, user_id: str) -> None:
+        """Advance the version stamp for a write that is not counted as activity"""
+        self._bump(user_id, {"version": 1})
+
+    def _bump(self, user_id: str, add: dict[str, int]) -> None:
+        today = datetime.utcnow().date()
+        action = self.db.update_action(
+            f"USER#{user_id}",
+            f"ACTIVITY#{today.isoformat()}",
+            {"written_at": int(time.time() * 1000)},
+            add=add,
+        )
+        try:
+            self.db.transact_write([action])
+        except Exception:
+            logger.warning("activity of user %s not recorded", user_id, exc_info=True)
+
+    def stamp(self, user_id: str, settle_seconds: float = 0.0) -> tuple[str, bool]:
+        """
+        The user's version stamp, and whether the last write is at least
+        `settle_seconds` old
+        """
+        today = datetime.utcnow().date()
+        item = self.db.get_item(
+            f"USER#{user_id}",
+            f"ACTIVITY#{today.isoformat()}",
+            projection=["version", "written_at"],
+        )
+        if not item:
+            return today.isoformat(), True
+        written_at = int(item.get("written_at", 0))
+        settled = time.time() * 1000 - written_at >= settle_seconds * 1000
+        return f"{today.isoformat()}.{int(item.get('version', 0))}", settled
+
+    def get_range(self, user_id: str, start: date, end: date) -> list[tuple[date, int]]:
+        """Count for every day from start through end, 0 for days without activity"""
+        items = self.db.query(
+            f"USER#{user_id}",
+            sk_between=(f"ACTIVITY#{start.isoformat()}", f"ACTIVITY#{end.isoformat()}"),
+            projection=["SK", "count"],
+        )
+        counts = {
+            item["SK"].removeprefix("ACTIVITY#"): int(item["count"]) for item in items
+        }
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return [(day, counts.get(day.isoformat(), 0)) for day in days]
+
+
+class AsyncActivityRepository:
+    """Awaitable ActivityRepository"""
+
+    def __init__(self, db: AsyncDynamoDBClient):
+        self.db = db
+
+    async def get_range(
+        self,
+        user_id: str,
+        start: date,
+        end: date,
+    ) -> list[tuple[date, int]]:
+        return await self.db.run(
+            lambda db: ActivityRepository(db).get_range(user_id, start, end)
+        )
+
+    async def stamp(
+        self,
+        user_id: str,
+        settle_seconds: float = 0.0,
+    ) -> tuple[str, bool]:
+        return await self.db.run(
+            lambda db: ActivityRepository(db).stamp(user_id, settle_seconds)
+        )
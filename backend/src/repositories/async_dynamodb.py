@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, TypeVar
+
+from src.core.config import Settings, get_settings
+
+from . import key_layout
+from .storage import StorageEngine, create_storage_engine
+
+T = TypeVar("T")
+
+# Partition and sort key read by prewarm; no item has it
+PREWARM_KEY = "PREWARM"
+
+
+class AsyncDynamoDBClient:
+    """
+    Awaitable facade over the configured storage engine.
+
+    boto3 and sqlite3 are synchronous, so every call is handed to a bounded
+    thread pool and the event loop stays free while the engine responds.
+    Neither boto3 resources nor sqlite3 connections are thread-safe, so each
+    worker thread owns its own client.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.dynamodb_max_workers,
+            thread_name_prefix="dynamodb",
+        )
+        self._local = threading.local()
+        # StorageEngine.colocated of the clients this facade builds
+        self.colocated = (
+            settings.storage_engine == "sqlite"
+            or key_layout.PHASES[settings.dynamodb_key_layout][0]
+            == key_layout.USER_LAYOUT
+        )
+
+    def _thread_client(self) -> StorageEngine:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = create_storage_engine(self.settings)
+            self._local.client = client
+        return client
+
+    async def run(self, fn: Callable[[StorageEngine], T]) -> T:
+        """Run fn against this thread's storage client on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: fn(self._thread_client())
+        )
+
+    async def prewarm(self, clients: int) -> None:
+        """
+        Build up to `clients` worker clients and make one read with each, so
+        that the first requests find them connected. The key read has no
+        item.
+        """
+        await asyncio.gather(
+            *(
+                self.run(lambda db: db.get_item(PREWARM_KEY, PREWARM_KEY))
+                for _ in range(min(clients, self.settings.dynamodb_max_workers))
+            )
+        )
+
+
+@lru_cache
+def get_async_dynamodb_client() -> AsyncDynamoDBClient:
+    return AsyncDynamoDBClient(get_settings())
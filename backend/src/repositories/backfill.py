@@ -0,0 +1,651 @@
+"""
+Resumable parallel-scan backfills.
+
+A Migration rewrites stored items one at a time: transform() returns the
+attributes to SET on an item, or None when the item needs nothing (out of
+scope, or already migrated), so re-running a migration is a no-op for the
+items it has done. A migration that needs other items to transform one
+(such as a milestone's goal) collects them in a preparing scan first.
+BackfillRunner splits the table into parallel Scan
+segments served by a thread pool, writes each change as an UpdateItem
+guarded by the values the migration read, records every segment's position
+in a checkpoint after each page, and keeps consumed capacity under a
+budget.
+
+The table is reached through a ScanBackend: DynamoDBScanBackend for
+DynamoDB or DynamoDB Local, MemoryScanBackend as an in-memory stand-in.
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Protocol
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from src.core.config import Settings
+
+from . import key_layout
+from .dynamodb import DynamoDBClient, TransactionConflictError, client_config
+from .milestone_repository import MilestoneRepository
+
+# DynamoDB error codes for requests rejected for exceeding capacity
+THROTTLING_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# Backoff after a throttled request: doubles per consecutive throttle
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_MAX_SECONDS = 5.0
+
+
+class ThrottledError(Exception):
+    """Raised by a ScanBackend when a request was rejected for exceeding capacity"""
+
+
+class ScanPage:
+    """One page of a Scan segment and the read capacity it consumed"""
+
+    def __init__(
+        self,
+        items: list[dict[str, Any]],
+        last_key: dict[str, Any] | None,
+        consumed: float,
+    ):
+        self.items = items
+        self.last_key = last_key
+        self.consumed = consumed
+
+
+class ScanBackend(Protocol):
+    def scan_page(
+        self,
+        segment: int,
+        total_segments: int,
+        start_key: dict[str, Any] | None,
+        limit: int,
+        filters: dict[str, str] | None = None,
+    ) -> ScanPage: ...
+
+    def get_item(self, key: dict[str, Any]) -> dict[str, Any] | None: ...
+
+    def update_item(
+        self,
+        key: dict[str, Any],
+        updates: dict[str, Any],
+        expected: dict[str, Any],
+    ) -> float: ...
+
+
+class DynamoDBScanBackend:
+    """
+    ScanBackend over a DynamoDB table. Items keep their stored keys: no key
+    layout translation is applied.
+
+    boto3 resources are not thread-safe, so every worker thread gets its
+    own.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._local = threading.local()
+
+    @property
+    def table(self) -> Any:
+        table = getattr(self._local, "table", None)
+        if table is None:
+            resource_kwargs: dict[str, Any] = {
+                "region_name": self.settings.aws_region
+            }
+            if self.settings.dynamodb_endpoint_url:
+                resource_kwargs["endpoint_url"] = self.settings.dynamodb_endpoint_url
+            config = client_config(self.settings)
+            if config is not None:
+                resource_kwargs["config"] = config
+            session = boto3.session.Session()
+            table = session.resource("dynamodb", **resource_kwargs).Table(
+                self.settings.dynamodb_table_name
+            )
+            self._local.table = table
+        return table
+
+    def _call(self, method: Any, **kwargs: Any) -> dict[str, Any]:
+        try:
+            return method(**kwargs)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in THROTTLING_ERRORS:
+                raise ThrottledError(str(e)) from e
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise TransactionConflictError(
+                    str(e), ["ConditionalCheckFailed"]
+                ) from e
+            raise
+
+    def scan_page(
+        self,
+        segment: int,
+        total_segments: int,
+        start_key: dict[str, Any] | None,
+        limit: int,
+        filters: dict[str, str] | None = None,
+    ) -> ScanPage:
+        scan_kwargs: dict[str, Any] = {
+            "Segment": segment,
+            "TotalSegments": total_segments,
+            "Limit": limit,
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if start_key:
+            scan_kwargs["ExclusiveStartKey"] = start_key
+        if filters:
+            condition = None
+            for name, value in filters.items():
+                clause = Attr(name).eq(value)
+                condition = clause if condition is None else condition & clause
+            scan_kwargs["FilterExpression"] = condition
+
+        response = self._call(self.table.scan, **scan_kwargs)
+        return ScanPage(
+            response.get("Items", []),
+            response.get("LastEvaluatedKey"),
+            response.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0),
+        )
+
+    def get_item(self, key: dict[str, Any]) -> dict[str, Any] | None:
+        response = self._call(self.table.get_item, Key=key, ConsistentRead=True)
+        return response.get("Item")
+
+    def update_item(
+        self,
+        key: dict[str, Any],
+        updates: dict[str, Any],
+        expected: dict[str, Any],
+    ) -> float:
+        """SET updates if the item still has the expected values; returns write units"""
+        update_expression, names, values = DynamoDBClient._update_expression(updates)
+        condition = DynamoDBClient._condition(names, values, expected, must_exist=True)
+        response = self._call(
+            self.table.update_item,
+            Key=key,
+            UpdateExpression=update_expression,
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnConsumedCapacity="TOTAL",
+        )
+        return response.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0)
+
+
+class MemoryScanBackend:
+    """
+    In-memory ScanBackend for tests and dry runs.
+
+    Items are assigned to segments by a hash of their partition key, as in
+    DynamoDB, and capacity is charged by item size (4 KB per half read unit,
+    1 KB per write unit). The first `throttles` requests are rejected with
+    ThrottledError.
+    """
+
+    def __init__(self, items: list[dict[str, Any]], throttles: int = 0):
+        self.items = {(item["PK"], item["SK"]): dict(item) for item in items}
+        self.throttles = throttles
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(item: dict[str, Any]) -> int:
+        return len(json.dumps(item, default=str))
+
+    def _maybe_throttle(self) -> None:
+        with self._lock:
+            if self.throttles > 0:
+                self.throttles -= 1
+                raise ThrottledError("Simulated throttle")
+
+    def scan_page(
+        self,
+        segment: int,
+        total_segments: int,
+        start_key: dict[str, Any] | None,
+        limit: int,
+        filters: dict[str, str] | None = None,
+    ) -> ScanPage:
+        self._maybe_throttle()
+        with self._lock:
+            keys = sorted(
+                key
+                for key in self.items
+                if zlib.crc32(key[0].encode()) % total_segments == segment
+            )
+            if start_key:
+                after = (start_key["PK"], start_key["SK"])
+                keys = [key for key in keys if key > after]
+            page = keys[:limit]
+            scanned = [dict(self.items[key]) for key in page]
+
+        # Like DynamoDB, filters apply after `limit` items are read
+        items = [
+            item
+            for item in scanned
+            if all(item.get(name) == value for name, value in (filters or {}).items())
+        ]
+        last_key = None
+        if len(keys) > limit:
+            last_key = {"PK": page[-1][0], "SK": page[-1][1]}
+        consumed = math.ceil(sum(self._size(item) for item in scanned) / 4096) * 0.5
+        return ScanPage(items, last_key, consumed)
+
+    def get_item(self, key: dict[str, Any]) -> dict[str, Any] | None:
+        with self._lock:
+            item = self.items.get((key["PK"], key["SK"]))
+            return dict(item) if item is not None else None
+
+    def update_item(
+        self,
+        key: dict[str, Any],
+        updates: dict[str, Any],
+        expected: dict[str, Any],
+    ) -> float:
+        self._maybe_throttle()
+        with self._lock:
+            item = self.items.get((key["PK"], key["SK"]))
+            if item is None or any(
+                item.get(name) != value for name, value in expected.items()
+            ):
+                raise TransactionConflictError(f"{key['PK']}/{key['SK']}")
+            for path, value in updates.items():
+                *parents, name = path.split(".")
+                target = item
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[name] = value
+            return float(max(1, math.ceil(self._size(item) / 1024)))
+
+
+class Migration(ABC):
+    """
+    A per-item backfill.
+
+    Subclasses set `name` and implement transform(). Only items whose
+    attributes equal `filters` are passed to it. Each write is conditional
+    on the item's `guard` attributes still having the values transform()
+    saw; when one changed in between, the item is read again and
+    transformed anew.
+
+    Subclasses that set `prepare_filters` have prepare() called with every
+    item matching them, in a scan of the whole table that completes before
+    the first transform() and is repeated by every run, including resumed
+    ones. `prepared` names what that scan collects, for the report.
+    """
+
+    name: str = ""
+    filters: dict[str, str] | None = None
+    guard: tuple[str, ...] = ("updated_at",)
+    prepare_filters: dict[str, str] | None = None
+    prepared: str = ""
+
+    def prepare(self, item: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def transform(self, item: dict[str, Any]) -> dict[str, Any] | None:
+        """The attributes to SET on the item, or None to leave it as it is"""
+
+
+class MilestoneIndexKeys(Migration):
+    """
+    Add user-milestones-index keys to milestones stored before the index
+    existed, in either key layout.
+
+    User-layout milestones carry their owner in their partition key.
+    Goal-layout ones (PK = GOAL#{goalId}) do not, so the owner of every goal
+    is collected first, from the goal items' keys; milestones whose goal no
+    longer exists cannot be listed and are left as they are.
+    """
+
+    name = "milestone-index-keys"
+    filters = {"type": "milestone"}
+    guard = ("status", "due_date")
+    prepare_filters = {"type": "goal"}
+    prepared = "goal owners"
+
+    def __init__(self) -> None:
+        # goal id -> owner's user id; a goal never changes owner
+        self.owners: dict[str, str] = {}
+
+    def prepare(self, item: dict[str, Any]) -> None:
+        self.owners[item["SK"].removeprefix("GOAL#")] = item["PK"].removeprefix(
+            "USER#"
+        )
+
+    def transform(self, item: dict[str, Any]) -> dict[str, Any] | None:
+        if "GSI1PK" in item:
+            return None
+        if key_layout.layout_of(item["PK"]) == key_layout.GOAL_LAYOUT:
+            user_id = self.owners.get(item["PK"].removeprefix("GOAL#"))
+            if user_id is None:
+                return None
+        else:
+            user_id = item["PK"].removeprefix("USER#")
+        return MilestoneRepository._index_keys(
+            user_id,
+            item["id"],
+            item["status"],
+            item["due_date"],
+        )
+
+
+MIGRATIONS: dict[str, Migration] = {
+    migration.name: migration for migration in (MilestoneIndexKeys(),)
+}
+
+
+class CapacityBudget:
+    """
+    Limits the capacity units spent per second, shared by all workers.
+
+    Units are charged after each request, as DynamoDB reports them, and the
+    caller sleeps off whatever exceeds the rate (allowing a one-second
+    burst). A throttled request halves the rate for the rest of the run.
+    With no rate, nothing is limited.
+    """
+
+    def __init__(self, units_per_second: float | None):
+        self.units_per_second = units_per_second
+        self._next_free = time.monotonic()
+        self._lock = threading.Lock()
+
+    def spend(self, units: float) -> None:
+        if not self.units_per_second or units <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_free = (
+                max(self._next_free, now - 1.0) + units / self.units_per_second
+            )
+            delay = self._next_free - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttled(self) -> None:
+        with self._lock:
+            if self.units_per_second:
+                self.units_per_second = max(1.0, self.units_per_second / 2)
+
+
+class CheckpointStore:
+    """
+    Position of every Scan segment of one migration run, saved to a JSON
+    file after each page so an interrupted run resumes where it stopped.
+    Without a path, positions are only kept in memory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.state: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def load(self, migration: str, total_segments: int) -> dict[int, dict[str, Any]]:
+        """Segment positions ({"start_key", "done"}) to resume from"""
+        if self.path and os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            if (
+                state["migration"] != migration
+                or state["total_segments"] != total_segments
+            ):
+                raise ValueError(
+                    f"{self.path} is a checkpoint of {state['migration']} with "
+                    f"{state['total_segments']} segments"
+                )
+            self.state = state
+        else:
+            self.state = {
+                "migration": migration,
+                "total_segments": total_segments,
+                "segments": {
+                    str(segment): {"start_key": None, "done": False}
+                    for segment in range(total_segments)
+                },
+            }
+        return {
+            int(segment): dict(position)
+            for segment, position in self.state["segments"].items()
+        }
+
+    def save(self, segment: int, start_key: dict[str, Any] | None, done: bool) -> None:
+        with self._lock:
+            self.state["segments"][str(segment)] = {
+                "start_key": start_key,
+                "done": done,
+            }
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f, default=str)
+            os.replace(tmp_path, self.path)
+
+
+class BackfillReport:
+    """
+    Counters of one run. `prepared` counts the items collected by the
+    migration's preparing scan; `changed` counts items that needed a write;
+    `skipped` those left unwritten because they were deleted or kept
+    changing.
+    """
+
+    FIELDS = (
+        "prepared",
+        "scanned",
+        "changed",
+        "updated",
+        "conflicts",
+        "skipped",
+        "throttles",
+        "read_units",
+        "write_units",
+    )
+
+    def __init__(self) -> None:
+        for name in self.FIELDS:
+            setattr(self, name, 0)
+        self.segments_done = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **counts: float) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def as_dict(self) -> dict[str, float]:
+        names = (*self.FIELDS, "segments_done", "elapsed")
+        return {name: getattr(self, name) for name in names}
+
+    def format(self, dry_run: bool = False, prepared: str = "") -> str:
+        def rate(count: float) -> float:
+            return count / self.elapsed if self.elapsed else 0.0
+
+        verb = "would update" if dry_run else "updated"
+        lines = []
+        if prepared:
+            lines.append(f"prepared    {self.prepared:>10}   {prepared}")
+        return "\n".join(
+            lines
+            + [
+                f"scanned     {self.scanned:>10}   {rate(self.scanned):>10.1f} items/s",
+                f"{verb:<12}{self.changed if dry_run else self.updated:>10}",
+                f"conflicts   {self.conflicts:>10}   skipped {self.skipped}",
+                f"throttles   {self.throttles:>10}",
+                f"read units  {self.read_units:>10.1f}"
+                f"   {rate(self.read_units):>10.1f} RCU/s",
+                f"write units {self.write_units:>10.1f}"
+                f"   {rate(self.write_units):>10.1f} WCU/s",
+                f"segments    {self.segments_done:>10}   in {self.elapsed:.1f} s",
+            ]
+        )
+
+
+class BackfillRunner:
+    """
+    Runs a Migration over every item of a table.
+
+    `segments` parallel Scan segments are served by `workers` threads (one
+    per segment by default). Each segment reads `page_size` items at a
+    time, migrates them, then checkpoints its position, so after an
+    interruption at most one page per segment is seen again; transforms
+    must therefore be idempotent. A write whose guard no longer holds is
+    retried from a fresh read up to `max_attempts` times, then skipped.
+    Throttled requests are retried with exponential backoff and halve the
+    budget's rate.
+
+    With dry_run nothing is written, positions are not persisted, and
+    `changed` reports how many items would be updated.
+    """
+
+    def __init__(
+        self,
+        backend: ScanBackend,
+        migration: Migration,
+        segments: int = 4,
+        workers: int | None = None,
+        page_size: int = 100,
+        checkpoints: CheckpointStore | None = None,
+        read_capacity: float | None = None,
+        write_capacity: float | None = None,
+        dry_run: bool = False,
+        max_attempts: int = 5,
+    ):
+        self.backend = backend
+        self.migration = migration
+        self.segments = segments
+        self.workers = workers or segments
+        self.page_size = page_size
+        self.checkpoints = checkpoints or CheckpointStore()
+        self.read_budget = CapacityBudget(read_capacity)
+        self.write_budget = CapacityBudget(write_capacity)
+        self.dry_run = dry_run
+        self.max_attempts = max_attempts
+        if dry_run:
+            # Positions of a dry run must not make a real run skip items
+            self.checkpoints = CheckpointStore()
+        self.report = BackfillReport()
+
+    def run(self) -> BackfillReport:
+        started = time.monotonic()
+        positions = self.checkpoints.load(self.migration.name, self.segments)
+        pending = [
+            segment for segment, position in positions.items() if not position["done"]
+        ]
+        self.report.segments_done = self.segments - len(pending)
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="backfill"
+        ) as pool:
+            if pending and self.migration.prepare_filters is not None:
+                preparing = [
+                    pool.submit(self._prepare_segment, segment)
+                    for segment in range(self.segments)
+                ]
+                for future in preparing:
+                    future.result()
+            futures = [
+                pool.submit(self._run_segment, segment, positions[segment]["start_key"])
+                for segment in pending
+            ]
+            for future in futures:
+                future.result()
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def _with_backoff(self, budget: CapacityBudget, request: Any) -> Any:
+        """Call request(), retrying with full-jitter backoff while it is throttled"""
+        delay = BACKOFF_BASE_SECONDS
+        while True:
+            try:
+                return request()
+            except ThrottledError:
+                self.report.add(throttles=1)
+                budget.throttled()
+                time.sleep(random.uniform(0, delay))
+                delay = min(BACKOFF_MAX_SECONDS, delay * 2)
+
+    def _scan_page(
+        self,
+        segment: int,
+        start_key: dict[str, Any] | None,
+        filters: dict[str, str] | None,
+    ) -> ScanPage:
+        page = self._with_backoff(
+            self.read_budget,
+            lambda: self.backend.scan_page(
+                segment, self.segments, start_key, self.page_size, filters
+            ),
+        )
+        self.read_budget.spend(page.consumed)
+        self.report.add(read_units=page.consumed)
+        return page
+
+    def _prepare_segment(self, segment: int) -> None:
+        """Pass one whole segment's prepare_filters items to prepare()"""
+        start_key = None
+        while True:
+            page = self._scan_page(segment, start_key, self.migration.prepare_filters)
+            for item in page.items:
+                self.migration.prepare(item)
+            self.report.add(prepared=len(page.items))
+            start_key = page.last_key
+            if start_key is None:
+                return
+
+    def _run_segment(self, segment: int, start_key: dict[str, Any] | None) -> None:
+        while True:
+            page = self._scan_page(segment, start_key, self.migration.filters)
+            self.report.add(scanned=len(page.items))
+            for item in page.items:
+                self._migrate(item)
+
+            start_key = page.last_key
+            self.checkpoints.save(segment, start_key, done=start_key is None)
+            if start_key is None:
+                self.report.add(segments_done=1)
+                return
+
+    def _migrate(self, item: dict[str, Any]) -> None:
+        key = {"PK": item["PK"], "SK": item["SK"]}
+        for attempt in range(self.max_attempts):
+            updates = self.migration.transform(item)
+            if updates is None:
+                return
+            if attempt == 0:
+                self.report.add(changed=1)
+            if self.dry_run:
+                return
+
+            expected = {name: item.get(name) for name in self.migration.guard}
+            try:
+                units = self._with_backoff(
+                    self.write_budget,
+                    lambda: self.backend.update_item(key, updates, expected),
+                )
+            except TransactionConflictError:
+                self.report.add(conflicts=1)
+                item = self._with_backoff(
+                    self.read_budget, lambda: self.backend.get_item(key)
+                )
+                if item is None:
+                    break
+                continue
+            self.write_budget.spend(units)
+            self.report.add(updated=1, write_units=units)
+            return
+        self.report.add(skipped=1)
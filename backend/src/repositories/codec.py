@@ -0,0 +1,68 @@
+"""
+Hand-written codec for the low-level DynamoDB fast path.
+
+boto3's generic TypeDeserializer turns every number into a Decimal, which
+the repositories then convert back to int. All numbers in our Goal and
+Milestone items are integers, so this codec decodes the wire format
+({"S": ...}, {"N": ...}, ...) straight to str/int. The decoded item already
+uses the model's field names, so it is handed to pydantic-core in one call,
+which parses the ISO dates and enums natively instead of going through
+per-field Python conversions.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+from src.models import Goal, Milestone
+
+
+def _decode_value(value: dict[str, Any]) -> Any:
+    if "S" in value:
+        return value["S"]
+    if "N" in value:
+        number = value["N"]
+        if "." in number or "e" in number or "E" in number:
+            return Decimal(number)
+        return int(number)
+    if "M" in value:
+        return {key: _decode_value(v) for key, v in value["M"].items()}
+    if "L" in value:
+        return [_decode_value(v) for v in value["L"]]
+    if "BOOL" in value:
+        return value["BOOL"]
+    if "NULL" in value:
+        return None
+    if "SS" in value:
+        return set(value["SS"])
+    if "NS" in value:
+        return {_decode_value({"N": n}) for n in value["NS"]}
+    if "B" in value:
+        return value["B"]
+    raise TypeError(f"Unsupported DynamoDB value: {value!r}")
+
+
+def decode_item(raw: dict[str, Any]) -> dict[str, Any]:
+    """Decode a wire-format item into plain Python values"""
+    return {key: _decode_value(value) for key, value in raw.items()}
+
+
+def encode_key(key: dict[str, str]) -> dict[str, dict[str, str]]:
+    """Encode a key of string attributes into wire format"""
+    return {name: {"S": value} for name, value in key.items()}
+
+
+def goal_from_item(item: dict[str, Any]) -> Goal:
+    """Build a Goal from a decoded item; unknown attributes such as PK are ignored"""
+    if "description" not in item:
+        item = {**item, "description": ""}
+    return Goal.model_validate(item)
+
+
+def milestone_from_item(item: dict[str, Any]) -> Milestone:
+    """
+    Build a Milestone from a decoded item; unknown attributes such as PK are
+    ignored
+    """
+    if "description" not in item or "order" not in item:
+        item = {"description": "", "order": 0, **item}
+    return Milestone.model_validate(item)
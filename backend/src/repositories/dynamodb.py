@@ -1,29 +1,217 @@
-from functools import lru_cache
-from typing import Any
-
-import boto3
-from boto3.dynamodb.conditions import Key
+import base64
+import binascii
+import json
+import random
+import time
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Iterator
 
 from src.core.config import Settings, get_settings
 
+from . import codec, key_layout
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+
+# boto3 and botocore are imported where they are first needed rather than
+# here: they are most of the API's import time, which every Lambda cold
+# start pays before its first request (see scripts/check_import_time.py)
+
+# Maximum number of actions DynamoDB accepts in one TransactWriteItems call
+TRANSACTION_MAX_ACTIONS = 100
+
+# Attempts at a write that other transactions keep cancelling
+# (TransactionConflict) before TransactionConflictError is raised
+CONFLICT_ATTEMPTS = 3
+
+# Attempts to copy one milestone that keeps changing during a backfill
+COPY_MAX_ATTEMPTS = 5
+
+# Sparse GSI over milestones, partitioned by user; see MilestoneRepository
+USER_MILESTONES_INDEX = "user-milestones-index"
+
+# Partition and sort key attributes of each global secondary index
+INDEX_KEYS = {
+    USER_MILESTONES_INDEX: ("GSI1PK", "GSI1SK"),
+}
+
+
+def client_config(settings: Settings) -> "Config | None":
+    """botocore Config for pool size, keep-alive, timeouts and retries"""
+    from botocore.config import Config
+
+    options = settings.dynamodb_client_options()
+    if not options:
+        return None
+
+    config_kwargs: dict[str, Any] = {}
+    for name in (
+        "max_pool_connections",
+        "tcp_keepalive",
+        "connect_timeout",
+        "read_timeout",
+    ):
+        if name in options:
+            config_kwargs[name] = options[name]
+
+    retries = {}
+    if "retry_mode" in options:
+        retries["mode"] = options["retry_mode"]
+    if "max_attempts" in options:
+        retries["total_max_attempts"] = options["max_attempts"]
+    if retries:
+        config_kwargs["retries"] = retries
+
+    return Config(**config_kwargs)
+
+
+class ItemNotFoundError(Exception):
+    """Raised when a conditional write targets an item that does not exist"""
+
+
+class TransactionConflictError(Exception):
+    """
+    Raised when a conditional write or transaction is cancelled: a condition
+    no longer holds, or concurrent transactions kept an item busy.
+
+    `reasons` holds the cancellation reason code of each action, in the
+    order they were given ("None" for an action that did not fail), when
+    the write reported them.
+    """
+
+    def __init__(self, message: str = "", reasons: list[str] | None = None):
+        super().__init__(message)
+        self.reasons = reasons or []
+
+    @property
+    def contended(self) -> bool:
+        """Whether a concurrent transaction, not a condition, cancelled it"""
+        return "TransactionConflict" in self.reasons
+
+    def failed(self, index: int) -> bool:
+        """Whether the condition of action `index` did not hold"""
+        return (
+            index < len(self.reasons)
+            and self.reasons[index] == "ConditionalCheckFailed"
+        )
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or belongs to another partition"""
+
+
+def cancellation_reasons(error: "ClientError") -> list[str]:
+    """Reason code of each action of a cancelled TransactWriteItems call"""
+    return [
+        reason.get("Code", "None")
+        for reason in error.response.get("CancellationReasons", [])
+    ]
+
+
+def _contended(error: "ClientError") -> bool:
+    """
+    Whether a write failed only because other transactions held its items,
+    so that trying it again may succeed
+    """
+    code = error.response["Error"]["Code"]
+    if code == "TransactionConflictException":
+        return True
+    reasons = cancellation_reasons(error)
+    return (
+        code == "TransactionCanceledException"
+        and "TransactionConflict" in reasons
+        and "ConditionalCheckFailed" not in reasons
+    )
+
+
+def _retry_contended(write: Callable[[], Any]) -> Any:
+    """
+    Call `write`, again after a short random backoff while concurrent
+    transactions cancel it, up to CONFLICT_ATTEMPTS times in all
+    """
+    from botocore.exceptions import ClientError
+
+    for attempt in range(CONFLICT_ATTEMPTS):
+        try:
+            return write()
+        except ClientError as e:
+            if attempt + 1 == CONFLICT_ATTEMPTS or not _contended(e):
+                raise
+            time.sleep(random.uniform(0, 0.05 * 2**attempt))
+
+
+def encode_cursor(last_evaluated_key: dict[str, Any] | None) -> str | None:
+    """Turn a LastEvaluatedKey into an opaque, URL-safe cursor string"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    pk: str,
+    pk_attribute: str = "PK",
+    sk_prefix: str | None = None,
+) -> dict[str, Any]:
+    """
+    Turn a cursor back into an ExclusiveStartKey for the given partition.
+
+    For index queries, `pk_attribute` is the index's partition key. With
+    `sk_prefix`, the cursor's SK must also lie in the queried range, as
+    goals and milestones share a partition.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+
+    if not isinstance(key, dict) or key.get(pk_attribute) != pk:
+        raise InvalidCursorError("Invalid cursor")
+    if sk_prefix is not None and not str(key.get("SK", "")).startswith(sk_prefix):
+        raise InvalidCursorError("Invalid cursor")
+    return key
+
 
 class DynamoDBClient:
     """
     Single Table Design for DynamoDB
 
-    Table Structure:
-    - PK: USER#{userId} or GOAL#{goalId}
-    - SK: GOAL#{goalId} or MILESTONE#{milestoneId}
+    Table Structure (user key layout):
+    - PK: USER#{userId}
+    - SK: GOAL#{goalId} or GOALM#{goalId}#MILESTONE#{milestoneId}
     - type: "goal" or "milestone"
 
     Access Patterns:
     - Get all goals for a user: PK = USER#{userId}, SK begins_with GOAL#
     - Get a specific goal: PK = USER#{userId}, SK = GOAL#{goalId}
-    - Get all milestones for a goal: PK = GOAL#{goalId}, SK begins_with MILESTONE#
-    - Get a specific milestone: PK = GOAL#{goalId}, SK = MILESTONE#{milestoneId}
+    - Get all milestones for a goal:
+      PK = USER#{userId}, SK begins_with GOALM#{goalId}#MILESTONE#
+    - Get a specific milestone:
+      PK = USER#{userId}, SK = GOALM#{goalId}#MILESTONE#{milestoneId}
+    - Get a user's milestones across goals by due date: user-milestones-index,
+      GSI1PK = USER#{userId}#OPEN or #DONE, GSI1SK between due dates
+
+    Callers always use user-layout keys. Tables still on the goal layout
+    (milestones at PK = GOAL#{goalId}, SK = MILESTONE#{milestoneId}) are
+    served by translating keys, and during an online migration between the
+    layouts (DYNAMODB_KEY_LAYOUT) every write is mirrored to the other
+    layout; see key_layout.
+
+    With fast_path enabled, reads go through the low-level client and the
+    hand-written codec instead of the resource's generic deserializer;
+    numbers come back as int rather than Decimal.
     """
 
+    fast_path = False
+    # True when milestones are read from their owner's partition
+    colocated = False
+
     def __init__(self, settings: Settings):
+        import boto3
+
         self.settings = settings
         self.table_name = settings.dynamodb_table_name
 
@@ -32,73 +220,785 @@ class DynamoDBClient:
         }
         if settings.dynamodb_endpoint_url:
             dynamodb_kwargs["endpoint_url"] = settings.dynamodb_endpoint_url
+        config = client_config(settings)
+        if config is not None:
+            dynamodb_kwargs["config"] = config
 
-        self.dynamodb = boto3.resource("dynamodb", **dynamodb_kwargs)
+        # A private session keeps clients safe to build from worker threads
+        session = boto3.session.Session()
+        self.dynamodb = session.resource("dynamodb", **dynamodb_kwargs)
         self.table = self.dynamodb.Table(self.table_name)
 
+        self.fast_path = settings.dynamodb_fast_path
+        if self.fast_path:
+            self.client = session.client("dynamodb", **dynamodb_kwargs)
+
+        # Layouts written to, the one read from first
+        self.layouts = key_layout.PHASES[settings.dynamodb_key_layout]
+        self.colocated = self.layouts[0] == key_layout.USER_LAYOUT
+
+    def _physical_key(
+        self,
+        pk: str,
+        sk: str,
+        layout: str | None = None,
+    ) -> tuple[str, str]:
+        """Stored key for a user-layout key, in the read layout by default"""
+        if (layout or self.layouts[0]) == key_layout.GOAL_LAYOUT:
+            return key_layout.to_goal_layout(pk, sk)
+        return pk, sk
+
+    def _physical_keys(self, pk: str, sk: str) -> list[tuple[str, str]]:
+        """Stored keys of an item in every layout written to, read layout first"""
+        keys: list[tuple[str, str]] = []
+        for layout in self.layouts:
+            key = self._physical_key(pk, sk, layout)
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    @staticmethod
+    def _logical_item(item: dict[str, Any], user_pk: str) -> dict[str, Any]:
+        """Give an item read from the goal layout its user-layout key"""
+        if "PK" in item and "SK" in item:
+            item["PK"], item["SK"] = key_layout.from_goal_layout(
+                item["PK"], item["SK"], user_pk
+            )
+        return item
+
     def put_item(self, item: dict[str, Any]) -> None:
-        self.table.put_item(Item=item)
+        for pk, sk in self._physical_keys(item["PK"], item["SK"]):
+            self.table.put_item(Item={**item, "PK": pk, "SK": sk})
 
-    def get_item(self, pk: str, sk: str) -> dict[str, Any] | None:
-        response = self.table.get_item(Key={"PK": pk, "SK": sk})
+    def _projection(self, projection: list[str] | None) -> dict[str, Any]:
+        """Request parameters that fetch only the given attributes"""
+        if not projection:
+            return {}
+        names = {f"#proj{i}": attribute for i, attribute in enumerate(projection)}
+        return {
+            "ProjectionExpression": ", ".join(names),
+            "ExpressionAttributeNames": names,
+        }
+
+    def get_item(
+        self,
+        pk: str,
+        sk: str,
+        projection: list[str] | None = None,
+    ) -> dict[str, Any] | None:
+        item = self._get_physical(*self._physical_key(pk, sk), projection)
+        if item and "PK" in item:
+            item["PK"], item["SK"] = pk, sk
+        return item
+
+    def _get_physical(
+        self,
+        pk: str,
+        sk: str,
+        projection: list[str] | None = None,
+    ) -> dict[str, Any] | None:
+        if self.fast_path:
+            response = self.client.get_item(
+                TableName=self.table_name,
+                Key=codec.encode_key({"PK": pk, "SK": sk}),
+                **self._projection(projection),
+            )
+            raw = response.get("Item")
+            return codec.decode_item(raw) if raw else None
+
+        response = self.table.get_item(
+            Key={"PK": pk, "SK": sk},
+            **self._projection(projection),
+        )
         return response.get("Item")
 
-    def query(
+    def _key_condition(
         self,
         pk: str,
         sk_prefix: str | None = None,
         sk_value: str | None = None,
-    ) -> list[dict[str, Any]]:
+        sk_between: tuple[str, str] | None = None,
+    ):
+        from boto3.dynamodb.conditions import Key
+
         key_condition = Key("PK").eq(pk)
 
         if sk_value:
             key_condition = key_condition & Key("SK").eq(sk_value)
         elif sk_prefix:
             key_condition = key_condition & Key("SK").begins_with(sk_prefix)
+        elif sk_between:
+            key_condition = key_condition & Key("SK").between(*sk_between)
+
+        return key_condition
+
+    def _raw_query_kwargs(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """Low-level Query parameters, with the key condition written out by hand"""
+        query_kwargs = self._projection(projection)
+        names = query_kwargs.setdefault("ExpressionAttributeNames", {})
+        names["#pk"] = "PK"
+        values = {":pk": {"S": pk}}
+        key_condition = "#pk = :pk"
+
+        if sk_value:
+            names["#sk"] = "SK"
+            values[":sk"] = {"S": sk_value}
+            key_condition += " AND #sk = :sk"
+        elif sk_prefix:
+            names["#sk"] = "SK"
+            values[":sk"] = {"S": sk_prefix}
+            key_condition += " AND begins_with(#sk, :sk)"
+        elif sk_between:
+            names["#sk"] = "SK"
+            values[":lo"], values[":hi"] = ({"S": sk} for sk in sk_between)
+            key_condition += " AND #sk BETWEEN :lo AND :hi"
+
+        query_kwargs.update(
+            TableName=self.table_name,
+            KeyConditionExpression=key_condition,
+            ExpressionAttributeValues=values,
+        )
+        return query_kwargs
+
+    def _query_once(self, query_kwargs: dict[str, Any]) -> tuple[list, dict | None]:
+        """Run one Query call; returns decoded items and the LastEvaluatedKey"""
+        if self.fast_path:
+            response = self.client.query(**query_kwargs)
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            return (
+                [codec.decode_item(raw) for raw in response.get("Items", [])],
+                codec.decode_item(last_evaluated_key) if last_evaluated_key else None,
+            )
+
+        response = self.table.query(**query_kwargs)
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+    def _base_query_kwargs(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> dict[str, Any]:
+        if self.fast_path:
+            return self._raw_query_kwargs(
+                pk, sk_prefix, sk_value, projection, sk_between
+            )
+        return {
+            "KeyConditionExpression": self._key_condition(
+                pk, sk_prefix, sk_value, sk_between
+            ),
+            **self._projection(projection),
+        }
+
+    def _start_key(self, key: dict[str, Any]) -> dict[str, Any]:
+        return codec.encode_key(key) if self.fast_path else key
+
+    def query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> list[dict[str, Any]]:
+        return list(
+            self.iter_query(
+                pk,
+                sk_prefix=sk_prefix,
+                sk_value=sk_value,
+                projection=projection,
+                sk_between=sk_between,
+            )
+        )
+
+    def iter_query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        page_size: int | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield every matching item, following LastEvaluatedKey across pages.
+
+        The sort key is matched exactly (sk_value), by prefix (sk_prefix) or
+        against an inclusive range (sk_between). Only one page (at most
+        page_size items, and never more than 1 MB) is held in memory at a
+        time.
+        """
+        physical_pk, physical_sk = self._physical_key(pk, sk_value or sk_prefix or "")
+        for item in self._iter_physical(
+            physical_pk,
+            None if sk_value else physical_sk or None,
+            physical_sk if sk_value else None,
+            page_size,
+            projection,
+            sk_between,
+        ):
+            yield self._logical_item(item, pk)
+
+    def _iter_physical(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        page_size: int | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        query_kwargs = self._base_query_kwargs(
+            pk, sk_prefix, sk_value, projection, sk_between
+        )
+        if page_size:
+            query_kwargs["Limit"] = page_size
+
+        while True:
+            items, last_evaluated_key = self._query_once(query_kwargs)
+            yield from items
+
+            if not last_evaluated_key:
+                return
+            query_kwargs["ExclusiveStartKey"] = self._start_key(last_evaluated_key)
+
+    def query_page(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch a single page of at most `limit` items.
+
+        Returns the items and an opaque cursor for the next page, or None
+        when the partition has been read to the end. Cursors carry
+        user-layout keys, so they stay valid across a layout migration.
+        """
+        physical_pk, physical_prefix = self._physical_key(pk, sk_prefix or "")
+        query_kwargs = self._base_query_kwargs(
+            physical_pk, physical_prefix or None, projection=projection
+        )
+        query_kwargs["Limit"] = limit
+        if cursor:
+            start_key = decode_cursor(cursor, pk, sk_prefix=sk_prefix)
+            if not isinstance(start_key.get("SK"), str):
+                raise InvalidCursorError("Invalid cursor")
+            physical_start = self._physical_key(pk, start_key["SK"])
+            query_kwargs["ExclusiveStartKey"] = self._start_key(
+                {"PK": physical_start[0], "SK": physical_start[1]}
+            )
+
+        items, last_evaluated_key = self._query_once(query_kwargs)
+        if last_evaluated_key:
+            last_evaluated_key = self._logical_item(dict(last_evaluated_key), pk)
+        return (
+            [self._logical_item(item, pk) for item in items],
+            encode_cursor(last_evaluated_key),
+        )
+
+    def _index_query_kwargs(
+        self,
+        index: str,
+        pk: str,
+        sk_between: tuple[str, str] | None = None,
+        filters: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        """Query parameters for an index, in the low-level or resource form"""
+        pk_attribute, sk_attribute = INDEX_KEYS[index]
+        names = {"#pk": pk_attribute}
+        values: dict[str, Any] = {":pk": pk}
+        key_condition = "#pk = :pk"
+        if sk_between:
+            names["#sk"] = sk_attribute
+            values[":lo"], values[":hi"] = sk_between
+            key_condition += " AND #sk BETWEEN :lo AND :hi"
+
+        filter_parts = []
+        for i, (name, value) in enumerate((filters or {}).items()):
+            names[f"#flt{i}"] = name
+            values[f":flt{i}"] = value
+            filter_parts.append(f"#flt{i} = :flt{i}")
+
+        if self.fast_path:
+            values = {key: {"S": value} for key, value in values.items()}
+        query_kwargs: dict[str, Any] = {
+            "IndexName": index,
+            "KeyConditionExpression": key_condition,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+        if filter_parts:
+            query_kwargs["FilterExpression"] = " AND ".join(filter_parts)
+        if self.fast_path:
+            query_kwargs["TableName"] = self.table_name
+        return query_kwargs
+
+    def query_index_page(
+        self,
+        index: str,
+        pk: str,
+        sk_between: tuple[str, str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        filters: dict[str, str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch a single page of a global secondary index partition, in index
+        sort key order.
+
+        `sk_between` bounds the sort key (inclusive), and `filters` are
+        string attributes the items must equal. DynamoDB applies filters
+        after reading `limit` items, so a filtered page can come back short,
+        or even empty, with a cursor. During a key layout migration both
+        copies of a milestone are indexed and only those in the read layout
+        are returned, which can also shorten pages. Items keep their stored
+        keys.
+        """
+        query_kwargs = self._index_query_kwargs(index, pk, sk_between, filters)
+        query_kwargs["Limit"] = limit
+        if cursor:
+            start_key = decode_cursor(cursor, pk, INDEX_KEYS[index][0])
+            query_kwargs["ExclusiveStartKey"] = self._start_key(start_key)
+
+        items, last_evaluated_key = self._query_once(query_kwargs)
+        if len(self.layouts) > 1:
+            items = [
+                item
+                for item in items
+                if key_layout.layout_of(item["PK"]) == self.layouts[0]
+            ]
+        return items, encode_cursor(last_evaluated_key)
+
+    @staticmethod
+    def _update_expression(
+        updates: dict[str, Any],
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+    ) -> tuple[str, dict[str, str], dict[str, Any]]:
+        """
+        Build SET/ADD/REMOVE clauses.
 
-        response = self.table.query(KeyConditionExpression=key_condition)
-        return response.get("Items", [])
+        Keys may be dotted paths ("milestone_counts.pending") into map
+        attributes; every segment gets its own name placeholder.
+        """
+        expression_attribute_names: dict[str, str] = {}
+        expression_attribute_values: dict[str, Any] = {}
+
+        def path(key: str) -> str:
+            placeholders = []
+            for segment in key.split("."):
+                placeholder = f"#attr{len(expression_attribute_names)}"
+                expression_attribute_names[placeholder] = segment
+                placeholders.append(placeholder)
+            return ".".join(placeholders)
+
+        clauses = []
+        set_parts = []
+        for i, (key, value) in enumerate(updates.items()):
+            set_parts.append(f"{path(key)} = :val{i}")
+            expression_attribute_values[f":val{i}"] = value
+        if set_parts:
+            clauses.append("SET " + ", ".join(set_parts))
+
+        if add:
+            add_parts = []
+            for i, (key, amount) in enumerate(add.items()):
+                add_parts.append(f"{path(key)} :add{i}")
+                expression_attribute_values[f":add{i}"] = amount
+            clauses.append("ADD " + ", ".join(add_parts))
+
+        if remove:
+            clauses.append("REMOVE " + ", ".join(path(key) for key in remove))
+
+        update_expression = " ".join(clauses)
+        return (
+            update_expression,
+            expression_attribute_names,
+            expression_attribute_values,
+        )
+
+    @staticmethod
+    def _condition(
+        names: dict[str, str],
+        values: dict[str, Any],
+        expected: dict[str, Any] | None = None,
+        must_exist: bool = False,
+    ) -> str | None:
+        """
+        ConditionExpression for `expected` values, adding its placeholders
+        to names/values. An expected value of None means the attribute must
+        be absent.
+        """
+        conditions = ["attribute_exists(PK)"] if must_exist else []
+        for i, (key, value) in enumerate((expected or {}).items()):
+            names[f"#exp{i}"] = key
+            if value is None:
+                conditions.append(f"attribute_not_exists(#exp{i})")
+            else:
+                values[f":exp{i}"] = value
+                conditions.append(f"#exp{i} = :exp{i}")
+        return " AND ".join(conditions) or None
 
     def update_item(
         self,
         pk: str,
         sk: str,
         updates: dict[str, Any],
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        update_expression_parts = []
-        expression_attribute_names = {}
-        expression_attribute_values = {}
+        """
+        SET the given attributes and return the item's new image.
 
-        for i, (key, value) in enumerate(updates.items()):
-            attr_name = f"#attr{i}"
-            attr_value = f":val{i}"
-            update_expression_parts.append(f"{attr_name} = {attr_value}")
-            expression_attribute_names[attr_name] = key
-            expression_attribute_values[attr_value] = value
+        With must_exist, the write is conditional on the item existing, and
+        with `expected` on it still holding those values (None: absent);
+        one that does not raises ItemNotFoundError. During a layout
+        migration the new image is then copied to the other layout. A write
+        that concurrent transactions keep cancelling raises
+        TransactionConflictError.
+        """
+        from botocore.exceptions import ClientError
 
-        update_expression = "SET " + ", ".join(update_expression_parts)
+        (physical_pk, physical_sk), *mirrors = self._physical_keys(pk, sk)
+        update_expression, names, values = self._update_expression(updates)
+        update_kwargs: dict[str, Any] = {
+            "Key": {"PK": physical_pk, "SK": physical_sk},
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+            "ReturnValues": "ALL_NEW",
+        }
+        condition = self._condition(names, values, expected, must_exist)
+        if condition:
+            update_kwargs["ConditionExpression"] = condition
 
-        response = self.table.update_item(
-            Key={"PK": pk, "SK": sk},
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="ALL_NEW",
+        try:
+            response = _retry_contended(
+                partial(self.table.update_item, **update_kwargs)
+            )
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ConditionalCheckFailedException":
+                raise ItemNotFoundError(f"{pk}/{sk}") from e
+            if code == "TransactionConflictException":
+                raise TransactionConflictError(str(e), ["TransactionConflict"]) from e
+            raise
+
+        item = response.get("Attributes", {})
+        for mirror_pk, mirror_sk in mirrors:
+            self.table.put_item(Item={**item, "PK": mirror_pk, "SK": mirror_sk})
+        if item:
+            item["PK"], item["SK"] = pk, sk
+        return item
+
+    def update_action(
+        self,
+        pk: str,
+        sk: str,
+        updates: dict[str, Any],
+        expected: dict[str, Any] | None = None,
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+        must_exist: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Build an Update action for transact_write.
+
+        `updates` are SET, `add` amounts are added to numbers and `remove`
+        paths are deleted. `expected` maps attribute names to the values
+        they must still hold when the transaction commits (None: absent);
+        with must_exist the item must already exist.
+        """
+        update_expression, names, values = self._update_expression(
+            updates, add, remove
         )
-        return response.get("Attributes", {})
+        update: dict[str, Any] = {
+            "TableName": self.table_name,
+            "Key": {"PK": pk, "SK": sk},
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeNames": names,
+        }
+
+        condition = self._condition(names, values, expected, must_exist)
+        if condition:
+            update["ConditionExpression"] = condition
+        if values:
+            update["ExpressionAttributeValues"] = values
+        return {"Update": update}
+
+    def put_action(self, item: dict[str, Any]) -> dict[str, Any]:
+        """Build a Put action for transact_write"""
+        return {"Put": {"TableName": self.table_name, "Item": item}}
+
+    def delete_action(
+        self,
+        pk: str,
+        sk: str,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build a Delete action for transact_write. With `expected`, the item
+        must exist and still hold those values.
+        """
+        delete: dict[str, Any] = {
+            "TableName": self.table_name,
+            "Key": {"PK": pk, "SK": sk},
+        }
+        if expected:
+            names: dict[str, str] = {}
+            values: dict[str, Any] = {}
+            delete["ConditionExpression"] = self._condition(
+                names, values, expected, must_exist=True
+            )
+            delete["ExpressionAttributeNames"] = names
+            if values:
+                delete["ExpressionAttributeValues"] = values
+        return {"Delete": delete}
+
+    def _physical_actions(self, action: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        An action applied to the item's stored key in each layout written to.
+
+        Conditions only guard the copy in the read layout. Mirrored copies
+        are written unconditionally, so a milestone the backfill has not
+        copied yet cannot cancel the transaction; an update then leaves a
+        fragment without created_at, which the backfill overwrites.
+        """
+        kind, body = next(iter(action.items()))
+        target = body["Item"] if kind == "Put" else body["Key"]
+        physical = []
+        for i, (pk, sk) in enumerate(self._physical_keys(target["PK"], target["SK"])):
+            copy = dict(body)
+            if kind == "Put":
+                copy["Item"] = {**body["Item"], "PK": pk, "SK": sk}
+            else:
+                copy["Key"] = {"PK": pk, "SK": sk}
+            if i > 0 and copy.pop("ConditionExpression", None):
+                # Placeholders only the condition used must go with it
+                for field, prefix in (
+                    ("ExpressionAttributeNames", "#exp"),
+                    ("ExpressionAttributeValues", ":exp"),
+                ):
+                    kept = {
+                        k: v for k, v in copy.get(field, {}).items()
+                        if not k.startswith(prefix)
+                    }
+                    if kept:
+                        copy[field] = kept
+                    else:
+                        copy.pop(field, None)
+            physical.append({kind: copy})
+        return physical
+
+    def transact_write(self, actions: list[dict[str, Any]]) -> None:
+        """
+        Commit actions with TransactWriteItems.
+
+        Each call carries at most TRANSACTION_MAX_ACTIONS actions and is
+        atomic on its own; longer lists are split across several calls,
+        never between the copies of one action during a layout migration.
+        A single update is sent as a plain UpdateItem, which costs half the
+        write capacity of a one-action transaction.
+
+        A call cancelled only by concurrent transactions is retried up to
+        CONFLICT_ATTEMPTS times. TransactionConflictError then carries the
+        cancellation reason of each action, so that callers can tell a
+        failed condition ("ConditionalCheckFailed") from contention
+        ("TransactionConflict").
+        """
+        from botocore.exceptions import ClientError
+
+        groups = [self._physical_actions(action) for action in actions]
+        client = self.dynamodb.meta.client
+        if len(groups) == 1 and len(groups[0]) == 1 and "Update" in groups[0][0]:
+            try:
+                _retry_contended(
+                    partial(client.update_item, **groups[0][0]["Update"])
+                )
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code == "ConditionalCheckFailedException":
+                    raise TransactionConflictError(
+                        str(e), ["ConditionalCheckFailed"]
+                    ) from e
+                if code == "TransactionConflictException":
+                    raise TransactionConflictError(
+                        str(e), ["TransactionConflict"]
+                    ) from e
+                raise
+            return
+
+        # Each physical action with the index of the action it came from
+        batches: list[list[tuple[int, dict[str, Any]]]] = [[]]
+        for index, group in enumerate(groups):
+            if len(batches[-1]) + len(group) > TRANSACTION_MAX_ACTIONS:
+                batches.append([])
+            batches[-1].extend((index, action) for action in group)
 
-    def delete_item(self, pk: str, sk: str) -> None:
-        self.table.delete_item(Key={"PK": pk, "SK": sk})
+        for batch in batches:
+            try:
+                _retry_contended(
+                    partial(
+                        client.transact_write_items,
+                        TransactItems=[action for _, action in batch],
+                    )
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                reasons = ["None"] * len(actions)
+                for (index, _), code in zip(batch, cancellation_reasons(e)):
+                    if reasons[index] == "None":
+                        reasons[index] = code
+                raise TransactionConflictError(str(e), reasons) from e
+
+    def delete_item(
+        self,
+        pk: str,
+        sk: str,
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Delete an item and return it, or None when there was none.
+
+        With must_exist, or `expected` values the item must still hold,
+        raises ItemNotFoundError when the condition fails instead.
+        """
+        from botocore.exceptions import ClientError
+
+        (physical_pk, physical_sk), *mirrors = self._physical_keys(pk, sk)
+        delete_kwargs: dict[str, Any] = {
+            "Key": {"PK": physical_pk, "SK": physical_sk},
+            "ReturnValues": "ALL_OLD",
+        }
+        names: dict[str, str] = {}
+        values: dict[str, Any] = {}
+        condition = self._condition(names, values, expected, must_exist)
+        if condition:
+            delete_kwargs["ConditionExpression"] = condition
+        if names:
+            delete_kwargs["ExpressionAttributeNames"] = names
+        if values:
+            delete_kwargs["ExpressionAttributeValues"] = values
+
+        try:
+            response = _retry_contended(
+                partial(self.table.delete_item, **delete_kwargs)
+            )
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ConditionalCheckFailedException":
+                raise ItemNotFoundError(f"{pk}/{sk}") from e
+            if code == "TransactionConflictException":
+                raise TransactionConflictError(str(e), ["TransactionConflict"]) from e
+            raise
+        for mirror_pk, mirror_sk in mirrors:
+            self.table.delete_item(Key={"PK": mirror_pk, "SK": mirror_sk})
+        item = response.get("Attributes")
+        if item:
+            item["PK"], item["SK"] = pk, sk
+        return item or None
 
     def batch_write(self, items: list[dict[str, Any]]) -> None:
         with self.table.batch_writer() as batch:
             for item in items:
-                batch.put_item(Item=item)
+                for pk, sk in self._physical_keys(item["PK"], item["SK"]):
+                    batch.put_item(Item={**item, "PK": pk, "SK": sk})
 
     def batch_delete(self, keys: list[tuple[str, str]]) -> None:
         with self.table.batch_writer() as batch:
-            for pk, sk in keys:
-                batch.delete_item(Key={"PK": pk, "SK": sk})
+            for logical_pk, logical_sk in keys:
+                for pk, sk in self._physical_keys(logical_pk, logical_sk):
+                    batch.delete_item(Key={"PK": pk, "SK": sk})
+
+    def copy_to_user_layout(self, user_id: str, goal_id: str) -> int:
+        """
+        Copy a goal's goal-layout milestones into the owner's partition; the
+        backfill step of a migration to the user layout.
+
+        Each copy is a transaction that checks the source still has the
+        updated_at, order and rank it was read with, and writes the copy
+        only where there is none yet or just a fragment left by mirrored
+        updates (no created_at). A source that changed in between, or that
+        a concurrent transaction held, is read again and retried, up to
+        COPY_MAX_ATTEMPTS times. Safe to re-run; returns the number of
+        milestones copied.
+        """
+        from botocore.exceptions import ClientError
+
+        client = self.dynamodb.meta.client
+        goal_pk = f"GOAL#{goal_id}"
+        copied = 0
+        for item in self._iter_physical(goal_pk, "MILESTONE#"):
+            for _ in range(COPY_MAX_ATTEMPTS):
+                names: dict[str, str] = {}
+                values: dict[str, Any] = {}
+                unchanged = self._condition(
+                    names,
+                    values,
+                    {
+                        "updated_at": item.get("updated_at"),
+                        "order": item.get("order"),
+                        "rank": item.get("rank"),
+                    },
+                    must_exist=True,
+                )
+                check: dict[str, Any] = {
+                    "TableName": self.table_name,
+                    "Key": {"PK": item["PK"], "SK": item["SK"]},
+                    "ConditionExpression": unchanged,
+                    "ExpressionAttributeNames": names,
+                }
+                if values:
+                    check["ExpressionAttributeValues"] = values
+                user_pk, user_sk = key_layout.from_goal_layout(
+                    item["PK"], item["SK"], f"USER#{user_id}"
+                )
+                try:
+                    client.transact_write_items(
+                        TransactItems=[
+                            {"ConditionCheck": check},
+                            {
+                                "Put": {
+                                    "TableName": self.table_name,
+                                    "Item": {**item, "PK": user_pk, "SK": user_sk},
+                                    "ConditionExpression": (
+                                        "attribute_not_exists(created_at)"
+                                    ),
+                                }
+                            },
+                        ]
+                    )
+                    copied += 1
+                    break
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "TransactionCanceledException":
+                        raise
+                    reasons = cancellation_reasons(e)
+                    if len(reasons) > 1 and reasons[1] == "ConditionalCheckFailed":
+                        # The copy's own condition failed: already copied
+                        break
+                # The source changed (ConditionalCheckFailed on the check) or
+                # was held by another transaction (TransactionConflict)
+                item = self._get_physical(item["PK"], item["SK"])
+                if item is None:
+                    break
+            else:
+                raise TransactionConflictError(f"{goal_pk}: milestone kept changing")
+        return copied
 
 
 @lru_cache
@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from src.core.config import get_settings
+from src.models import Goal
+
+logger = logging.getLogger(__name__)
+# INFO is below the Lambda runtime's default level
+logger.setLevel(logging.INFO)
+
+# Lookups between two logs of the cache's stats
+STATS_LOG_INTERVAL = 1000
+
+
+class GoalCache:
+    """
+    Bounded in-process LRU cache of goals keyed by (user_id, goal_id).
+
+    Entries expire after `ttl_seconds`, so a goal changed or deleted by
+    another Lambda container or uvicorn worker is seen again within that
+    window. Writes made through GoalRepository update the cache directly.
+    A `max_entries` or `ttl_seconds` of 0 disables caching.
+
+    Entries are also tied to the user's version stamp (see observe), so
+    that a GET response, which carries an ETag for the stamp, is never
+    built from a goal cached before the stamp's last write.
+
+    Hit, miss and eviction counts are logged every STATS_LOG_INTERVAL
+    lookups.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (user_id, goal_id) -> (expires_at, version, goal), least recently
+        # used first
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any, Goal]] = (
+            OrderedDict()
+        )
+        # user_id -> the version entries must have been put under to be
+        # served, for the max_entries most recently observed users
+        self._versions: OrderedDict[str, Any] = OrderedDict()
+        # Shared by the event loop and every DynamoDB worker thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: str, goal_id: str) -> Goal | None:
+        if not self.enabled:
+            return None
+        key = (user_id, goal_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry[0] <= time.monotonic()
+                or entry[1] != self._versions.get(user_id)
+            ):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                goal = None
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                goal = entry[2]
+            lookups = self.hits + self.misses
+        if lookups % STATS_LOG_INTERVAL == 0:
+            logger.info("goal cache: %s", self.stats())
+        return goal
+
+    def version(self, user_id: str) -> Any:
+        """
+        The user's current version, to pass to put for goals read from now
+        on. Taken before the read, so that a version observed while the
+        read is under way invalidates what it returns.
+        """
+        with self._lock:
+            return self._versions.get(user_id)
+
+    def put(self, goal: Goal, version: Any) -> None:
+        if not self.enabled:
+            return
+        key = (goal.user_id, goal.id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, goal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def observe(self, user_id: str, version: str, settled: bool) -> None:
+        """
+        Record the user's version stamp (ActivityRepository.stamp).
+
+        Entries put under another version are no longer served. While the
+        last write is settling the version is marked as such, so goals read
+        then, which eventually consistent reads may have left behind the
+        write, are read again once it has settled.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._versions[user_id] = version if settled else ("settling", version)
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                self._versions.popitem(last=False)
+
+    def invalidate(self, user_id: str, goal_id: str) -> None:
+        with self._lock:
+            self._entries.pop((user_id, goal_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@lru_cache
+def get_goal_cache() -> GoalCache:
+    settings = get_settings()
+    return GoalCache(settings.goal_cache_max_entries, settings.goal_cache_ttl_seconds)
@@ -2,17 +2,32 @@ import uuid
 from datetime import date, datetime
 from typing import Any
 
-from src.models import Goal, GoalStatus, CreateGoalRequest, UpdateGoalRequest
+from src.core.config import get_settings
+from src.models import (
+    Goal,
+    GoalResponse,
+    GoalStatus,
+    MilestoneStatus,
+    CreateGoalRequest,
+    UpdateGoalRequest,
+)
 
-from .dynamodb import DynamoDBClient
+from . import codec, tombstone
+from .activity_repository import ActivityRepository
+from .async_dynamodb import AsyncDynamoDBClient
+from .dynamodb import TRANSACTION_MAX_ACTIONS, ItemNotFoundError
+from .goal_cache import GoalCache, get_goal_cache
+from .storage import StorageEngine
 
 
 class GoalRepository:
-    def __init__(self, db: DynamoDBClient):
+    def __init__(self, db: StorageEngine, cache: GoalCache | None = None):
         self.db = db
+        self.cache = cache if cache is not None else get_goal_cache()
+        self.activity = ActivityRepository(db)
 
     def _to_item(self, goal: Goal, user_id: str) -> dict[str, Any]:
-        return {
+        item = {
             "PK": f"USER#{user_id}",
             "SK": f"GOAL#{goal.id}",
             "type": "goal",
@@ -26,8 +41,23 @@ class GoalRepository:
             "created_at": goal.created_at.isoformat(),
             "updated_at": goal.updated_at.isoformat(),
         }
+        if goal.milestone_counts is not None:
+            item["milestone_counts"] = goal.milestone_counts
+        if goal.open_milestone_due_dates is not None:
+            item["open_milestone_due_dates"] = {
+                milestone_id: due_date.isoformat()
+                for milestone_id, due_date in goal.open_milestone_due_dates.items()
+            }
+        if goal.next_milestone_order is not None:
+            item["next_milestone_order"] = goal.next_milestone_order
+        return item
 
     def _from_item(self, item: dict[str, Any]) -> Goal:
+        if self.db.fast_path:
+            return codec.goal_from_item(item)
+        counts = item.get("milestone_counts")
+        due_dates = item.get("open_milestone_due_dates")
+        next_order = item.get("next_milestone_order")
         return Goal(
             id=item["id"],
             user_id=item["user_id"],
@@ -38,11 +68,22 @@ class GoalRepository:
             status=GoalStatus(item["status"]),
             created_at=datetime.fromisoformat(item["created_at"]),
             updated_at=datetime.fromisoformat(item["updated_at"]),
+            milestone_counts=(
+                None
+                if counts is None
+                else {status: int(count) for status, count in counts.items()}
+            ),
+            open_milestone_due_dates=(
+                None
+                if due_dates is None
+                else {mid: date.fromisoformat(due) for mid, due in due_dates.items()}
+            ),
+            next_milestone_order=None if next_order is None else int(next_order),
         )
 
-    def create(self, user_id: str, request: CreateGoalRequest) -> Goal:
+    def _new_goal(self, user_id: str, request: CreateGoalRequest) -> Goal:
         now = datetime.utcnow()
-        goal = Goal(
+        return Goal(
             id=str(uuid.uuid4()),
             user_id=user_id,
             title=request.title,
@@ -52,19 +93,168 @@ class GoalRepository:
             status=GoalStatus.NOT_STARTED,
             created_at=now,
             updated_at=now,
+            milestone_counts={status.value: 0 for status in MilestoneStatus},
+            open_milestone_due_dates={},
+            next_milestone_order=0,
         )
+
+    def create(self, user_id: str, request: CreateGoalRequest) -> Goal:
+        goal = self._new_goal(user_id, request)
+        version = self.cache.version(user_id)
         self.db.put_item(self._to_item(goal, user_id))
+        self.activity.record(user_id)
+        self.cache.put(goal, version)
         return goal
 
+    def create_many(
+        self,
+        user_id: str,
+        requests: list[CreateGoalRequest],
+    ) -> list[Goal]:
+        """
+        Create several goals (bulk import).
+
+        Goals are written in transactions of up to TRANSACTION_MAX_ACTIONS
+        actions, each counted as activity once it commits, so an import that
+        fails part way counts only the goals it stored.
+        """
+        goals = [self._new_goal(user_id, request) for request in requests]
+        version = self.cache.version(user_id)
+        size = TRANSACTION_MAX_ACTIONS
+        for start in range(0, len(goals), size):
+            chunk = goals[start : start + size]
+            self.db.transact_write(
+                [self.db.put_action(self._to_item(goal, user_id)) for goal in chunk]
+            )
+            self.activity.record(user_id, len(chunk))
+        return self._cache_all(goals, version)
+
     def get_by_id(self, user_id: str, goal_id: str) -> Goal | None:
+        goal = self.cache.get(user_id, goal_id)
+        if goal is not None:
+            return goal
+        return self._load_by_id(user_id, goal_id)
+
+    def _load_by_id(self, user_id: str, goal_id: str) -> Goal | None:
+        """Read a goal from the table, bypassing and then refreshing the cache"""
+        version = self.cache.version(user_id)
         item = self.db.get_item(f"USER#{user_id}", f"GOAL#{goal_id}")
-        if not item:
+        if not item or tombstone.is_tombstoned(item):
             return None
-        return self._from_item(item)
+        goal = self._from_item(item)
+        self.cache.put(goal, version)
+        return goal
 
-    def get_all_by_user(self, user_id: str) -> list[Goal]:
-        items = self.db.query(f"USER#{user_id}", sk_prefix="GOAL#")
-        return [self._from_item(item) for item in items]
+    def _cache_all(self, goals: list[Goal], version: Any) -> list[Goal]:
+        # Listing goals usually precedes opening one of them
+        for goal in goals:
+            self.cache.put(goal, version)
+        return goals
+
+    def _goal_items(
+        self,
+        user_id: str,
+        projection: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        items = self.db.query(
+            f"USER#{user_id}", sk_prefix="GOAL#", projection=projection
+        )
+        return tombstone.live(items)
+
+    def _goal_items_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        One page of goal items. Deleted goals are dropped from the page, so
+        until their TTL removes them it can come back short.
+        """
+        items, next_cursor = self.db.query_page(
+            f"USER#{user_id}",
+            sk_prefix="GOAL#",
+            limit=limit,
+            cursor=cursor,
+            projection=projection,
+        )
+        return tombstone.live(items), next_cursor
+
+    def _listed(
+        self,
+        items: list[dict[str, Any]],
+        as_responses: bool,
+        version: Any,
+    ) -> list[Goal] | list[dict[str, Any]]:
+        """
+        Goals of a list read: models, cached under the cache version taken
+        before the read, or with `as_responses` GoalResponse dicts made
+        straight from the items (GoalResponse.dump_item), which skips
+        building models and leaves the cache alone
+        """
+        if as_responses:
+            return [GoalResponse.dump_item(item) for item in items]
+        return self._cache_all([self._from_item(item) for item in items], version)
+
+    def get_all_by_user(
+        self,
+        user_id: str,
+        as_responses: bool = False,
+    ) -> list[Goal] | list[dict[str, Any]]:
+        version = self.cache.version(user_id)
+        return self._listed(self._goal_items(user_id), as_responses, version)
+
+    def get_page_by_user(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Goal] | list[dict[str, Any]], str | None]:
+        version = self.cache.version(user_id)
+        items, next_cursor = self._goal_items_page(user_id, limit, cursor)
+        return self._listed(items, as_responses, version), next_cursor
+
+    def get_projected_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        fields: list[str],
+    ) -> dict[str, Any] | None:
+        """Fetch only the given GoalResponse fields of one goal"""
+        item = self.db.get_item(
+            f"USER#{user_id}",
+            f"GOAL#{goal_id}",
+            projection=GoalResponse.item_attributes(fields)
+            + [tombstone.TOMBSTONE_ATTRIBUTE],
+        )
+        if not item or tombstone.is_tombstoned(item):
+            return None
+        return GoalResponse.project(item, fields)
+
+    def get_projected_by_user(
+        self,
+        user_id: str,
+        fields: list[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch only the given GoalResponse fields of a user's goals.
+
+        Without `limit` every goal is returned; with it, one page.
+        """
+        projection = GoalResponse.item_attributes(fields) + [
+            tombstone.TOMBSTONE_ATTRIBUTE
+        ]
+        if limit is None:
+            items, next_cursor = self._goal_items(user_id, projection), None
+        else:
+            items, next_cursor = self._goal_items_page(
+                user_id, limit, cursor, projection
+            )
+        return [GoalResponse.project(item, fields) for item in items], next_cursor
 
     def update(
         self,
@@ -72,10 +262,6 @@ class GoalRepository:
         goal_id: str,
         request: UpdateGoalRequest,
     ) -> Goal | None:
-        existing = self.get_by_id(user_id, goal_id)
-        if not existing:
-            return None
-
         updates: dict[str, Any] = {"updated_at": datetime.utcnow().isoformat()}
 
         if request.title is not None:
@@ -89,16 +275,150 @@ class GoalRepository:
         if request.status is not None:
             updates["status"] = request.status.value
 
-        updated_item = self.db.update_item(
-            f"USER#{user_id}",
-            f"GOAL#{goal_id}",
-            updates,
-        )
-        return self._from_item(updated_item)
+        # Dropped rather than replaced by the new image, as a milestone write
+        # committed right after this one may invalidate the cache before the
+        # image would be put
+        self.cache.invalidate(user_id, goal_id)
+        try:
+            item = self.db.update_item(
+                f"USER#{user_id}",
+                f"GOAL#{goal_id}",
+                updates,
+                must_exist=True,
+                expected={tombstone.TOMBSTONE_ATTRIBUTE: None},
+            )
+        except ItemNotFoundError:
+            return None
+        self.activity.record(user_id)
+        return self._from_item(item)
 
     def delete(self, user_id: str, goal_id: str) -> bool:
-        existing = self.get_by_id(user_id, goal_id)
-        if not existing:
+        self.cache.invalidate(user_id, goal_id)
+        try:
+            self.db.delete_item(f"USER#{user_id}", f"GOAL#{goal_id}", must_exist=True)
+        except ItemNotFoundError:
+            return False
+        self.activity.record(user_id)
+        return True
+
+    def tombstone(self, user_id: str, goal_id: str) -> bool:
+        """
+        Soft-delete a goal: mark it deleted and set its TTL, leaving its
+        milestones to MilestoneRepository.expire_all_by_goal. Returns False
+        when there is no such goal, or it was already deleted.
+        """
+        self.cache.invalidate(user_id, goal_id)
+        try:
+            self.db.update_item(
+                f"USER#{user_id}",
+                f"GOAL#{goal_id}",
+                tombstone.tombstone_attributes(
+                    get_settings().goal_tombstone_ttl_seconds
+                ),
+                must_exist=True,
+                expected={tombstone.TOMBSTONE_ATTRIBUTE: None},
+            )
+        except ItemNotFoundError:
             return False
-        self.db.delete_item(f"USER#{user_id}", f"GOAL#{goal_id}")
+        self.activity.record(user_id)
         return True
+
+
+class AsyncGoalRepository:
+    """
+    Awaitable GoalRepository.
+
+    Each method runs the synchronous implementation as one unit on a
+    DynamoDB worker thread, so multi-call operations cost a single hop.
+    Cached goals are returned without leaving the event loop.
+    """
+
+    def __init__(self, db: AsyncDynamoDBClient, cache: GoalCache | None = None):
+        self.db = db
+        self.cache = cache if cache is not None else get_goal_cache()
+
+    def _sync(self, db: StorageEngine) -> GoalRepository:
+        return GoalRepository(db, self.cache)
+
+    async def create(self, user_id: str, request: CreateGoalRequest) -> Goal:
+        return await self.db.run(lambda db: self._sync(db).create(user_id, request))
+
+    async def create_many(
+        self,
+        user_id: str,
+        requests: list[CreateGoalRequest],
+    ) -> list[Goal]:
+        return await self.db.run(
+            lambda db: self._sync(db).create_many(user_id, requests)
+        )
+
+    async def get_by_id(self, user_id: str, goal_id: str) -> Goal | None:
+        goal = self.cache.get(user_id, goal_id)
+        if goal is not None:
+            return goal
+        return await self.db.run(
+            lambda db: self._sync(db)._load_by_id(user_id, goal_id)
+        )
+
+    async def get_all_by_user(
+        self,
+        user_id: str,
+        as_responses: bool = False,
+    ) -> list[Goal] | list[dict[str, Any]]:
+        return await self.db.run(
+            lambda db: self._sync(db).get_all_by_user(user_id, as_responses)
+        )
+
+    async def get_page_by_user(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Goal] | list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: self._sync(db).get_page_by_user(
+                user_id, limit, cursor, as_responses
+            )
+        )
+
+    async def get_projected_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        fields: list[str],
+    ) -> dict[str, Any] | None:
+        return await self.db.run(
+            lambda db: self._sync(db).get_projected_by_id(user_id, goal_id, fields)
+        )
+
+    async def get_projected_by_user(
+        self,
+        user_id: str,
+        fields: list[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: self._sync(db).get_projected_by_user(
+                user_id, fields, limit, cursor
+            )
+        )
+
+    async def update(
+        self,
+        user_id: str,
+        goal_id: str,
+        request: UpdateGoalRequest,
+    ) -> Goal | None:
+        return await self.db.run(
+            lambda db: self._sync(db).update(user_id, goal_id, request)
+        )
+
+    async def delete(self, user_id: str, goal_id: str) -> bool:
+        return await self.db.run(lambda db: self._sync(db).delete(user_id, goal_id))
+
+    async def tombstone(self, user_id: str, goal_id: str) -> bool:
+        return await self.db.run(
+            lambda db: self._sync(db).tombstone(user_id, goal_id)
+        )
@@ -0,0 +1,76 @@
+"""
+Milestone key layouts.
+
+Repositories address items by their keys in the user layout, where a goal
+and its milestones share the owner's partition:
+
+    goal       PK = USER#{userId}  SK = GOAL#{goalId}
+    milestone  PK = USER#{userId}  SK = GOALM#{goalId}#MILESTONE#{milestoneId}
+
+A milestone can only be reached through its owner's partition, so the key
+itself proves ownership. Milestone sort keys do not start with GOAL#, so
+listing a user's goals (SK begins_with GOAL#) reads no milestones, and a
+goal's milestones are one Query (SK begins_with GOALM#{goalId}#MILESTONE#).
+
+Tables written before it use the goal layout, with a partition per goal:
+
+    milestone  PK = GOAL#{goalId}  SK = MILESTONE#{milestoneId}
+
+Goals and all other items have the same key in both layouts. The helpers
+below translate user-layout keys and queries to the goal layout, for
+DynamoDBClient while a table is on, or migrating away from, that layout.
+"""
+
+GOAL_LAYOUT = "goal"
+USER_LAYOUT = "user"
+
+# DYNAMODB_KEY_LAYOUT migration phases. The first layout is the one read
+# from; writes go to every listed layout.
+PHASES: dict[str, tuple[str, ...]] = {
+    "goal": (GOAL_LAYOUT,),
+    "goal+user": (GOAL_LAYOUT, USER_LAYOUT),
+    "user+goal": (USER_LAYOUT, GOAL_LAYOUT),
+    "user": (USER_LAYOUT,),
+}
+
+# SK prefix of every goal; milestones use _MILESTONES_PREFIX, outside it
+GOALS_PREFIX = "GOAL#"
+
+_MILESTONES_PREFIX = "GOALM#"
+_MILESTONE_SEPARATOR = "#MILESTONE#"
+
+
+def goal_key(user_id: str, goal_id: str) -> tuple[str, str]:
+    return f"USER#{user_id}", f"{GOALS_PREFIX}{goal_id}"
+
+
+def milestone_key(user_id: str, goal_id: str, milestone_id: str) -> tuple[str, str]:
+    return f"USER#{user_id}", f"{milestones_prefix(goal_id)}{milestone_id}"
+
+
+def milestones_prefix(goal_id: str) -> str:
+    """SK prefix of a goal's milestones in the owner's partition"""
+    return f"{_MILESTONES_PREFIX}{goal_id}{_MILESTONE_SEPARATOR}"
+
+
+def layout_of(pk: str) -> str:
+    """Layout a stored milestone item belongs to, from its partition key"""
+    return GOAL_LAYOUT if pk.startswith("GOAL#") else USER_LAYOUT
+
+
+def to_goal_layout(pk: str, sk: str) -> tuple[str, str]:
+    """Goal-layout key for a user-layout key"""
+    if not sk.startswith(_MILESTONES_PREFIX):
+        return pk, sk
+    goal_id, _, milestone_id = sk.removeprefix(_MILESTONES_PREFIX).partition(
+        _MILESTONE_SEPARATOR
+    )
+    return f"{GOALS_PREFIX}{goal_id}", f"MILESTONE#{milestone_id}"
+
+
+def from_goal_layout(pk: str, sk: str, user_pk: str) -> tuple[str, str]:
+    """User-layout key for a goal-layout key found in the partition of user_pk"""
+    if layout_of(pk) != GOAL_LAYOUT:
+        return pk, sk
+    goal_id = pk.removeprefix(GOALS_PREFIX)
+    return user_pk, f"{_MILESTONES_PREFIX}{goal_id}#{sk}"
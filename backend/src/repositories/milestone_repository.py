@@ -1,25 +1,103 @@
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Any
 
+from src.core.config import get_settings
 from src.models import (
     Milestone,
+    MilestoneResponse,
     MilestoneStatus,
     CreateMilestoneRequest,
     UpdateMilestoneRequest,
 )
 
-from .dynamodb import DynamoDBClient
+from . import codec, key_layout, ranking, tombstone
+from .activity_repository import ActivityRepository
+from .async_dynamodb import AsyncDynamoDBClient
+from .dynamodb import (
+    INDEX_KEYS,
+    TRANSACTION_MAX_ACTIONS,
+    USER_MILESTONES_INDEX,
+    ItemNotFoundError,
+    TransactionConflictError,
+)
+from .goal_cache import GoalCache, get_goal_cache
+from .goal_repository import GoalRepository
+from .storage import StorageEngine
+
+# Milestones rewritten per batch_write call when expiring a deleted goal's
+EXPIRE_BATCH_SIZE = 100
+
+# Milestones appended per transaction, next to the goal's update
+APPEND_BATCH_SIZE = TRANSACTION_MAX_ACTIONS - 1
+
+# Reads of a goal's order counter before a contended append gives up
+ORDER_CLAIM_ATTEMPTS = 5
 
 
 class MilestoneRepository:
-    def __init__(self, db: DynamoDBClient):
+    """
+    Milestones are ordered either by dense integer `order` values
+    ("integer" mode, where moves renumber neighbours) or by lexicographic
+    rank strings ("rank" mode, where a move rewrites only the moved item).
+    In rank mode `order` is reported as the milestone's position in the
+    goal whenever the full list is known.
+
+    Writes that change a milestone's existence, status or due date also
+    update the goal item's rollups (`milestone_counts` per status and the
+    due dates of open milestones) in the same transaction.
+
+    Every milestone also carries the keys of the sparse user-milestones-index
+    (GSI1PK/GSI1SK): a user's open and completed milestones are two index
+    partitions, each sorted by due date, so overdue, upcoming and
+    status-board lists span all of the user's goals in one Query.
+
+    Milestones are keyed in their owner's partition, next to their goal
+    (see key_layout), so every lookup takes the user id. Deleting a goal
+    softly only tombstones the goal, and its milestones are expired later,
+    out of band (see tombstone): the routes check the goal before reading
+    its milestones, and the index lists drop milestones whose goal is gone.
+    """
+
+    def __init__(
+        self,
+        db: StorageEngine,
+        ordering: str | None = None,
+        cache: GoalCache | None = None,
+    ):
         self.db = db
+        self.ordering = ordering or get_settings().milestone_ordering
+        self.cache = cache if cache is not None else get_goal_cache()
+        self.activity = ActivityRepository(db)
+
+    @property
+    def _ranked(self) -> bool:
+        return self.ordering == "rank"
 
-    def _to_item(self, milestone: Milestone) -> dict[str, Any]:
+    @property
+    def colocated(self) -> bool:
+        """Whether milestones are keyed under their owner; see key_layout"""
+        return self.db.colocated
+
+    @staticmethod
+    def _index_keys(
+        user_id: str,
+        milestone_id: str,
+        status: str,
+        due_date: str,
+    ) -> dict[str, str]:
+        """user-milestones-index keys for a milestone's status and due date"""
+        bucket = "DONE" if status == MilestoneStatus.COMPLETED.value else "OPEN"
         return {
-            "PK": f"GOAL#{milestone.goal_id}",
-            "SK": f"MILESTONE#{milestone.id}",
+            "GSI1PK": f"USER#{user_id}#{bucket}",
+            "GSI1SK": f"{due_date}#{milestone_id}",
+        }
+
+    def _to_item(self, milestone: Milestone, user_id: str) -> dict[str, Any]:
+        pk, sk = key_layout.milestone_key(user_id, milestone.goal_id, milestone.id)
+        item = {
+            "PK": pk,
+            "SK": sk,
             "type": "milestone",
             "id": milestone.id,
             "goal_id": milestone.goal_id,
@@ -30,9 +108,20 @@ class MilestoneRepository:
             "order": milestone.order,
             "created_at": milestone.created_at.isoformat(),
             "updated_at": milestone.updated_at.isoformat(),
+            **self._index_keys(
+                user_id,
+                milestone.id,
+                milestone.status.value,
+                milestone.due_date.isoformat(),
+            ),
         }
+        if milestone.rank is not None:
+            item["rank"] = milestone.rank
+        return item
 
     def _from_item(self, item: dict[str, Any]) -> Milestone:
+        if self.db.fast_path:
+            return codec.milestone_from_item(item)
         return Milestone(
             id=item["id"],
             goal_id=item["goal_id"],
@@ -41,50 +130,572 @@ class MilestoneRepository:
             due_date=date.fromisoformat(item["due_date"]),
             status=MilestoneStatus(item["status"]),
             order=int(item.get("order", 0)),
+            rank=item.get("rank"),
             created_at=datetime.fromisoformat(item["created_at"]),
             updated_at=datetime.fromisoformat(item["updated_at"]),
         )
 
-    def create(self, goal_id: str, request: CreateMilestoneRequest) -> Milestone:
-        existing = self.get_all_by_goal(goal_id)
-        max_order = max((m.order for m in existing), default=0)
+    def _query_items(
+        self,
+        user_id: str,
+        goal_id: str,
+        projection: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        if projection is not None:
+            projection = projection + [tombstone.TOMBSTONE_ATTRIBUTE]
+        items = self.db.query(
+            f"USER#{user_id}",
+            sk_prefix=key_layout.milestones_prefix(goal_id),
+            projection=projection,
+        )
+        return tombstone.live(items)
+
+    def _sort_items(
+        self,
+        items: list[dict[str, Any]],
+        positions: bool = True,
+    ) -> list[dict[str, Any]]:
+        """
+        Sort raw milestone items for display.
+
+        In rank mode, items stored before ranks existed get the rank of their
+        integer position, and with `positions` (only meaningful when items is
+        the goal's complete list) `order` is replaced by the position.
+        """
+        if not self._ranked:
+            return sorted(items, key=lambda item: int(item.get("order", 0)))
+
+        for item in items:
+            if not item.get("rank"):
+                item["rank"] = ranking.rank_from_position(int(item.get("order", 0)))
+        ordered = sorted(items, key=lambda item: (item["rank"], item["id"]))
+        if positions:
+            for position, item in enumerate(ordered, start=1):
+                item["order"] = position
+        return ordered
+
+    @staticmethod
+    def _max_order(items: list[dict[str, Any]]) -> int:
+        return max((int(item.get("order", 0)) for item in items), default=0)
+
+    @staticmethod
+    def _end_rank_bound(max_order: int, before: str | None) -> str | None:
+        """
+        Upper bound for ranks given to milestones moved to the end.
+
+        New milestones get the rank of their order-counter value, which is
+        above every stored order, so ranks kept below the rank of
+        `max_order + 1` (the largest stored order plus one) still sort
+        before any milestone created later. Ranks written before the
+        counter existed may already be above it; then there is no bound.
+        """
+        bound = ranking.rank_from_position(max_order + 1)
+        return bound if before is None or before < bound else None
+
+    def _rollup_action(
+        self,
+        user_id: str,
+        goal_id: str,
+        updates: dict[str, Any] | None = None,
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Update action for the goal item's rollups; the goal must exist"""
+        return self.db.update_action(
+            f"USER#{user_id}",
+            f"GOAL#{goal_id}",
+            updates or {},
+            add=add,
+            remove=remove,
+            must_exist=True,
+        )
+
+    def _commit(
+        self,
+        user_id: str,
+        goal_id: str,
+        actions: list[dict[str, Any]],
+    ) -> None:
+        self.db.transact_write(actions)
+        # The cached goal carries rollups that this write just changed
+        self.cache.invalidate(user_id, goal_id)
+
+    def rebuild_rollups(self, user_id: str, goal_id: str) -> None:
+        """
+        Compute a goal's rollups and order counter from its milestones and
+        store them.
 
+        Used for goals stored before they existed. Only writes when the goal
+        still has no order counter, so concurrent rebuilds cannot overwrite
+        increments made after the first one. In rank mode the goal is then
+        rebalanced, which brings every rank under the counter's. Milestones
+        read without index keys get them too, as they are at hand; indexing
+        the rest of a table is the milestone-index-keys backfill
+        (scripts/backfill.py).
+        """
+        items = self._query_items(
+            user_id,
+            goal_id,
+            projection=["id", "status", "due_date", "order", "GSI1PK"],
+        )
+        counts = {status.value: 0 for status in MilestoneStatus}
+        open_due_dates = {}
+        for item in items:
+            counts[item["status"]] += 1
+            if item["status"] != MilestoneStatus.COMPLETED.value:
+                open_due_dates[item["id"]] = item["due_date"]
+
+        action = self.db.update_action(
+            f"USER#{user_id}",
+            f"GOAL#{goal_id}",
+            {
+                "milestone_counts": counts,
+                "open_milestone_due_dates": open_due_dates,
+                "next_milestone_order": max(self._max_order(items), len(items)),
+            },
+            expected={"next_milestone_order": None},
+            must_exist=True,
+        )
+        try:
+            self._commit(user_id, goal_id, [action])
+        except TransactionConflictError as e:
+            if e.contended:
+                raise
+            # Another rebuild got there first
+            return
+        self.activity.touch(user_id)
+        self._index_items(user_id, goal_id, items)
+        if self._ranked:
+            self.rebalance(user_id, goal_id)
+
+    def _index_items(
+        self,
+        user_id: str,
+        goal_id: str,
+        items: list[dict[str, Any]],
+    ) -> None:
+        """
+        Add index keys to milestones stored without them.
+
+        Each milestone write is guarded by the status and due date its keys
+        were computed from; a milestone that changed since, or is being
+        changed, gets keys from that change. The version stamp is advanced
+        once afterwards.
+        """
+        indexed = 0
+        for item in items:
+            if "GSI1PK" in item:
+                continue
+            action = self.db.update_action(
+                *key_layout.milestone_key(user_id, goal_id, item["id"]),
+                self._index_keys(user_id, item["id"], item["status"], item["due_date"]),
+                expected={"status": item["status"], "due_date": item["due_date"]},
+            )
+            try:
+                self.db.transact_write([action])
+            except TransactionConflictError:
+                continue
+            indexed += 1
+        if indexed:
+            self.activity.touch(user_id)
+
+    def _new_milestone(
+        self,
+        goal_id: str,
+        request: CreateMilestoneRequest,
+        order: int,
+    ) -> Milestone:
         now = datetime.utcnow()
-        milestone = Milestone(
+        return Milestone(
             id=str(uuid.uuid4()),
             goal_id=goal_id,
             title=request.title,
             description=request.description,
             due_date=request.due_date,
             status=MilestoneStatus.PENDING,
-            order=max_order + 1,
+            order=order,
+            rank=ranking.rank_from_position(order) if self._ranked else None,
             created_at=now,
             updated_at=now,
         )
-        self.db.put_item(self._to_item(milestone))
-        return milestone
 
-    def get_by_id(self, goal_id: str, milestone_id: str) -> Milestone | None:
-        item = self.db.get_item(f"GOAL#{goal_id}", f"MILESTONE#{milestone_id}")
-        if not item:
+    def create(
+        self,
+        user_id: str,
+        goal_id: str,
+        request: CreateMilestoneRequest,
+    ) -> Milestone | None:
+        """
+        Append a milestone to a goal. Returns None when the goal does not
+        exist.
+        """
+        milestones = self._append(user_id, goal_id, [request])
+        return None if milestones is None else milestones[0]
+
+    def create_many(
+        self,
+        user_id: str,
+        goal_id: str,
+        requests: list[CreateMilestoneRequest],
+    ) -> list[Milestone] | None:
+        """
+        Append several milestones to a goal (bulk import).
+
+        Each run of up to APPEND_BATCH_SIZE milestones is one transaction
+        (see _append). Returns None when the goal does not exist.
+        """
+        milestones: list[Milestone] = []
+        for start in range(0, len(requests), APPEND_BATCH_SIZE):
+            appended = self._append(
+                user_id, goal_id, requests[start : start + APPEND_BATCH_SIZE]
+            )
+            if appended is None:
+                return None
+            milestones += appended
+        return milestones
+
+    def _append(
+        self,
+        user_id: str,
+        goal_id: str,
+        requests: list[CreateMilestoneRequest],
+    ) -> list[Milestone] | None:
+        """
+        Store milestones after the last one of a goal, in one transaction.
+
+        Their orders are claimed from the goal's next_milestone_order counter
+        by an ADD in the same transaction as the milestones and their
+        rollups, so nothing reads the goal's milestones and a failed write
+        leaves no gap in the order. The ADD is guarded by the counter value
+        read beforehand: a concurrent claim cancels the transaction, which
+        is retried with the new value up to ORDER_CLAIM_ATTEMPTS times
+        before TransactionConflictError is raised. The activity is recorded
+        once the milestones are stored. Returns None when the goal does not
+        exist or was deleted.
+        """
+        goal_key = (f"USER#{user_id}", f"GOAL#{goal_id}")
+        for _ in range(ORDER_CLAIM_ATTEMPTS):
+            goal = self.db.get_item(
+                *goal_key,
+                projection=[
+                    "id",
+                    "next_milestone_order",
+                    tombstone.TOMBSTONE_ATTRIBUTE,
+                ],
+            )
+            if not goal or tombstone.is_tombstoned(goal):
+                return None
+            claimed = goal.get("next_milestone_order")
+            claimed = None if claimed is None else int(claimed)
+            milestones = [
+                self._new_milestone(goal_id, request, order)
+                for order, request in enumerate(requests, start=(claimed or 0) + 1)
+            ]
+            rollup = self.db.update_action(
+                *goal_key,
+                {
+                    f"open_milestone_due_dates.{m.id}": m.due_date.isoformat()
+                    for m in milestones
+                },
+                expected={
+                    "next_milestone_order": claimed,
+                    tombstone.TOMBSTONE_ATTRIBUTE: None,
+                },
+                add={
+                    "next_milestone_order": len(milestones),
+                    f"milestone_counts.{MilestoneStatus.PENDING.value}": len(
+                        milestones
+                    ),
+                },
+                must_exist=True,
+            )
+            try:
+                self._commit(
+                    user_id,
+                    goal_id,
+                    [self.db.put_action(self._to_item(m, user_id)) for m in milestones]
+                    + [rollup],
+                )
+            except TransactionConflictError:
+                continue
+            self.activity.record(user_id, len(milestones))
+            return milestones
+        raise TransactionConflictError(f"{goal_id}: next_milestone_order contended")
+
+    def get_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+    ) -> Milestone | None:
+        item = self.db.get_item(
+            *key_layout.milestone_key(user_id, goal_id, milestone_id)
+        )
+        if not item or tombstone.is_tombstoned(item):
             return None
         return self._from_item(item)
 
-    def get_all_by_goal(self, goal_id: str) -> list[Milestone]:
-        items = self.db.query(f"GOAL#{goal_id}", sk_prefix="MILESTONE#")
-        milestones = [self._from_item(item) for item in items]
-        return sorted(milestones, key=lambda m: m.order)
+    def _listed(
+        self,
+        items: list[dict[str, Any]],
+        as_responses: bool,
+    ) -> list[Milestone] | list[dict[str, Any]]:
+        """
+        Milestones of a list read: models, or with `as_responses`
+        MilestoneResponse dicts made straight from the items
+        (MilestoneResponse.dump_item)
+        """
+        if as_responses:
+            return [MilestoneResponse.dump_item(item) for item in items]
+        return [self._from_item(item) for item in items]
+
+    def get_all_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        as_responses: bool = False,
+    ) -> list[Milestone] | list[dict[str, Any]]:
+        items = self._sort_items(self._query_items(user_id, goal_id))
+        return self._listed(items, as_responses)
+
+    def get_goal_with_milestones(
+        self,
+        user_id: str,
+        goal_id: str,
+        as_responses: bool = False,
+    ) -> tuple[dict[str, Any] | None, list[Milestone] | list[dict[str, Any]]]:
+        """
+        A goal's item and its sorted milestones, read together on one worker
+        hop. The goal item is None (and there are no milestones) when the
+        user has no such goal, or it was deleted.
+        """
+        goal_item = self.db.get_item(f"USER#{user_id}", f"GOAL#{goal_id}")
+        if goal_item is None or tombstone.is_tombstoned(goal_item):
+            return None, []
+        items = self._sort_items(self._query_items(user_id, goal_id))
+        return goal_item, self._listed(items, as_responses)
+
+    def get_page_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        """
+        Fetch one page of milestones.
+
+        Pages follow key order, so milestones are only sorted within a page;
+        clients paging through a goal sort the assembled list themselves, by
+        `rank` in rank mode and by `order` otherwise.
+        """
+        items, next_cursor = self.db.query_page(
+            f"USER#{user_id}",
+            sk_prefix=key_layout.milestones_prefix(goal_id),
+            limit=limit,
+            cursor=cursor,
+        )
+        items = self._sort_items(tombstone.live(items), positions=False)
+        return self._listed(items, as_responses), next_cursor
+
+    def get_projected_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        fields: list[str],
+    ) -> dict[str, Any] | None:
+        """Fetch only the given MilestoneResponse fields of one milestone"""
+        item = self.db.get_item(
+            *key_layout.milestone_key(user_id, goal_id, milestone_id),
+            projection=MilestoneResponse.item_attributes(fields)
+            + [tombstone.TOMBSTONE_ATTRIBUTE],
+        )
+        if not item or tombstone.is_tombstoned(item):
+            return None
+        return MilestoneResponse.project(item, fields)
+
+    def get_projected_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        fields: list[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch only the given MilestoneResponse fields of a goal's milestones.
+
+        Without `limit` every milestone is returned; with it, one page.
+        The attributes needed for sorting are always fetched.
+        """
+        projection = MilestoneResponse.item_attributes(fields) + ["order", "rank"]
+        if limit is None:
+            items, next_cursor = self._query_items(user_id, goal_id, projection), None
+        else:
+            items, next_cursor = self.db.query_page(
+                f"USER#{user_id}",
+                sk_prefix=key_layout.milestones_prefix(goal_id),
+                limit=limit,
+                cursor=cursor,
+                projection=projection + [tombstone.TOMBSTONE_ATTRIBUTE],
+            )
+            items = tombstone.live(items)
+
+        items = self._sort_items(items, positions=limit is None)
+        return [MilestoneResponse.project(item, fields) for item in items], next_cursor
+
+    def _of_live_goals(
+        self,
+        user_id: str,
+        items: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """
+        The milestones whose goal still exists. Deleting a goal softly
+        writes only its tombstone, so its milestones stay in the index until
+        they are expired out of band; each goal is looked up once, through
+        the goal cache. Only needed with GOAL_DELETE_MODE=soft, as a hard
+        delete removes the milestones along with the goal.
+        """
+        goals = GoalRepository(self.db, self.cache)
+        live_goals = {
+            goal_id
+            for goal_id in {item["goal_id"] for item in items}
+            if goals.get_by_id(user_id, goal_id) is not None
+        }
+        return [item for item in items if item["goal_id"] in live_goals]
+
+    def _index_page(
+        self,
+        user_id: str,
+        partition: str,
+        due_from: date,
+        due_before: date,
+        limit: int,
+        cursor: str | None,
+        filters: dict[str, str] | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        """
+        One page of the user's OPEN or DONE index partition, for due dates in
+        [due_from, due_before).
+
+        Sort keys start with the due date, and a bare date sorts before every
+        key that starts with it, so the inclusive BETWEEN of two bare dates
+        excludes the upper one. Milestones of deleted goals are dropped, so
+        a page may come back short.
+        """
+        items, next_cursor = self.db.query_index_page(
+            USER_MILESTONES_INDEX,
+            f"USER#{user_id}#{partition}",
+            sk_between=(due_from.isoformat(), due_before.isoformat()),
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+        )
+        if get_settings().goal_delete_mode == "soft":
+            items = self._of_live_goals(user_id, items)
+        return self._listed(items, as_responses), next_cursor
+
+    def get_overdue_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        today: date | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        """
+        Open milestones due before today across all of a user's goals,
+        earliest first
+        """
+        today = today or date.today()
+        return self._index_page(
+            user_id,
+            "OPEN",
+            date.min,
+            today,
+            limit,
+            cursor,
+            as_responses=as_responses,
+        )
+
+    def get_upcoming_page(
+        self,
+        user_id: str,
+        days: int,
+        limit: int,
+        cursor: str | None = None,
+        today: date | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        """
+        Open milestones due from today through `days` days from now across
+        all of a user's goals, earliest first
+        """
+        today = today or date.today()
+        return self._index_page(
+            user_id,
+            "OPEN",
+            today,
+            today + timedelta(days=days + 1),
+            limit,
+            cursor,
+            as_responses=as_responses,
+        )
+
+    def get_page_by_status(
+        self,
+        user_id: str,
+        milestone_status: MilestoneStatus,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        """
+        Milestones with the given status across all of a user's goals, by
+        due date.
+
+        Completed milestones are a partition of their own. Pending and
+        in-progress ones share the open partition and are filtered, so their
+        pages may come back short.
+        """
+        if milestone_status == MilestoneStatus.COMPLETED:
+            return self._index_page(
+                user_id,
+                "DONE",
+                date.min,
+                date.max,
+                limit,
+                cursor,
+                as_responses=as_responses,
+            )
+        return self._index_page(
+            user_id,
+            "OPEN",
+            date.min,
+            date.max,
+            limit,
+            cursor,
+            filters={"status": milestone_status.value},
+            as_responses=as_responses,
+        )
 
     def update(
         self,
+        user_id: str,
         goal_id: str,
         milestone_id: str,
         request: UpdateMilestoneRequest,
     ) -> Milestone | None:
-        existing = self.get_by_id(goal_id, milestone_id)
-        if not existing:
-            return None
+        """
+        Update a milestone. Returns None when it does not exist.
 
+        Status and due date changes are committed together with the goal's
+        rollups, guarded by the values they were computed from; a concurrent
+        change raises TransactionConflictError.
+        """
         updates: dict[str, Any] = {"updated_at": datetime.utcnow().isoformat()}
 
         if request.title is not None:
@@ -95,45 +706,548 @@ class MilestoneRepository:
             updates["due_date"] = request.due_date.isoformat()
         if request.status is not None:
             updates["status"] = request.status.value
+        position = None
         if request.order is not None:
-            updates["order"] = request.order
+            if self._ranked:
+                position = self._move_updates(
+                    user_id, goal_id, milestone_id, request.order, updates
+                )
+            else:
+                updates["order"] = request.order
 
-        updated_item = self.db.update_item(
-            f"GOAL#{goal_id}",
-            f"MILESTONE#{milestone_id}",
-            updates,
+        if request.status is not None or request.due_date is not None:
+            milestone = self._update_with_rollups(
+                user_id, goal_id, milestone_id, updates
+            )
+        else:
+            milestone = self._update_item(user_id, goal_id, milestone_id, updates)
+        if milestone is None:
+            return None
+        if position is not None:
+            milestone.order = position
+        return milestone
+
+    def _update_item(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        updates: dict[str, Any],
+    ) -> Milestone | None:
+        """One conditional write, returning the new image; no rollup changes"""
+        try:
+            item = self.db.update_item(
+                *key_layout.milestone_key(user_id, goal_id, milestone_id),
+                updates,
+                must_exist=True,
+                expected={tombstone.TOMBSTONE_ATTRIBUTE: None},
+            )
+        except ItemNotFoundError:
+            return None
+        self.activity.record(user_id)
+        return self._from_item(item)
+
+    def _update_with_rollups(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        updates: dict[str, Any],
+    ) -> Milestone | None:
+        key = key_layout.milestone_key(user_id, goal_id, milestone_id)
+        current = self.db.get_item(*key)
+        if not current or tombstone.is_tombstoned(current):
+            return None
+
+        old_status, old_due = current["status"], current["due_date"]
+        new_status = updates.get("status", old_status)
+        new_due = updates.get("due_date", old_due)
+        completed = MilestoneStatus.COMPLETED.value
+        updates = {
+            **updates,
+            **self._index_keys(user_id, milestone_id, new_status, new_due),
+        }
+
+        add = {}
+        if new_status != old_status:
+            add[f"milestone_counts.{old_status}"] = -1
+            add[f"milestone_counts.{new_status}"] = 1
+        due_path = f"open_milestone_due_dates.{milestone_id}"
+        goal_updates = {}
+        remove = []
+        if new_status == completed:
+            if old_status != completed:
+                remove.append(due_path)
+        elif old_status == completed or new_due != old_due:
+            goal_updates[due_path] = new_due
+
+        actions = [
+            self.db.update_action(
+                *key,
+                updates,
+                expected={"status": old_status, "due_date": old_due},
+                must_exist=True,
+            ),
+        ]
+        if add or goal_updates or remove:
+            actions.append(
+                self._rollup_action(user_id, goal_id, goal_updates, add, remove)
+            )
+        self._commit(user_id, goal_id, actions)
+        self.activity.record(user_id)
+        return self._from_item({**current, **updates})
+
+    def _move_updates(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        position: int,
+        updates: dict[str, Any],
+    ) -> int:
+        """
+        Add the rank that puts a milestone at `position` (1-based) to updates.
+
+        Only the moved milestone is written; its neighbours keep their ranks.
+        Returns the position the milestone ends up at.
+        """
+        existing = self._query_items(
+            user_id, goal_id, projection=["id", "order", "rank"]
         )
-        return self._from_item(updated_item)
+        max_order = self._max_order(existing)
+        others = [
+            item for item in self._sort_items(existing) if item["id"] != milestone_id
+        ]
+
+        index = min(max(position - 1, 0), len(others))
+        before = others[index - 1]["rank"] if index > 0 else None
+        if index == len(others):
+            after = self._end_rank_bound(max_order, before)
+        else:
+            after = others[index]["rank"]
+        updates["rank"] = ranking.rank_between(before, after)
+        return index + 1
 
-    def delete(self, goal_id: str, milestone_id: str) -> bool:
-        existing = self.get_by_id(goal_id, milestone_id)
-        if not existing:
+    def delete(self, user_id: str, goal_id: str, milestone_id: str) -> bool:
+        """
+        Delete a milestone and take it out of the goal's rollups.
+
+        The milestone is deleted by one conditional DeleteItem, which returns
+        the status to take it out of the counts with, and the rollups are
+        updated after it. The two writes are not atomic: should the second
+        fail, its error is raised with the milestone gone and still counted
+        by the goal. Returns False when the milestone does not exist.
+        """
+        try:
+            deleted = self.db.delete_item(
+                *key_layout.milestone_key(user_id, goal_id, milestone_id),
+                must_exist=True,
+                expected={tombstone.TOMBSTONE_ATTRIBUTE: None},
+            )
+        except ItemNotFoundError:
             return False
-        self.db.delete_item(f"GOAL#{goal_id}", f"MILESTONE#{milestone_id}")
+
+        try:
+            self._commit(
+                user_id,
+                goal_id,
+                [
+                    self._rollup_action(
+                        user_id,
+                        goal_id,
+                        add={f"milestone_counts.{deleted['status']}": -1},
+                        remove=[f"open_milestone_due_dates.{milestone_id}"],
+                    )
+                ],
+            )
+        except TransactionConflictError as e:
+            if e.contended:
+                raise
+            # The goal was deleted meanwhile: there are no rollups left
+        self.activity.record(user_id)
         return True
 
-    def delete_all_by_goal(self, goal_id: str) -> int:
-        milestones = self.get_all_by_goal(goal_id)
-        keys = [(f"GOAL#{goal_id}", f"MILESTONE#{m.id}") for m in milestones]
+    def delete_all_by_goal(self, user_id: str, goal_id: str) -> int:
+        keys = [
+            (item["PK"], item["SK"])
+            for item in self.db.iter_query(
+                f"USER#{user_id}",
+                sk_prefix=key_layout.milestones_prefix(goal_id),
+                projection=["PK", "SK"],
+            )
+        ]
         if keys:
             self.db.batch_delete(keys)
+            self.activity.touch(user_id)
         return len(keys)
 
-    def reorder(self, goal_id: str, ordered_ids: list[str]) -> list[Milestone]:
-        now = datetime.utcnow().isoformat()
-        milestones = self.get_all_by_goal(goal_id)
+    def expire_all_by_goal(self, user_id: str, goal_id: str) -> int:
+        """
+        Soft-delete the milestones of a tombstoned goal: each is rewritten
+        with a tombstone that expires at once and without its index keys,
+        so it leaves the user-milestones-index right away and the table's
+        TTL removes it later. Safe to repeat; returns the number rewritten.
+        """
+        expired = 0
+        batch: list[dict[str, Any]] = []
+        for item in self.db.iter_query(
+            f"USER#{user_id}", sk_prefix=key_layout.milestones_prefix(goal_id)
+        ):
+            if tombstone.is_tombstoned(item):
+                continue
+            for key in INDEX_KEYS[USER_MILESTONES_INDEX]:
+                item.pop(key, None)
+            batch.append({**item, **tombstone.tombstone_attributes()})
+            if len(batch) == EXPIRE_BATCH_SIZE:
+                self.db.batch_write(batch)
+                expired += len(batch)
+                batch = []
+        if batch:
+            self.db.batch_write(batch)
+            expired += len(batch)
+        if expired:
+            self.activity.touch(user_id)
+        return expired
+
+    def reorder(
+        self,
+        user_id: str,
+        goal_id: str,
+        ordered_ids: list[str],
+    ) -> list[Milestone]:
+        """
+        Move milestones to the positions given by ordered_ids.
+
+        Only milestones whose order actually changes are written, in
+        TransactWriteItems calls guarded by their previous order, so a
+        concurrent reorder cancels the transaction instead of interleaving.
+        The returned list is built from the query results without re-reading.
+        Order does not feed any goal rollup, so the goal item is not written.
+        A reorder that writes anything counts as one activity, recorded
+        once its transactions have committed.
+        """
+        if self._ranked:
+            milestones, actions = self._reorder_ranked(user_id, goal_id, ordered_ids)
+        else:
+            milestones, actions = self._reorder_integer(user_id, goal_id, ordered_ids)
+        if actions:
+            self.db.transact_write(actions)
+            self.activity.record(user_id)
+        return milestones
+
+    def _reorder_integer(
+        self,
+        user_id: str,
+        goal_id: str,
+        ordered_ids: list[str],
+    ) -> tuple[list[Milestone], list[dict[str, Any]]]:
+        """Integer-mode reorder; also returns the update actions to commit"""
+        now = datetime.utcnow()
+        milestones = self.get_all_by_goal(user_id, goal_id)
         milestone_map = {m.id: m for m in milestones}
 
+        actions = []
         updated_milestones = []
         for order, milestone_id in enumerate(ordered_ids, start=1):
-            if milestone_id in milestone_map:
-                self.db.update_item(
-                    f"GOAL#{goal_id}",
-                    f"MILESTONE#{milestone_id}",
-                    {"order": order, "updated_at": now},
+            milestone = milestone_map.pop(milestone_id, None)
+            if milestone is None:
+                continue
+
+            if milestone.order != order:
+                actions.append(
+                    self.db.update_action(
+                        *key_layout.milestone_key(user_id, goal_id, milestone_id),
+                        {"order": order, "updated_at": now.isoformat()},
+                        expected={"order": milestone.order},
+                    )
                 )
-                milestone = milestone_map[milestone_id]
                 milestone.order = order
-                updated_milestones.append(milestone)
+                milestone.updated_at = now
+            updated_milestones.append(milestone)
+
+        return sorted(updated_milestones, key=lambda m: m.order), actions
 
-        return sorted(updated_milestones, key=lambda m: m.order)
+    def _reorder_ranked(
+        self,
+        user_id: str,
+        goal_id: str,
+        ordered_ids: list[str],
+    ) -> tuple[list[Milestone], list[dict[str, Any]]]:
+        """
+        Rank-mode reorder; also returns the update actions to commit.
+
+        Listed milestones come first in the given order, followed by the
+        rest in their current order. Milestones on the longest run that is
+        already correctly ordered keep their ranks; only the others get new
+        ranks, so moving one milestone costs one write.
+        """
+        now = datetime.utcnow()
+        items = self._query_items(user_id, goal_id)
+        max_order = self._max_order(items)
+        current = [self._from_item(item) for item in self._sort_items(items)]
+        milestone_map = {m.id: m for m in current}
+
+        listed = []
+        for milestone_id in ordered_ids:
+            milestone = milestone_map.pop(milestone_id, None)
+            if milestone is not None:
+                listed.append(milestone)
+        final = listed + [m for m in current if m.id in milestone_map]
+
+        unmoved = ranking.increasing_run([m.rank for m in final])
+        actions = []
+        index = 0
+        while index < len(final):
+            if index in unmoved:
+                index += 1
+                continue
+
+            run_end = index
+            while run_end < len(final) and run_end not in unmoved:
+                run_end += 1
+            before = final[index - 1].rank if index > 0 else None
+            if run_end < len(final):
+                after = final[run_end].rank
+            else:
+                after = self._end_rank_bound(max_order, before)
+            new_ranks = ranking.ranks_between(before, after, run_end - index)
+
+            for milestone, rank in zip(final[index:run_end], new_ranks):
+                actions.append(
+                    self.db.update_action(
+                        *key_layout.milestone_key(user_id, goal_id, milestone.id),
+                        {"rank": rank, "updated_at": now.isoformat()},
+                    )
+                )
+                milestone.rank = rank
+                milestone.updated_at = now
+            index = run_end
+
+        for position, milestone in enumerate(final, start=1):
+            milestone.order = position
+        return listed, actions
+
+    def rebalance(self, user_id: str, goal_id: str) -> int:
+        """
+        Rewrite a goal's ranks to the compact form of their positions.
+
+        Runs in the background once ranks grow past
+        ranking.REBALANCE_RANK_LENGTH. Returns the number of milestones
+        rewritten.
+        """
+        actions = []
+        for milestone in self.get_all_by_goal(user_id, goal_id):
+            rank = ranking.rank_from_position(milestone.order)
+            if milestone.rank != rank:
+                actions.append(
+                    self.db.update_action(
+                        *key_layout.milestone_key(user_id, goal_id, milestone.id),
+                        {"rank": rank, "order": milestone.order},
+                    )
+                )
+
+        if actions:
+            self.db.transact_write(actions)
+            self.activity.touch(user_id)
+        return len(actions)
+
+
+class AsyncMilestoneRepository:
+    """
+    Awaitable MilestoneRepository.
+
+    Each method runs the synchronous implementation as one unit on a
+    DynamoDB worker thread, so multi-call operations cost a single hop.
+    """
+
+    def __init__(self, db: AsyncDynamoDBClient):
+        self.db = db
+
+    @property
+    def colocated(self) -> bool:
+        """Whether milestones are keyed under their owner; see key_layout"""
+        return self.db.colocated
+
+    async def create(
+        self,
+        user_id: str,
+        goal_id: str,
+        request: CreateMilestoneRequest,
+    ) -> Milestone | None:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).create(user_id, goal_id, request)
+        )
+
+    async def create_many(
+        self,
+        user_id: str,
+        goal_id: str,
+        requests: list[CreateMilestoneRequest],
+    ) -> list[Milestone] | None:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).create_many(user_id, goal_id, requests)
+        )
+
+    async def get_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+    ) -> Milestone | None:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_by_id(user_id, goal_id, milestone_id)
+        )
+
+    async def get_all_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        as_responses: bool = False,
+    ) -> list[Milestone] | list[dict[str, Any]]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_all_by_goal(
+                user_id, goal_id, as_responses
+            )
+        )
+
+    async def get_goal_with_milestones(
+        self,
+        user_id: str,
+        goal_id: str,
+        as_responses: bool = False,
+    ) -> tuple[dict[str, Any] | None, list[Milestone] | list[dict[str, Any]]]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_goal_with_milestones(
+                user_id, goal_id, as_responses
+            )
+        )
+
+    async def get_page_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_page_by_goal(
+                user_id, goal_id, limit, cursor, as_responses=as_responses
+            )
+        )
+
+    async def get_projected_by_id(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        fields: list[str],
+    ) -> dict[str, Any] | None:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_projected_by_id(
+                user_id, goal_id, milestone_id, fields
+            )
+        )
+
+    async def get_projected_by_goal(
+        self,
+        user_id: str,
+        goal_id: str,
+        fields: list[str],
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_projected_by_goal(
+                user_id, goal_id, fields, limit, cursor
+            )
+        )
+
+    async def get_overdue_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_overdue_page(
+                user_id, limit, cursor, as_responses=as_responses
+            )
+        )
+
+    async def get_upcoming_page(
+        self,
+        user_id: str,
+        days: int,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_upcoming_page(
+                user_id, days, limit, cursor, as_responses=as_responses
+            )
+        )
+
+    async def get_page_by_status(
+        self,
+        user_id: str,
+        milestone_status: MilestoneStatus,
+        limit: int,
+        cursor: str | None = None,
+        as_responses: bool = False,
+    ) -> tuple[list[Milestone] | list[dict[str, Any]], str | None]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).get_page_by_status(
+                user_id, milestone_status, limit, cursor, as_responses=as_responses
+            )
+        )
+
+    async def update(
+        self,
+        user_id: str,
+        goal_id: str,
+        milestone_id: str,
+        request: UpdateMilestoneRequest,
+    ) -> Milestone | None:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).update(
+                user_id, goal_id, milestone_id, request
+            )
+        )
+
+    async def delete(self, user_id: str, goal_id: str, milestone_id: str) -> bool:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).delete(user_id, goal_id, milestone_id)
+        )
+
+    async def delete_all_by_goal(self, user_id: str, goal_id: str) -> int:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).delete_all_by_goal(user_id, goal_id)
+        )
+
+    async def expire_all_by_goal(self, user_id: str, goal_id: str) -> int:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).expire_all_by_goal(user_id, goal_id)
+        )
+
+    async def reorder(
+        self,
+        user_id: str,
+        goal_id: str,
+        ordered_ids: list[str],
+    ) -> list[Milestone]:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).reorder(user_id, goal_id, ordered_ids)
+        )
+
+    async def rebalance(self, user_id: str, goal_id: str) -> int:
+        return await self.db.run(
+            lambda db: MilestoneRepository(db).rebalance(user_id, goal_id)
+        )
+
+    async def rebuild_rollups(self, user_id: str, goal_id: str) -> None:
+        await self.db.run(
+            lambda db: MilestoneRepository(db).rebuild_rollups(user_id, goal_id)
+        )
@@ -0,0 +1,121 @@
+"""
+Lexicographic rank keys for milestone ordering.
+
+A rank is a string over a base-62 alphabet whose ASCII order matches digit
+order, so ranks sort correctly as plain strings. A new rank can always be
+generated strictly between two existing ones, which lets a milestone move
+by rewriting only its own rank.
+
+Ranks never end with the lowest digit ("0"); that guarantees there is
+always room below any rank.
+"""
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_INDEX = {digit: i for i, digit in enumerate(DIGITS)}
+
+# Width of ranks derived from integer positions; 62**5 positions
+POSITION_RANK_WIDTH = 5
+
+# Ranks longer than this are rewritten by a background rebalance
+REBALANCE_RANK_LENGTH = 16
+
+
+def rank_from_position(position: int) -> str:
+    """
+    Rank for an integer position.
+
+    New milestones (from the goal's order counter), milestones stored before
+    rank ordering was enabled and milestones that were just rebalanced use
+    these ranks, so both modes sort identically.
+    """
+    digits = []
+    for _ in range(POSITION_RANK_WIDTH):
+        position, remainder = divmod(position, BASE)
+        digits.append(DIGITS[remainder])
+    return "".join(reversed(digits)) + DIGITS[BASE // 2]
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """
+    Return a rank strictly between `before` and `after`.
+
+    None means unbounded on that side.
+    """
+    before = before or ""
+    result = []
+    bounded = after is not None
+    i = 0
+
+    while True:
+        low = _INDEX[before[i]] if i < len(before) else 0
+        if bounded:
+            if i >= len(after):
+                raise ValueError(f"rank {before!r} must sort before {after!r}")
+            high = _INDEX[after[i]]
+        else:
+            high = BASE
+
+        if high - low > 1:
+            result.append(DIGITS[(low + high) // 2])
+            return "".join(result)
+
+        if high < low:
+            raise ValueError(f"rank {before!r} must sort before {after!r}")
+
+        result.append(DIGITS[low])
+        if high - low == 1:
+            # The prefix is now below `after`, so anything may follow it
+            bounded = False
+        i += 1
+
+
+def ranks_between(before: str | None, after: str | None, count: int) -> list[str]:
+    """
+    Return `count` ascending ranks between `before` and `after`.
+
+    The gap is split by repeated bisection, so rank length grows with the
+    logarithm of `count` rather than linearly.
+    """
+    if count <= 0:
+        return []
+    middle = rank_between(before, after)
+    left = ranks_between(before, middle, count // 2)
+    right = ranks_between(middle, after, count - count // 2 - 1)
+    return left + [middle] + right
+
+
+def increasing_run(ranks: list[str]) -> set[int]:
+    """
+    Indexes of a longest strictly increasing subsequence of ranks.
+
+    Items at these indexes are already in the right relative order and can
+    keep their ranks when a list is reordered.
+    """
+    tails: list[int] = []
+    previous: list[int] = [-1] * len(ranks)
+
+    for i, rank in enumerate(ranks):
+        low, high = 0, len(tails)
+        while low < high:
+            mid = (low + high) // 2
+            if ranks[tails[mid]] < rank:
+                low = mid + 1
+            else:
+                high = mid
+        previous[i] = tails[low - 1] if low > 0 else -1
+        if low == len(tails):
+            tails.append(i)
+        else:
+            tails[low] = i
+
+    run = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        run.add(i)
+        i = previous[i]
+    return run
+
+
+def needs_rebalance(ranks: list[str | None]) -> bool:
+    return any(rank and len(rank) > REBALANCE_RANK_LENGTH for rank in ranks)
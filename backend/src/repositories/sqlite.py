@@ -0,0 +1,588 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Any, Iterator
+
+from src.core.config import Settings
+
+from .dynamodb import (
+    INDEX_KEYS,
+    USER_MILESTONES_INDEX,
+    InvalidCursorError,
+    ItemNotFoundError,
+    TransactionConflictError,
+    decode_cursor,
+    encode_cursor,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    pk TEXT NOT NULL,
+    sk TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (pk, sk)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS items_type_created_at
+    ON items (json_extract(data, '$.type'), json_extract(data, '$.created_at'));
+
+CREATE INDEX IF NOT EXISTS items_user_milestones
+    ON items (json_extract(data, '$.GSI1PK'), json_extract(data, '$.GSI1SK'), pk, sk)
+    WHERE json_extract(data, '$.GSI1PK') IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS items_expires_at
+    ON items (json_extract(data, '$.expires_at'))
+    WHERE json_extract(data, '$.expires_at') IS NOT NULL;
+"""
+
+# Rows fetched per round of iter_query when no page size is given
+_DEFAULT_SCAN_PAGE = 500
+
+# PRAGMA user_version once milestones stored before the user-milestones-index
+# have been given its keys
+_INDEXED_VERSION = 1
+
+
+def _json_default(value: Any) -> Any:
+    # Numbers read back through the DynamoDB resource are Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Cannot store {type(value).__name__} in SQLite")
+
+
+def _dumps(data: dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), default=_json_default)
+
+
+def _container(item: dict[str, Any], parents: list[str]) -> dict[str, Any]:
+    """The map a dotted path's last segment lives in, created if missing"""
+    for name in parents:
+        item = item.setdefault(name, {})
+    return item
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string above every string that starts with `prefix`"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SQLiteClient:
+    """
+    SQLite storage engine for self-hosted deployments.
+
+    Items keep the single-table layout of DynamoDBClient: one row per item,
+    keyed by (pk, sk), with the remaining attributes stored as JSON. The
+    (pk, sk) primary key is a clustered B-tree (WITHOUT ROWID), so every
+    DynamoDBClient access pattern is an index seek:
+
+    - Get all goals for a user / all milestones of a goal: range scan on
+      pk = ? AND sk >= prefix AND sk < next(prefix), already in SK order
+    - Get a specific goal / milestone: point lookup on (pk, sk)
+
+    The expression index on (type, created_at) mirrors the table's
+    type-createdAt-index GSI, and the partial expression index on
+    (GSI1PK, GSI1SK) mirrors the sparse user-milestones-index: only rows
+    carrying GSI1PK are in it.
+
+    Rows with an `expires_at` (epoch seconds, the table's TTL attribute; see
+    tombstone) in the past are deleted on connect, through a partial index
+    of the rows that have one, standing in for DynamoDB TTL; so are the
+    milestones of soft-deleted goals, standing in for the cleanup function.
+
+    The database runs in WAL mode, so readers never block the writer.
+    Writes that must be atomic use BEGIN IMMEDIATE, which takes the write
+    lock up front instead of failing on upgrade; unlike TransactWriteItems
+    a transaction of any size commits atomically.
+
+    Milestones are always stored in the user layout (see key_layout); a
+    database written in the goal layout is rewritten in place on first
+    connect, in one transaction, and milestones stored before the
+    user-milestones-index are given its keys the same way.
+    """
+
+    # Items come back as plain JSON values
+    fast_path = True
+    colocated = True
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.conn = sqlite3.connect(
+            settings.sqlite_path,
+            timeout=settings.sqlite_busy_timeout_ms / 1000,
+            isolation_level=None,
+        )
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, never
+        # corruption, and skips an fsync per transaction
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}")
+        self.conn.executescript(_SCHEMA)
+        self._migrate_goal_layout()
+        self._index_milestones()
+        self._purge_expired()
+
+    def _migrate_goal_layout(self) -> None:
+        """
+        Move goal-layout milestones (pk GOAL#{goalId}) into the partition of
+        the goal's owner. Milestones of goals that no longer exist are
+        dropped, as they can no longer be reached.
+        """
+        legacy = self.conn.execute(
+            "SELECT 1 FROM items WHERE pk >= 'GOAL#' AND pk < 'GOAL$' LIMIT 1"
+        ).fetchone()
+        if legacy is None:
+            return
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO items (pk, sk, data)
+                SELECT
+                    goal.pk,
+                    'GOALM#' || substr(milestone.pk, 6) || '#' || milestone.sk,
+                    milestone.data
+                FROM items AS milestone
+                JOIN items AS goal
+                    ON goal.sk = milestone.pk
+                    AND json_extract(goal.data, '$.type') = 'goal'
+                WHERE milestone.pk >= 'GOAL#' AND milestone.pk < 'GOAL$'
+                """
+            )
+            conn.execute("DELETE FROM items WHERE pk >= 'GOAL#' AND pk < 'GOAL$'")
+
+    def _index_milestones(self) -> None:
+        """
+        Give milestones stored before the user-milestones-index its keys
+        (see MilestoneRepository._index_keys), in one transaction. Runs once
+        per database, recorded in user_version.
+        """
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version >= _INDEXED_VERSION:
+            return
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE items SET data = json_set(
+                    data,
+                    '$.GSI1PK',
+                    pk || CASE json_extract(data, '$.status')
+                        WHEN 'completed' THEN '#DONE' ELSE '#OPEN' END,
+                    '$.GSI1SK',
+                    json_extract(data, '$.due_date')
+                        || '#' || json_extract(data, '$.id')
+                )
+                WHERE json_extract(data, '$.type') = 'milestone'
+                    AND json_extract(data, '$.GSI1PK') IS NULL
+                    AND json_extract(data, '$.deleted_at') IS NULL
+                """
+            )
+            conn.execute(f"PRAGMA user_version = {_INDEXED_VERSION}")
+
+    def _purge_expired(self) -> None:
+        """
+        Delete expired rows, and the milestones of soft-deleted goals, which
+        the goal's tombstone leaves in place (see tombstone)
+        """
+        self.conn.execute(
+            "DELETE FROM items WHERE json_extract(data, '$.expires_at') <= ?",
+            (int(time.time()),),
+        )
+        self.conn.execute(
+            """
+            DELETE FROM items
+            WHERE sk >= 'GOALM#' AND sk < 'GOALM$'
+                AND NOT EXISTS (
+                    SELECT 1 FROM items AS goal
+                    WHERE goal.pk = items.pk
+                        AND goal.sk = 'GOAL#' || json_extract(items.data, '$.goal_id')
+                        AND json_extract(goal.data, '$.deleted_at') IS NULL
+                )
+            """
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    @staticmethod
+    def _item(
+        pk: str,
+        sk: str,
+        data: str,
+        projection: list[str] | None = None,
+    ) -> dict[str, Any]:
+        item = {"PK": pk, "SK": sk, **json.loads(data)}
+        if projection:
+            return {name: item[name] for name in projection if name in item}
+        return item
+
+    def _write(self, item: dict[str, Any]) -> None:
+        data = {k: v for k, v in item.items() if k not in ("PK", "SK")}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO items (pk, sk, data) VALUES (?, ?, ?)",
+            (item["PK"], item["SK"], _dumps(data)),
+        )
+
+    def put_item(self, item: dict[str, Any]) -> None:
+        self._write(item)
+
+    def get_item(
+        self,
+        pk: str,
+        sk: str,
+        projection: list[str] | None = None,
+    ) -> dict[str, Any] | None:
+        row = self.conn.execute(
+            "SELECT data FROM items WHERE pk = ? AND sk = ?", (pk, sk)
+        ).fetchone()
+        return self._item(pk, sk, row[0], projection) if row else None
+
+    def _select(
+        self,
+        pk: str,
+        sk_prefix: str | None,
+        sk_value: str | None,
+        after: str | None,
+        limit: int,
+        projection: list[str] | None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """One SK-ordered page of a partition, starting after SK `after`"""
+        sql = "SELECT sk, data FROM items WHERE pk = ?"
+        params: list[Any] = [pk]
+        if sk_value:
+            sql += " AND sk = ?"
+            params.append(sk_value)
+        elif sk_prefix:
+            sql += " AND sk >= ? AND sk < ?"
+            params += [sk_prefix, _prefix_upper_bound(sk_prefix)]
+        elif sk_between:
+            sql += " AND sk BETWEEN ? AND ?"
+            params += list(sk_between)
+        if after is not None:
+            sql += " AND sk > ?"
+            params.append(after)
+        sql += " ORDER BY sk LIMIT ?"
+        params.append(limit)
+
+        return [
+            self._item(pk, sk, data, projection)
+            for sk, data in self.conn.execute(sql, params)
+        ]
+
+    def query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> list[dict[str, Any]]:
+        return self._select(
+            pk, sk_prefix, sk_value, None, -1, projection, sk_between
+        )
+
+    def iter_query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        page_size: int | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield every matching item, one page at a time.
+
+        Pages are separate keyset queries, so no read cursor stays open
+        while the caller writes between pages.
+        """
+        page_size = page_size or _DEFAULT_SCAN_PAGE
+        # SK is needed to continue from the last row even when projected away
+        fetch = projection and [*projection, "SK"]
+        after = None
+
+        while True:
+            items = self._select(
+                pk, sk_prefix, sk_value, after, page_size, fetch, sk_between
+            )
+            for item in items:
+                if projection and "SK" not in projection:
+                    yield {k: v for k, v in item.items() if k != "SK"}
+                else:
+                    yield item
+
+            if len(items) < page_size:
+                return
+            after = items[-1]["SK"]
+
+    def query_page(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch a single page of at most `limit` items.
+
+        Cursors have the same format as DynamoDBClient's. One extra row is
+        read to tell whether another page exists, so the last page never
+        carries a cursor.
+        """
+        after = None
+        if cursor:
+            after = decode_cursor(cursor, pk, sk_prefix=sk_prefix).get("SK")
+            if not isinstance(after, str):
+                raise InvalidCursorError("Invalid cursor")
+
+        fetch = projection and [*projection, "SK"]
+        items = self._select(pk, sk_prefix, None, after, limit + 1, fetch)
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor({"PK": pk, "SK": items[-1]["SK"]})
+        if projection and "SK" not in projection:
+            items = [{k: v for k, v in item.items() if k != "SK"} for item in items]
+        return items, next_cursor
+
+    def query_index_page(
+        self,
+        index: str,
+        pk: str,
+        sk_between: tuple[str, str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        filters: dict[str, str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch a single page of an index partition, in index sort key order.
+
+        Same arguments and cursor format as DynamoDBClient.query_index_page,
+        but filters are applied in the query, so pages are never short.
+        """
+        if index != USER_MILESTONES_INDEX:
+            raise ValueError(f"Unknown index {index}")
+        pk_attribute, sk_attribute = INDEX_KEYS[index]
+        # Must match the index expressions for the planner to use them
+        index_pk = f"json_extract(data, '$.{pk_attribute}')"
+        index_sk = f"json_extract(data, '$.{sk_attribute}')"
+
+        sql = f"SELECT pk, sk, data FROM items WHERE {index_pk} = ?"
+        params: list[Any] = [pk]
+        if sk_between:
+            sql += f" AND {index_sk} BETWEEN ? AND ?"
+            params += list(sk_between)
+        for name, value in (filters or {}).items():
+            sql += " AND json_extract(data, ?) = ?"
+            params += [f"$.{name}", value]
+        if cursor:
+            start = decode_cursor(cursor, pk, pk_attribute)
+            after = [start.get(sk_attribute), start.get("PK"), start.get("SK")]
+            if not all(isinstance(value, str) for value in after):
+                raise InvalidCursorError("Invalid cursor")
+            sql += f" AND ({index_sk}, pk, sk) > (?, ?, ?)"
+            params += after
+        sql += f" ORDER BY {index_sk}, pk, sk LIMIT ?"
+        params.append(limit + 1)
+
+        items = [
+            self._item(item_pk, item_sk, data)
+            for item_pk, item_sk, data in self.conn.execute(sql, params)
+        ]
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                {
+                    "PK": last["PK"],
+                    "SK": last["SK"],
+                    pk_attribute: last[pk_attribute],
+                    sk_attribute: last[sk_attribute],
+                }
+            )
+        return items, next_cursor
+
+    def update_item(
+        self,
+        pk: str,
+        sk: str,
+        updates: dict[str, Any],
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        SET the given attributes and return the item's new image.
+
+        With must_exist, or `expected` values the item must still hold
+        (None: absent), raises ItemNotFoundError instead of writing.
+        """
+        with self._transaction():
+            item = self.get_item(pk, sk)
+            if not self._holds(item, must_exist, expected):
+                raise ItemNotFoundError(f"{pk}/{sk}")
+            if item is None:
+                item = {"PK": pk, "SK": sk}
+            item.update(updates)
+            self._write(item)
+        return item
+
+    def update_action(
+        self,
+        pk: str,
+        sk: str,
+        updates: dict[str, Any],
+        expected: dict[str, Any] | None = None,
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+        must_exist: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Build an Update action for transact_write.
+
+        Takes the same arguments as DynamoDBClient.update_action, including
+        dotted paths into map attributes.
+        """
+        return {
+            "Update": {
+                "PK": pk,
+                "SK": sk,
+                "updates": updates,
+                "add": add or {},
+                "remove": remove or [],
+                "expected": expected or {},
+                "must_exist": must_exist,
+            }
+        }
+
+    def put_action(self, item: dict[str, Any]) -> dict[str, Any]:
+        """Build a Put action for transact_write"""
+        return {"Put": {"item": item}}
+
+    def delete_action(
+        self,
+        pk: str,
+        sk: str,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build a Delete action for transact_write. With `expected`, the item
+        must exist and still hold those values.
+        """
+        return {
+            "Delete": {
+                "PK": pk,
+                "SK": sk,
+                "expected": expected or {},
+                "must_exist": bool(expected),
+            }
+        }
+
+    def _check(self, action: dict[str, Any]) -> dict[str, Any] | None:
+        """Read an action's item, raising if its conditions do not hold"""
+        item = self.get_item(action["PK"], action["SK"])
+        if item is None and action["must_exist"]:
+            raise TransactionConflictError(f"{action['PK']}/{action['SK']}: missing")
+        for name, value in action["expected"].items():
+            if (item or {}).get(name) != value:
+                raise TransactionConflictError(
+                    f"{action['PK']}/{action['SK']}: {name} changed"
+                )
+        return item
+
+    def _apply(self, action: dict[str, Any]) -> None:
+        """Apply one transact_write action, checking its conditions first"""
+        if "Put" in action:
+            self._write(action["Put"]["item"])
+        elif "Delete" in action:
+            delete = action["Delete"]
+            self._check(delete)
+            self.conn.execute(
+                "DELETE FROM items WHERE pk = ? AND sk = ?",
+                (delete["PK"], delete["SK"]),
+            )
+        else:
+            update = action["Update"]
+            item = self._check(update) or {
+                "PK": update["PK"],
+                "SK": update["SK"],
+            }
+            for path, value in update["updates"].items():
+                *parents, name = path.split(".")
+                _container(item, parents)[name] = value
+            for path, amount in update["add"].items():
+                *parents, name = path.split(".")
+                container = _container(item, parents)
+                container[name] = container.get(name, 0) + amount
+            for path in update["remove"]:
+                *parents, name = path.split(".")
+                _container(item, parents).pop(name, None)
+            self._write(item)
+
+    def transact_write(self, actions: list[dict[str, Any]]) -> None:
+        """
+        Apply actions in one transaction.
+
+        Raises TransactionConflictError, with nothing written, when any
+        condition no longer holds; its reasons mark the action that failed.
+        """
+        with self._transaction():
+            for index, action in enumerate(actions):
+                try:
+                    self._apply(action)
+                except TransactionConflictError as e:
+                    reasons = ["None"] * len(actions)
+                    reasons[index] = "ConditionalCheckFailed"
+                    raise TransactionConflictError(str(e), reasons) from e
+
+    def delete_item(
+        self,
+        pk: str,
+        sk: str,
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Delete an item and return it, or None when there was none.
+
+        With must_exist, or `expected` values the item must still hold,
+        raises ItemNotFoundError when the condition fails instead.
+        """
+        with self._transaction():
+            item = self.get_item(pk, sk)
+            if not self._holds(item, must_exist, expected):
+                raise ItemNotFoundError(f"{pk}/{sk}")
+            self.conn.execute("DELETE FROM items WHERE pk = ? AND sk = ?", (pk, sk))
+        return item
+
+    @staticmethod
+    def _holds(
+        item: dict[str, Any] | None,
+        must_exist: bool,
+        expected: dict[str, Any] | None,
+    ) -> bool:
+        """Whether an item meets the conditions of update_item/delete_item"""
+        if item is None and (must_exist or expected):
+            return False
+        return all((item or {}).get(k) == v for k, v in (expected or {}).items())
+
+    def batch_write(self, items: list[dict[str, Any]]) -> None:
+        with self._transaction():
+            for item in items:
+                self._write(item)
+
+    def batch_delete(self, keys: list[tuple[str, str]]) -> None:
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM items WHERE pk = ? AND sk = ?", keys)
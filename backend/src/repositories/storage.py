@@ -0,0 +1,130 @@
+"""
+Storage engine interface shared by the repositories.
+
+GoalRepository, MilestoneRepository and ActivityRepository only talk to
+the item-level API below, modelled on the single-table DynamoDB layout:
+items are dicts keyed by PK/SK (in key_layout's user layout), reads are
+point lookups or SK-ordered queries (by prefix or range) within one PK (or
+within one partition of a global secondary index), and multi-item writes
+go through engine-specific actions built by update_action, put_action and
+delete_action and committed by transact_write.
+"""
+
+from typing import Any, Iterator, Protocol
+
+from src.core.config import Settings
+
+
+class StorageEngine(Protocol):
+    # True when reads return plain Python values (int rather than Decimal),
+    # so the repositories can hand items straight to the codec
+    fast_path: bool
+    # True when a goal's milestones are stored in its owner's partition
+    # (key_layout's user layout), so milestone keys prove ownership
+    colocated: bool
+
+    def put_item(self, item: dict[str, Any]) -> None: ...
+
+    def get_item(
+        self,
+        pk: str,
+        sk: str,
+        projection: list[str] | None = None,
+    ) -> dict[str, Any] | None: ...
+
+    def query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> list[dict[str, Any]]: ...
+
+    def iter_query(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        sk_value: str | None = None,
+        page_size: int | None = None,
+        projection: list[str] | None = None,
+        sk_between: tuple[str, str] | None = None,
+    ) -> Iterator[dict[str, Any]]: ...
+
+    def query_page(
+        self,
+        pk: str,
+        sk_prefix: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]: ...
+
+    def query_index_page(
+        self,
+        index: str,
+        pk: str,
+        sk_between: tuple[str, str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        filters: dict[str, str] | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]: ...
+
+    def update_item(
+        self,
+        pk: str,
+        sk: str,
+        updates: dict[str, Any],
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any]: ...
+
+    def update_action(
+        self,
+        pk: str,
+        sk: str,
+        updates: dict[str, Any],
+        expected: dict[str, Any] | None = None,
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+        must_exist: bool = False,
+    ) -> dict[str, Any]: ...
+
+    def put_action(self, item: dict[str, Any]) -> dict[str, Any]: ...
+
+    def delete_action(
+        self,
+        pk: str,
+        sk: str,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any]: ...
+
+    def transact_write(self, actions: list[dict[str, Any]]) -> None: ...
+
+    def delete_item(
+        self,
+        pk: str,
+        sk: str,
+        must_exist: bool = False,
+        expected: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | None: ...
+
+    def batch_write(self, items: list[dict[str, Any]]) -> None: ...
+
+    def batch_delete(self, keys: list[tuple[str, str]]) -> None: ...
+
+
+def create_storage_engine(settings: Settings) -> StorageEngine:
+    """
+    Build a client for the configured engine.
+
+    Clients are not thread-safe; every thread needs its own.
+    """
+    if settings.storage_engine == "sqlite":
+        from .sqlite import SQLiteClient
+
+        return SQLiteClient(settings)
+
+    from .dynamodb import DynamoDBClient
+
+    return DynamoDBClient(settings)
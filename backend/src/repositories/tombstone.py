@@ -0,0 +1,46 @@
+"""
+Soft deletion (GOAL_DELETE_MODE=soft).
+
+Deleting a goal only marks its item, which takes one conditional write
+however many milestones the goal has:
+
+    deleted_at  when the item was deleted (the tombstone)
+    expires_at  epoch seconds after which the table's TTL removes the item
+
+That tombstone is the only write of the delete request. The goal's
+milestones are marked the same way, and lose their user-milestones-index
+keys, out of band (MilestoneRepository.expire_all_by_goal) by the cleanup
+function reading the table's stream (src/cleanup.py), with
+scripts/sweep_tombstones.py as a fallback; SQLiteClient deletes them on
+connect instead. Milestones expire at once, while the goal's tombstone is
+kept for GOAL_TOMBSTONE_TTL_SECONDS so that the sweep can still find it.
+
+Until then a deleted goal's milestones are still stored and indexed, so
+reads check their goal first (the index lists drop those whose goal is
+gone). TTL deletes expired items in the background, typically within
+days, so the repositories also skip tombstoned items on every read.
+"""
+
+import time
+from datetime import datetime
+from typing import Any
+
+TOMBSTONE_ATTRIBUTE = "deleted_at"
+TTL_ATTRIBUTE = "expires_at"
+
+
+def is_tombstoned(item: dict[str, Any]) -> bool:
+    return TOMBSTONE_ATTRIBUTE in item
+
+
+def live(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """The items that are not tombstoned"""
+    return [item for item in items if TOMBSTONE_ATTRIBUTE not in item]
+
+
+def tombstone_attributes(ttl_seconds: int = 0) -> dict[str, Any]:
+    """Attributes marking an item deleted and expiring `ttl_seconds` from now"""
+    return {
+        TOMBSTONE_ATTRIBUTE: datetime.utcnow().isoformat(),
+        TTL_ATTRIBUTE: int(time.time()) + ttl_seconds,
+    }
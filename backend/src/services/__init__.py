@@ -1 +1,4 @@
 # Business logic services
+from .bulk_import import BulkImporter, ImportStreamError, ndjson_lines
+
+__all__ = ["BulkImporter", "ImportStreamError", "ndjson_lines"]
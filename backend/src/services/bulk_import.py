@@ -0,0 +1,327 @@
+"""
+Bulk import of goals and milestones from NDJSON.
+
+Every non-blank line of the body is one JSON record:
+
+    {"type": "goal", "ref": "g1", "title": "...", "start_date": "...", "end_date": "..."}
+    {"type": "milestone", "goal": "g1", "title": "...", "due_date": "..."}
+    {"type": "milestone", "goal_id": "<id of an existing goal>", ...}
+
+Records are validated with CreateGoalRequest/CreateMilestoneRequest as the
+body streams in. A milestone names its goal either by the `ref` of a goal
+earlier in the same import or by the id of one of the user's goals. Valid
+records are written in chunks of IMPORT_CHUNK_SIZE, each chunk in one hop
+to a DynamoDB worker thread; an invalid record fails on its own, and every
+record gets a result.
+"""
+
+import json
+import zlib
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+
+from src.models import (
+    CreateGoalRequest,
+    CreateMilestoneRequest,
+    ImportRecordResult,
+    ImportResponse,
+)
+from src.repositories import (
+    AsyncDynamoDBClient,
+    GoalRepository,
+    MilestoneRepository,
+    StorageEngine,
+)
+from src.repositories.ranking import needs_rebalance
+
+# Records written per chunk: the goals fit one transaction, the milestones
+# one BatchWriteItem request
+IMPORT_CHUNK_SIZE = 25
+
+# Most bytes inflated from one piece of a gzip body at a time
+INFLATE_STEP = 64 * 1024
+
+
+class ImportStreamError(Exception):
+    """The body cannot be read further: too large, or corrupt"""
+
+
+async def ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    gzipped: bool,
+    max_bytes: int,
+) -> AsyncIterator[bytes]:
+    """
+    Split a streamed body into lines, inflating it first when gzipped.
+
+    Raises ImportStreamError once more than `max_bytes` have been read
+    (after inflating), so a small compressed body cannot expand without
+    bound.
+    """
+    decoder = zlib.decompressobj(wbits=31) if gzipped else None
+    buffer = b""
+    total = 0
+
+    def feed(data: bytes) -> list[bytes]:
+        nonlocal buffer, total
+        total += len(data)
+        if total > max_bytes:
+            raise ImportStreamError(f"Import exceeds {max_bytes} bytes")
+        *lines, buffer = (buffer + data).split(b"\n")
+        return lines
+
+    async for chunk in chunks:
+        if decoder is None:
+            for line in feed(chunk):
+                yield line
+            continue
+        data = chunk
+        while data:
+            try:
+                out = decoder.decompress(data, INFLATE_STEP)
+            except zlib.error:
+                raise ImportStreamError("Invalid gzip body")
+            data = decoder.unconsumed_tail
+            for line in feed(out):
+                yield line
+
+    if decoder is not None:
+        if not decoder.eof:
+            raise ImportStreamError("Truncated gzip body")
+        for line in feed(decoder.flush()):
+            yield line
+    if buffer:
+        yield buffer
+
+
+def describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+        if e["loc"]
+        else e["msg"]
+        for e in error.errors()
+    )
+
+
+class _Record:
+    """A validated record waiting for its chunk to be written"""
+
+    def __init__(
+        self,
+        line: int,
+        type: str,
+        request: CreateGoalRequest | CreateMilestoneRequest,
+        ref: str | None = None,
+        goal_id: str | None = None,
+    ):
+        self.line = line
+        self.type = type
+        self.request = request
+        # A goal's own ref, or the ref of a milestone's goal
+        self.ref = ref
+        # A milestone's existing goal
+        self.goal_id = goal_id
+
+    def created(self, item_id: str) -> ImportRecordResult:
+        return ImportRecordResult(
+            line=self.line,
+            type=self.type,
+            status="created",
+            id=item_id,
+            ref=self.ref if self.type == "goal" else None,
+        )
+
+    def failed(self, error: str) -> ImportRecordResult:
+        return ImportRecordResult(
+            line=self.line, type=self.type, status="failed", error=error
+        )
+
+
+class BulkImporter:
+    """
+    One user's import.
+
+    Goals of a chunk are written before its milestones, so a milestone may
+    refer to a goal in the same chunk. Existing goals named by goal_id are
+    looked up once per import, which is the ownership check, and get their
+    rollups rebuilt first if they were stored before rollups existed.
+    """
+
+    def __init__(self, db: AsyncDynamoDBClient, user_id: str, max_records: int):
+        self.db = db
+        self.user_id = user_id
+        self.max_records = max_records
+        self.results: list[ImportRecordResult] = []
+        # Goal ids of written refs; None while the goal waits in the chunk
+        self._refs: dict[str, str | None] = {}
+        self._failed_refs: set[str] = set()
+        # Whether each goal id named by a milestone is one of the user's goals
+        self._goals: dict[str, bool] = {}
+        self.rebalance_goal_ids: set[str] = set()
+
+    async def run(self, lines: AsyncIterator[bytes]) -> ImportResponse:
+        chunk: list[_Record] = []
+        records = 0
+        line_no = 0
+        try:
+            async for raw in lines:
+                line_no += 1
+                if not raw.strip():
+                    continue
+                records += 1
+                if records > self.max_records:
+                    self._fail(
+                        line_no,
+                        None,
+                        f"Import is limited to {self.max_records} records",
+                    )
+                    break
+                record = self._parse(line_no, raw)
+                if record is None:
+                    continue
+                chunk.append(record)
+                if len(chunk) == IMPORT_CHUNK_SIZE:
+                    await self._flush(chunk)
+                    chunk = []
+        except ImportStreamError as e:
+            self._fail(line_no + 1, None, str(e))
+        if chunk:
+            await self._flush(chunk)
+
+        self.results.sort(key=lambda result: result.line)
+        created = sum(1 for result in self.results if result.status == "created")
+        return ImportResponse(
+            results=self.results,
+            created=created,
+            failed=len(self.results) - created,
+        )
+
+    def _fail(self, line: int, type: str | None, error: str) -> None:
+        self.results.append(
+            ImportRecordResult(line=line, type=type, status="failed", error=error)
+        )
+
+    def _parse(self, line: int, raw: bytes) -> _Record | None:
+        """Validate one line; failures are recorded and return None"""
+        try:
+            data: Any = json.loads(raw)
+        except ValueError:
+            self._fail(line, None, "Invalid JSON")
+            return None
+        if not isinstance(data, dict):
+            self._fail(line, None, "Record must be a JSON object")
+            return None
+
+        record_type = data.get("type")
+        if record_type == "goal":
+            return self._parse_goal(line, data)
+        if record_type == "milestone":
+            return self._parse_milestone(line, data)
+        self._fail(line, None, "type must be 'goal' or 'milestone'")
+        return None
+
+    def _parse_goal(self, line: int, data: dict[str, Any]) -> _Record | None:
+        ref = data.get("ref")
+        if ref is not None and not isinstance(ref, str):
+            self._fail(line, "goal", "ref must be a string")
+            return None
+        if ref is not None and (ref in self._refs or ref in self._failed_refs):
+            self._fail(line, "goal", f"Duplicate ref '{ref}'")
+            return None
+        try:
+            request = CreateGoalRequest.model_validate(data)
+        except ValidationError as e:
+            if ref is not None:
+                self._failed_refs.add(ref)
+            self._fail(line, "goal", describe(e))
+            return None
+        if ref is not None:
+            self._refs[ref] = None
+        return _Record(line, "goal", request, ref=ref)
+
+    def _parse_milestone(self, line: int, data: dict[str, Any]) -> _Record | None:
+        ref, goal_id = data.get("goal"), data.get("goal_id")
+        if (ref is None) == (goal_id is None):
+            self._fail(line, "milestone", "Exactly one of goal and goal_id is required")
+            return None
+        if not isinstance(ref if goal_id is None else goal_id, str):
+            self._fail(line, "milestone", "goal and goal_id must be strings")
+            return None
+        if ref is not None and ref not in self._refs:
+            error = (
+                f"Goal '{ref}' was not imported"
+                if ref in self._failed_refs
+                else (
+                    f"Unknown goal ref '{ref}'; "
+                    "goals must come before their milestones"
+                )
+            )
+            self._fail(line, "milestone", error)
+            return None
+        try:
+            request = CreateMilestoneRequest.model_validate(data)
+        except ValidationError as e:
+            self._fail(line, "milestone", describe(e))
+            return None
+        return _Record(line, "milestone", request, ref=ref, goal_id=goal_id)
+
+    async def _flush(self, chunk: list[_Record]) -> None:
+        self.results += await self.db.run(lambda db: self._write_chunk(db, chunk))
+
+    def _write_chunk(
+        self,
+        db: StorageEngine,
+        chunk: list[_Record],
+    ) -> list[ImportRecordResult]:
+        goal_repo = GoalRepository(db)
+        milestone_repo = MilestoneRepository(db)
+        results = []
+
+        goal_records = [record for record in chunk if record.type == "goal"]
+        goals = goal_repo.create_many(
+            self.user_id, [record.request for record in goal_records]
+        )
+        for record, goal in zip(goal_records, goals):
+            if record.ref is not None:
+                self._refs[record.ref] = goal.id
+            self._goals[goal.id] = True
+            results.append(record.created(goal.id))
+
+        by_goal: dict[str, list[_Record]] = {}
+        for record in chunk:
+            if record.type == "milestone":
+                goal_id = record.goal_id or self._refs[record.ref]
+                by_goal.setdefault(goal_id, []).append(record)
+
+        for goal_id, records in by_goal.items():
+            milestones = None
+            if self._owns_goal(goal_repo, milestone_repo, goal_id):
+                milestones = milestone_repo.create_many(
+                    self.user_id, goal_id, [record.request for record in records]
+                )
+            if milestones is None:
+                results += [record.failed("Goal not found") for record in records]
+                continue
+            results += [
+                record.created(milestone.id)
+                for record, milestone in zip(records, milestones)
+            ]
+            if needs_rebalance([milestone.rank for milestone in milestones]):
+                self.rebalance_goal_ids.add(goal_id)
+        return results
+
+    def _owns_goal(
+        self,
+        goal_repo: GoalRepository,
+        milestone_repo: MilestoneRepository,
+        goal_id: str,
+    ) -> bool:
+        if goal_id not in self._goals:
+            goal = goal_repo.get_by_id(self.user_id, goal_id)
+            if goal is not None and (
+                goal.milestone_counts is None or goal.next_milestone_order is None
+            ):
+                milestone_repo.rebuild_rollups(self.user_id, goal_id)
+            self._goals[goal_id] = goal is not None
+        return self._goals[goal_id]
@@ -0,0 +1,102 @@
+"""
+Fixtures of the backend tests.
+
+Each test runs against its own table in moto's in-memory DynamoDB (the
+table of scripts/create_table.py), with settings and clients built afresh,
+so a test changes settings through environment variables (the `env`
+fixture) before it first uses a repository or the app.
+"""
+
+from collections import defaultdict
+from typing import Any
+
+import pytest
+from moto import mock_aws
+
+# Whatever .env or the shell holds, tests never reach a real table or Cognito
+TEST_ENVIRONMENT = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_DEFAULT_REGION": "ap-northeast-1",
+    "AWS_REGION": "ap-northeast-1",
+    "STORAGE_ENGINE": "dynamodb",
+    "DYNAMODB_TABLE_NAME": "milestone-manager",
+    "DYNAMODB_ENDPOINT_URL": "",
+    "COGNITO_USER_POOL_ID": "",
+    "ENVIRONMENT": "development",
+    "PREWARM": "off",
+}
+
+
+def clear_cached_clients() -> None:
+    from src.core.config import get_settings
+    from src.repositories import (
+        get_async_dynamodb_client,
+        get_dynamodb_client,
+        get_goal_cache,
+    )
+
+    for factory in (
+        get_settings,
+        get_dynamodb_client,
+        get_async_dynamodb_client,
+        get_goal_cache,
+    ):
+        factory.cache_clear()
+
+
+@pytest.fixture
+def env(monkeypatch: pytest.MonkeyPatch):
+    for name, value in TEST_ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+    clear_cached_clients()
+    yield monkeypatch
+    clear_cached_clients()
+
+
+@pytest.fixture
+def db(env):
+    """A DynamoDBClient on a fresh table"""
+    from create_table import create_table
+    from src.repositories import get_dynamodb_client
+
+    with mock_aws():
+        create_table(endpoint_url=None)
+        yield get_dynamodb_client()
+
+
+@pytest.fixture
+def client(db):
+    """A TestClient of the app, signed in as the development user"""
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+
+    with TestClient(app, headers={"Authorization": "Bearer test"}) as client:
+        yield client
+
+
+@pytest.fixture
+def failing_calls(
+    monkeypatch: pytest.MonkeyPatch,
+) -> dict[str, list[dict[str, Any] | None]]:
+    """
+    Error responses to fail DynamoDB calls with, by operation name (e.g.
+    "TransactWriteItems"): each call of the operation, from any client,
+    raises a ClientError with the next queued response instead of reaching
+    moto (or goes through, for None), until the queue is empty
+    """
+    from botocore.client import BaseClient
+    from botocore.exceptions import ClientError
+
+    queued: dict[str, list[dict[str, Any] | None]] = defaultdict(list)
+    make_api_call = BaseClient._make_api_call
+
+    def fail_or_call(self: BaseClient, operation_name: str, api_params: Any) -> Any:
+        response = queued[operation_name].pop(0) if queued[operation_name] else None
+        if response is not None:
+            raise ClientError(response, operation_name)
+        return make_api_call(self, operation_name, api_params)
+
+    monkeypatch.setattr(BaseClient, "_make_api_call", fail_or_call)
+    return queued
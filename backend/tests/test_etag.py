@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from src.core.config import get_settings
+from src.repositories import ActivityRepository
+
+GOAL = {"title": "Goal", "start_date": "2024-01-01", "end_date": "2024-12-31"}
+SETTLE_SECONDS = 0.2
+
+
+@pytest.fixture
+def settled(client, monkeypatch: pytest.MonkeyPatch):
+    """Waits out a short ETAG_SETTLE_SECONDS; the goal cache stays on"""
+    settings = get_settings()
+    assert settings.goal_cache_max_entries > 0
+    monkeypatch.setattr(settings, "etag_settle_seconds", SETTLE_SECONDS)
+    return lambda: time.sleep(SETTLE_SECONDS * 1.5)
+
+
+def test_etag_is_sent_once_the_write_settles(client, settled):
+    goal_id = client.post("/api/goals", json=GOAL).json()["id"]
+    url = f"/api/goals/{goal_id}"
+    assert "etag" not in client.get(url).headers
+
+    settled()
+    response = client.get(url)
+    etag = response.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_cached_goal_is_not_served_after_another_process_writes(
+    client, db, settled
+):
+    goal_id = client.post("/api/goals", json=GOAL).json()["id"]
+    url = f"/api/goals/{goal_id}"
+    settled()
+    etag = client.get(url).headers["etag"]
+
+    # Written by another process: this one's goal cache still has the goal
+    db.update_item("USER#dev-user-123", f"GOAL#{goal_id}", {"title": "Renamed"})
+    ActivityRepository(db).record("dev-user-123")
+
+    assert client.get(url).json()["title"] == "Renamed"
+    settled()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+    assert response.headers["etag"] != etag
@@ -0,0 +1,8 @@
+from check_import_time import budget_failures, measure, median_run
+
+
+def test_src_main_import_is_within_budget():
+    """src.main defers its heavy imports and stays within the budgets"""
+    runs = [measure("src.main") for _ in range(3)]
+    total_ms, entries = median_run(runs)
+    assert budget_failures(entries, total_ms) == []
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+from boto3.dynamodb.conditions import Key
+
+from src.core.config import Settings
+from src.models import CreateGoalRequest, CreateMilestoneRequest
+from src.repositories import (
+    GoalRepository,
+    MilestoneRepository,
+    TransactionConflictError,
+    key_layout,
+)
+from src.repositories.dynamodb import COPY_MAX_ATTEMPTS, DynamoDBClient
+
+
+def cancelled(*reasons: str) -> dict:
+    return {
+        "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+        "CancellationReasons": [{"Code": reason} for reason in reasons],
+    }
+
+
+@pytest.fixture
+def migrating(db, env):
+    """
+    A client in the goal+user phase, over a goal with two milestones stored
+    in the goal layout; returns (client, goal id)
+    """
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    MilestoneRepository(db).create_many(
+        "user-1",
+        goal.id,
+        [
+            CreateMilestoneRequest(title=f"Milestone {i}", due_date=date(2024, 6, 1))
+            for i in range(2)
+        ],
+    )
+    env.setenv("DYNAMODB_KEY_LAYOUT", "goal+user")
+    return DynamoDBClient(Settings()), goal.id
+
+
+def user_layout_copies(client, goal_id: str) -> list[dict]:
+    return client.table.query(
+        KeyConditionExpression=Key("PK").eq("USER#user-1")
+        & Key("SK").begins_with(key_layout.milestones_prefix(goal_id))
+    )["Items"]
+
+
+def test_copy_retries_a_contended_milestone(migrating, failing_calls):
+    client, goal_id = migrating
+    failing_calls["TransactWriteItems"] += [
+        cancelled("TransactionConflict", "None"),
+        cancelled("None", "TransactionConflict"),
+    ]
+    assert client.copy_to_user_layout("user-1", goal_id) == 2
+    assert len(user_layout_copies(client, goal_id)) == 2
+
+    # Copies already in place are skipped
+    assert client.copy_to_user_layout("user-1", goal_id) == 0
+
+
+def test_copy_gives_up_on_a_milestone_that_stays_contended(
+    migrating, failing_calls
+):
+    client, goal_id = migrating
+    failing_calls["TransactWriteItems"] += [
+        cancelled("TransactionConflict", "None")
+    ] * COPY_MAX_ATTEMPTS
+    with pytest.raises(TransactionConflictError):
+        client.copy_to_user_layout("user-1", goal_id)
+    assert user_layout_copies(client, goal_id) == []
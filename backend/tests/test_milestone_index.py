@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from src.core.config import get_settings
+from src.models import CreateGoalRequest, CreateMilestoneRequest
+from src.repositories import GoalRepository, MilestoneRepository
+
+TODAY = date(2025, 1, 1)
+
+
+def create_goal_with_overdue_milestone(db) -> str:
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    MilestoneRepository(db).create(
+        "user-1",
+        goal.id,
+        CreateMilestoneRequest(title="Milestone", due_date=date(2024, 6, 1)),
+    )
+    return goal.id
+
+
+@pytest.fixture
+def goal_lookups(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Ids of the goals looked up from then on"""
+    looked_up: list[str] = []
+    get_by_id = GoalRepository.get_by_id
+
+    def record(self, user_id, goal_id):
+        looked_up.append(goal_id)
+        return get_by_id(self, user_id, goal_id)
+
+    monkeypatch.setattr(GoalRepository, "get_by_id", record)
+    return looked_up
+
+
+def test_hard_mode_lists_without_goal_lookups(db, goal_lookups):
+    create_goal_with_overdue_milestone(db)
+    milestones, _ = MilestoneRepository(db).get_overdue_page("user-1", 10, today=TODAY)
+    assert len(milestones) == 1
+    assert goal_lookups == []
+
+
+def test_soft_mode_hides_milestones_of_deleted_goals(db, env, goal_lookups):
+    env.setenv("GOAL_DELETE_MODE", "soft")
+    get_settings.cache_clear()
+    deleted = create_goal_with_overdue_milestone(db)
+    kept = create_goal_with_overdue_milestone(db)
+    assert GoalRepository(db).tombstone("user-1", deleted)
+
+    milestones, _ = MilestoneRepository(db).get_overdue_page("user-1", 10, today=TODAY)
+    assert [m.goal_id for m in milestones] == [kept]
+    assert sorted(goal_lookups) == sorted([deleted, kept])
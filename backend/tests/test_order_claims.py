@@ -0,0 +1,90 @@
+from datetime import date
+
+import pytest
+from botocore.client import BaseClient
+
+from src.models import CreateGoalRequest, CreateMilestoneRequest
+from src.repositories import (
+    GoalRepository,
+    MilestoneRepository,
+    TransactionConflictError,
+)
+from src.repositories.milestone_repository import ORDER_CLAIM_ATTEMPTS
+
+GOAL = {"title": "Goal", "start_date": "2024-01-01", "end_date": "2024-12-31"}
+MILESTONE = {"title": "Milestone", "due_date": "2024-06-01"}
+
+
+def claim_lost() -> dict:
+    """The cancellation of an append whose order counter moved on"""
+    return {
+        "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+        "CancellationReasons": [
+            {"Code": "None"},
+            {"Code": "ConditionalCheckFailed"},
+        ],
+    }
+
+
+def create_goal(db) -> str:
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    return goal.id
+
+
+def milestone(title: str) -> CreateMilestoneRequest:
+    return CreateMilestoneRequest(title=title, due_date=date(2024, 6, 1))
+
+
+def test_claim_lost_to_a_concurrent_append_is_retried(db, monkeypatch):
+    goal_id = create_goal(db)
+    repo = MilestoneRepository(db)
+
+    # Another append commits between the first claim's read and its write
+    make_api_call = BaseClient._make_api_call
+    raced = []
+
+    def race(self, operation_name, api_params):
+        if operation_name == "TransactWriteItems":
+            # Once: the concurrent append goes straight through
+            monkeypatch.setattr(BaseClient, "_make_api_call", make_api_call)
+            raced.append(repo.create("user-1", goal_id, milestone("Concurrent")))
+        return make_api_call(self, operation_name, api_params)
+
+    monkeypatch.setattr(BaseClient, "_make_api_call", race)
+    retried = repo.create("user-1", goal_id, milestone("Retried"))
+
+    assert [raced[0].order, retried.order] == [1, 2]
+    goal = GoalRepository(db).get_by_id("user-1", goal_id)
+    assert goal.next_milestone_order == 2
+    assert goal.milestone_counts["pending"] == 2
+    assert [m.id for m in repo.get_all_by_goal("user-1", goal_id)] == [
+        raced[0].id,
+        retried.id,
+    ]
+
+
+def test_claims_that_keep_losing_give_up(db, failing_calls):
+    goal_id = create_goal(db)
+    failing_calls["TransactWriteItems"] += [claim_lost()] * ORDER_CLAIM_ATTEMPTS
+    with pytest.raises(TransactionConflictError):
+        MilestoneRepository(db).create("user-1", goal_id, milestone("Lost"))
+
+    goal = GoalRepository(db).get_by_id("user-1", goal_id)
+    assert goal.next_milestone_order == 0
+    assert MilestoneRepository(db).get_all_by_goal("user-1", goal_id) == []
+
+
+def test_contended_append_is_a_conflict(client, failing_calls):
+    goal_id = client.post("/api/goals", json=GOAL).json()["id"]
+    failing_calls["TransactWriteItems"] += [claim_lost()] * ORDER_CLAIM_ATTEMPTS
+    url = f"/api/goals/{goal_id}/milestones"
+    assert client.post(url, json=MILESTONE).status_code == 409
+
+    response = client.post(url, json=MILESTONE)
+    assert response.status_code == 201
+    assert response.json()["order"] == 1
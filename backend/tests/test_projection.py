@@ -0,0 +1,39 @@
+from datetime import date
+
+from src.models import (
+    CreateGoalRequest,
+    CreateMilestoneRequest,
+    GoalResponse,
+    MilestoneResponse,
+)
+from src.models.projection import ProjectableResponse
+from src.repositories import GoalRepository, MilestoneRepository, key_layout
+
+
+def validated_dump(model: type[ProjectableResponse], item: dict) -> dict:
+    """The base class's dump_item, which validates every field"""
+    return ProjectableResponse.dump_item.__func__(model, item)
+
+
+def test_dump_item_matches_validation(db):
+    """The hand-written dump_item of each response gives what validation does"""
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    MilestoneRepository(db).create(
+        "user-1",
+        goal.id,
+        CreateMilestoneRequest(title="Milestone", due_date=date(2024, 6, 1)),
+    )
+
+    goal_item = db.get_item("USER#user-1", f"GOAL#{goal.id}")
+    (milestone_item,) = db.query(
+        "USER#user-1", sk_prefix=key_layout.milestones_prefix(goal.id)
+    )
+    assert GoalResponse.dump_item(goal_item) == validated_dump(GoalResponse, goal_item)
+    assert MilestoneResponse.dump_item(milestone_item) == validated_dump(
+        MilestoneResponse, milestone_item
+    )
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+from src.models import (
+    CreateGoalRequest,
+    CreateMilestoneRequest,
+    UpdateGoalRequest,
+    UpdateMilestoneRequest,
+)
+from src.repositories import GoalRepository, MilestoneRepository
+
+
+@pytest.fixture
+def operations(db, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Names of the DynamoDB operations called from then on"""
+    from botocore.client import BaseClient
+
+    called: list[str] = []
+    make_api_call = BaseClient._make_api_call
+
+    def record(self, operation_name, api_params):
+        called.append(operation_name)
+        return make_api_call(self, operation_name, api_params)
+
+    monkeypatch.setattr(BaseClient, "_make_api_call", record)
+    return called
+
+
+def create_goal(db) -> str:
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    return goal.id
+
+
+def test_goal_writes_are_single_conditional_writes(db, operations):
+    goal_id = create_goal(db)
+    repo = GoalRepository(db)
+
+    operations.clear()
+    goal = repo.update("user-1", goal_id, UpdateGoalRequest(title="New"))
+    assert goal is not None and goal.title == "New"
+    assert goal.milestone_counts is not None
+    # The goal, then the activity counter
+    assert operations == ["UpdateItem", "UpdateItem"]
+
+    assert repo.tombstone("user-1", goal_id)
+    assert repo.update("user-1", goal_id, UpdateGoalRequest(title="Newer")) is None
+    assert not repo.tombstone("user-1", goal_id)
+
+    operations.clear()
+    assert repo.delete("user-1", goal_id)
+    assert operations == ["DeleteItem", "UpdateItem"]
+    assert not repo.delete("user-1", goal_id)
+
+
+def test_milestone_delete_takes_it_out_of_the_rollups(db, operations):
+    goal_id = create_goal(db)
+    repo = MilestoneRepository(db)
+    milestone = repo.create(
+        "user-1",
+        goal_id,
+        CreateMilestoneRequest(title="Milestone", due_date=date(2024, 6, 1)),
+    )
+
+    operations.clear()
+    updated = repo.update(
+        "user-1", goal_id, milestone.id, UpdateMilestoneRequest(title="New")
+    )
+    assert updated is not None and updated.title == "New"
+    assert operations == ["UpdateItem", "UpdateItem"]
+
+    operations.clear()
+    assert repo.delete("user-1", goal_id, milestone.id)
+    # The milestone, the goal's rollups, then the activity counter
+    assert operations == ["DeleteItem", "UpdateItem", "UpdateItem"]
+    goal = GoalRepository(db).get_by_id("user-1", goal_id)
+    assert goal.milestone_counts["pending"] == 0
+    assert goal.open_milestone_due_dates == {}
+
+    assert not repo.delete("user-1", goal_id, milestone.id)
+    assert (
+        repo.update("user-1", goal_id, milestone.id, UpdateMilestoneRequest(title="x"))
+        is None
+    )
@@ -0,0 +1,106 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.models import CreateGoalRequest, UpdateGoalRequest
+from src.repositories import (
+    ActivityRepository,
+    GoalRepository,
+    TransactionConflictError,
+)
+from src.repositories.dynamodb import CONFLICT_ATTEMPTS
+
+GOAL = {"title": "Goal", "start_date": "2024-01-01", "end_date": "2024-12-31"}
+
+
+def cancelled(*reasons: str) -> dict:
+    """A TransactWriteItems cancellation with one reason code per action"""
+    return {
+        "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+        "CancellationReasons": [{"Code": reason} for reason in reasons],
+    }
+
+
+def in_transaction() -> dict:
+    """A single-item write refused while a transaction holds the item"""
+    return {
+        "Error": {"Code": "TransactionConflictException", "Message": "in progress"}
+    }
+
+
+def create_goal(db) -> str:
+    goal = GoalRepository(db).create(
+        "user-1",
+        CreateGoalRequest(
+            title="Goal", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31)
+        ),
+    )
+    return goal.id
+
+
+def test_reasons_identify_the_failed_action(db, failing_calls):
+    actions = [
+        db.put_action({"PK": "USER#user-1", "SK": "NOTE#1"}),
+        db.put_action({"PK": "USER#user-1", "SK": "NOTE#2"}),
+    ]
+    failing_calls["TransactWriteItems"].append(
+        cancelled("None", "ConditionalCheckFailed")
+    )
+    with pytest.raises(TransactionConflictError) as caught:
+        db.transact_write(actions)
+    assert caught.value.failed(1) and not caught.value.failed(0)
+    assert not caught.value.contended
+
+
+def test_contended_transaction_is_retried(db, failing_calls):
+    actions = [
+        db.put_action({"PK": "USER#user-1", "SK": "NOTE#1"}),
+        db.put_action({"PK": "USER#user-1", "SK": "NOTE#2"}),
+    ]
+    failing_calls["TransactWriteItems"] += [
+        cancelled("TransactionConflict", "None")
+    ] * (CONFLICT_ATTEMPTS - 1)
+    db.transact_write(actions)
+    assert db.get_item("USER#user-1", "NOTE#2") is not None
+
+
+def test_contention_is_not_mistaken_for_a_missing_goal(db, failing_calls):
+    goal_id = create_goal(db)
+    failing_calls["UpdateItem"] += [in_transaction()] * CONFLICT_ATTEMPTS
+    with pytest.raises(TransactionConflictError) as caught:
+        GoalRepository(db).update("user-1", goal_id, UpdateGoalRequest(title="New"))
+    assert caught.value.contended
+
+    # A write that gets through on a later attempt succeeds
+    failing_calls["UpdateItem"].append(in_transaction())
+    goal = GoalRepository(db).update("user-1", goal_id, UpdateGoalRequest(title="New"))
+    assert goal is not None and goal.title == "New"
+
+
+def test_contended_goal_write_is_a_conflict(client, failing_calls):
+    goal_id = client.post("/api/goals", json=GOAL).json()["id"]
+
+    failing_calls["UpdateItem"] += [in_transaction()] * CONFLICT_ATTEMPTS
+    assert client.put(f"/api/goals/{goal_id}", json={"title": "New"}).status_code == 409
+    failing_calls["DeleteItem"] += [in_transaction()] * CONFLICT_ATTEMPTS
+    assert client.delete(f"/api/goals/{goal_id}").status_code == 409
+
+    assert client.put("/api/goals/missing", json={"title": "New"}).status_code == 404
+    assert client.delete("/api/goals/missing").status_code == 404
+    assert client.delete(f"/api/goals/{goal_id}").status_code == 204
+
+
+def test_activity_is_recorded_outside_the_write(db, failing_calls):
+    """A failed activity update leaves the write it follows in place"""
+    goal_id = create_goal(db)
+    failing_calls["UpdateItem"] += [
+        None,
+        {"Error": {"Code": "InternalServerError", "Message": "unavailable"}},
+    ]
+    goal = GoalRepository(db).update("user-1", goal_id, UpdateGoalRequest(title="New"))
+    assert goal is not None
+    assert db.get_item("USER#user-1", f"GOAL#{goal_id}")["title"] == "New"
+
+    # Only the create was counted
+    today = datetime.utcnow().date()
+    assert ActivityRepository(db).get_range("user-1", today, today) == [(today, 1)]
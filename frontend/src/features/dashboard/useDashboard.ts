@@ -1,6 +1,7 @@
 import { useQuery } from '@tanstack/react-query'
 import type { Category, DashboardStats, ActivityData, TimelineItem } from '../../types'
 import { useGoals } from '../goals'
+import { apiClient } from '../../lib/api'
 import { useMemo } from 'react'
 
 // Mock categories for development
@@ -57,9 +58,9 @@ export function useDashboardStats() {
       totalGoals: goals.length,
       completedGoals,
       inProgressGoals,
-      totalMilestones: 0, // Will be calculated when we have all milestones
-      completedMilestones: 0,
-      overdueMilestones: 0,
+      totalMilestones: goals.reduce((sum, g) => sum + (g.totalMilestones ?? 0), 0),
+      completedMilestones: goals.reduce((sum, g) => sum + (g.completedMilestones ?? 0), 0),
+      overdueMilestones: goals.reduce((sum, g) => sum + (g.overdueMilestones ?? 0), 0),
       streakDays,
     }
   }, [goals])
@@ -68,41 +69,17 @@ export function useDashboardStats() {
 }
 
 export function useActivityData() {
-  const { data: goals = [] } = useGoals()
-
-  const activityData = useMemo((): ActivityData[] => {
-    const today = new Date()
-    const oneYearAgo = new Date(today)
-    oneYearAgo.setFullYear(oneYearAgo.getFullYear() - 1)
-
-    // Create a map of date -> count
-    const activityMap = new Map<string, number>()
-
-    // Count activities from goals
-    goals.forEach((goal) => {
-      const createdDate = goal.createdAt.split('T')[0]
-      const updatedDate = goal.updatedAt.split('T')[0]
-
-      activityMap.set(createdDate, (activityMap.get(createdDate) || 0) + 1)
-      if (createdDate !== updatedDate) {
-        activityMap.set(updatedDate, (activityMap.get(updatedDate) || 0) + 1)
-      }
-    })
-
-    // Generate array for the past year
-    const result: ActivityData[] = []
-    for (let d = new Date(oneYearAgo); d <= today; d.setDate(d.getDate() + 1)) {
-      const dateStr = d.toISOString().split('T')[0]
-      result.push({
-        date: dateStr,
-        count: activityMap.get(dateStr) || 0,
-      })
-    }
-
-    return result
-  }, [goals])
-
-  return { data: activityData, isLoading: false }
+  return useQuery({
+    queryKey: ['activity'],
+    queryFn: async (): Promise<ActivityData[]> => {
+      // Daily counts come from per-day counters kept by the API
+      const today = new Date()
+      const oneYearAgo = new Date(today)
+      oneYearAgo.setFullYear(oneYearAgo.getFullYear() - 1)
+      const toDateStr = (d: Date) => d.toISOString().split('T')[0]
+      return apiClient.getActivity(toDateStr(oneYearAgo), toDateStr(today))
+    },
+  })
 }
 
 export function useTimeline() {
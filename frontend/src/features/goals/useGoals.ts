@@ -30,6 +30,7 @@ export function useCreateGoal() {
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -43,6 +44,7 @@ export function useUpdateGoal() {
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
       queryClient.invalidateQueries({ queryKey: ['goals', variables.id] })
     },
   })
@@ -57,6 +59,7 @@ export function useDeleteGoal() {
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -27,6 +27,9 @@ export function useCreateMilestone() {
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['milestones', variables.goalId] })
+      // The goal's milestone rollups changed too
+      queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -47,6 +50,9 @@ export function useUpdateMilestone() {
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['milestones', variables.goalId] })
+      // The goal's milestone rollups changed too
+      queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -60,6 +66,9 @@ export function useDeleteMilestone() {
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['milestones', variables.goalId] })
+      // The goal's milestone rollups changed too
+      queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -80,6 +89,9 @@ export function useUpdateMilestoneStatus() {
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['milestones', variables.goalId] })
+      // The goal's milestone rollups changed too
+      queryClient.invalidateQueries({ queryKey: ['goals'] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
@@ -89,19 +101,18 @@ export function useReorderMilestones() {
 
   return useMutation({
     mutationFn: async ({
+      goalId,
       orderedIds,
     }: {
       goalId: string
       orderedIds: string[]
     }): Promise<Milestone[]> => {
-      // Update each milestone's order
-      const updates = orderedIds.map((id, index) =>
-        apiClient.updateMilestone(id, { order: index + 1 })
-      )
-      return Promise.all(updates)
+      // One request; the server writes only the milestones that moved
+      return apiClient.reorderMilestones(goalId, orderedIds)
     },
     onSuccess: (_, variables) => {
       queryClient.invalidateQueries({ queryKey: ['milestones', variables.goalId] })
+      queryClient.invalidateQueries({ queryKey: ['activity'] })
     },
   })
 }
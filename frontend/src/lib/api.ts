@@ -1,4 +1,5 @@
 import type {
+  ActivityData,
   Goal,
   Milestone,
   CreateGoalInput,
@@ -66,6 +67,11 @@ class ApiClient {
     })
   }
 
+  async getActivity(from: string, to: string): Promise<ActivityData[]> {
+    const params = new URLSearchParams({ from, to })
+    return this.request<ActivityData[]>(`/api/activity?${params}`)
+  }
+
   async getMilestones(goalId: string): Promise<Milestone[]> {
     return this.request<Milestone[]>(`/api/goals/${goalId}/milestones`)
   }
@@ -84,6 +90,17 @@ class ApiClient {
     })
   }
 
+  async reorderMilestones(goalId: string, orderedIds: string[]): Promise<Milestone[]> {
+    const result = await this.request<{ milestones: Milestone[] }>(
+      `/api/goals/${goalId}/milestones/reorder`,
+      {
+        method: 'POST',
+        body: JSON.stringify({ ordered_ids: orderedIds }),
+      }
+    )
+    return result.milestones
+  }
+
   async deleteMilestone(id: string): Promise<void> {
     await this.request(`/api/milestones/${id}`, {
       method: 'DELETE',
@@ -11,6 +11,12 @@ export interface Goal {
   status: GoalStatus
   createdAt: string
   updatedAt: string
+  // Milestone rollups; null for goals not yet rolled up
+  milestoneCounts?: Record<MilestoneStatus, number> | null
+  totalMilestones?: number | null
+  completedMilestones?: number | null
+  nextDueDate?: string | null
+  overdueMilestones?: number | null
 }
 
 export interface Milestone {
@@ -75,10 +75,12 @@ module "api" {
   environment          = var.environment
   dynamodb_table_name  = module.dynamodb.table_name
   dynamodb_table_arn   = module.dynamodb.table_arn
+  dynamodb_stream_arn  = module.dynamodb.stream_arn
   cognito_user_pool_id = module.cognito.user_pool_id
   cognito_client_id    = module.cognito.client_id
   cognito_issuer       = module.cognito.issuer
   allowed_origins      = var.cors_allowed_origins
+  prewarm              = var.api_prewarm
 }
 
 # Frontend (S3 + CloudFront)
@@ -65,11 +65,14 @@ resource "aws_lambda_function" "api" {
 
   environment {
     variables = {
-      ENVIRONMENT          = var.environment
-      DYNAMODB_TABLE_NAME  = var.dynamodb_table_name
-      COGNITO_USER_POOL_ID = var.cognito_user_pool_id
-      COGNITO_CLIENT_ID    = var.cognito_client_id
-      DEBUG                = var.environment == "prod" ? "false" : "true"
+      ENVIRONMENT            = var.environment
+      DYNAMODB_TABLE_NAME    = var.dynamodb_table_name
+      DYNAMODB_CLIENT_PRESET = "lambda"
+      GOAL_DELETE_MODE       = "soft"
+      COGNITO_USER_POOL_ID   = var.cognito_user_pool_id
+      COGNITO_CLIENT_ID      = var.cognito_client_id
+      DEBUG                  = var.environment == "prod" ? "false" : "true"
+      PREWARM                = var.prewarm
     }
   }
 
@@ -85,6 +88,99 @@ resource "aws_lambda_function" "api" {
   }
 }
 
+# 削除した目標のマイルストーンを片付けるLambda関数（apiと同じパッケージ）
+resource "aws_lambda_function" "cleanup" {
+  function_name = "${var.project_name}-${var.environment}-cleanup"
+  role          = aws_iam_role.lambda.arn
+  handler       = "src.cleanup.handler"
+  runtime       = "python3.12"
+  timeout       = 300
+  memory_size   = 256
+
+  filename         = data.archive_file.lambda_placeholder.output_path
+  source_code_hash = data.archive_file.lambda_placeholder.output_base64sha256
+
+  environment {
+    variables = {
+      ENVIRONMENT            = var.environment
+      DYNAMODB_TABLE_NAME    = var.dynamodb_table_name
+      DYNAMODB_CLIENT_PRESET = "lambda"
+      DEBUG                  = var.environment == "prod" ? "false" : "true"
+    }
+  }
+
+  lifecycle {
+    ignore_changes = [
+      filename,
+      source_code_hash,
+    ]
+  }
+
+  tags = {
+    Name = "${var.project_name}-${var.environment}-cleanup"
+  }
+}
+
+# DynamoDBストリームの読み取りポリシー
+resource "aws_iam_role_policy" "dynamodb_stream" {
+  name = "${var.project_name}-${var.environment}-dynamodb-stream-policy"
+  role = aws_iam_role.lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = var.dynamodb_stream_arn
+      }
+    ]
+  })
+}
+
+# 削除済みマークが付いた目標のレコードだけをクリーンアップLambdaに渡す
+resource "aws_lambda_event_source_mapping" "cleanup" {
+  event_source_arn  = var.dynamodb_stream_arn
+  function_name     = aws_lambda_function.cleanup.arn
+  starting_position = "LATEST"
+  batch_size        = 10
+
+  # 失敗したレコードだけを再試行し、それでも失敗したものは
+  # scripts/sweep_tombstones.py で片付ける
+  function_response_types        = ["ReportBatchItemFailures"]
+  bisect_batch_on_function_error = true
+  maximum_retry_attempts         = 10
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName = ["MODIFY"]
+        dynamodb = {
+          NewImage = {
+            type       = { S = ["goal"] }
+            deleted_at = { S = [{ exists = true }] }
+          }
+          OldImage = {
+            deleted_at = { S = [{ exists = false }] }
+          }
+        }
+      })
+    }
+  }
+
+  depends_on = [aws_iam_role_policy.dynamodb_stream]
+}
+
+resource "aws_cloudwatch_log_group" "cleanup" {
+  name              = "/aws/lambda/${aws_lambda_function.cleanup.function_name}"
+  retention_in_days = var.environment == "prod" ? 30 : 7
+}
+
 # プレースホルダー用のダミーZIPファイル
 data "archive_file" "lambda_placeholder" {
   type        = "zip"
@@ -22,3 +22,8 @@ output "lambda_role_arn" {
   description = "Lambda IAM role ARN"
   value       = aws_iam_role.lambda.arn
 }
+
+output "cleanup_function_name" {
+  description = "Cleanup Lambda function name"
+  value       = aws_lambda_function.cleanup.function_name
+}
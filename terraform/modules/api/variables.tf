@@ -18,6 +18,11 @@ variable "dynamodb_table_arn" {
   type        = string
 }
 
+variable "dynamodb_stream_arn" {
+  description = "DynamoDB stream ARN"
+  type        = string
+}
+
 variable "cognito_user_pool_id" {
   description = "Cognito User Pool ID"
   type        = string
@@ -37,3 +42,9 @@ variable "allowed_origins" {
   description = "CORS allowed origins"
   type        = list(string)
 }
+
+variable "prewarm" {
+  description = "PREWARM of the Lambda function (off, init)"
+  type        = string
+  default     = "init"
+}
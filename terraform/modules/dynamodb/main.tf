@@ -27,6 +27,38 @@ resource "aws_dynamodb_table" "main" {
     projection_type = "ALL"
   }
 
+  # Sparse GSI of each user's milestones across goals, by due date;
+  # only milestone items carry these attributes
+  attribute {
+    name = "GSI1PK"
+    type = "S"
+  }
+
+  attribute {
+    name = "GSI1SK"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name            = "user-milestones-index"
+    hash_key        = "GSI1PK"
+    range_key       = "GSI1SK"
+    projection_type = "ALL"
+  }
+
+  # Feeds the cleanup function, which expires the milestones of goals
+  # deleted with GOAL_DELETE_MODE=soft
+  stream_enabled   = true
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+
+  # Soft-deleted goals and their milestones carry an expiry time (epoch
+  # seconds); DynamoDB deletes them in the background without consuming
+  # write capacity
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   point_in_time_recovery {
     enabled = var.environment == "prod" ? true : false
   }
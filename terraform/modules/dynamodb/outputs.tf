@@ -12,3 +12,8 @@ output "table_id" {
   description = "DynamoDB table ID"
   value       = aws_dynamodb_table.main.id
 }
+
+output "stream_arn" {
+  description = "DynamoDB stream ARN"
+  value       = aws_dynamodb_table.main.stream_arn
+}
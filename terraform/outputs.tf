@@ -28,6 +28,11 @@ output "lambda_function_name" {
   value       = module.api.lambda_function_name
 }
 
+output "cleanup_function_name" {
+  description = "Cleanup Lambda function name"
+  value       = module.api.cleanup_function_name
+}
+
 output "frontend_bucket_name" {
   description = "S3 bucket name for frontend"
   value       = module.frontend.bucket_name
@@ -46,6 +46,12 @@ variable "cognito_logout_urls" {
   default     = ["http://localhost:5173/login"]
 }
 
+variable "api_prewarm" {
+  description = "When the API prewarms its DynamoDB connection and Cognito keys (off, init)"
+  type        = string
+  default     = "init"
+}
+
 variable "cors_allowed_origins" {
   description = "CORS allowed origins"
   type        = list(string)